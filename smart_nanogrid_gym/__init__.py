@@ -1,8 +1,9 @@
 from gym.envs.registration import registry, register, make, spec
 
 
+# Episodes end on their own after all timesteps of the requested days, so no step limit is set, which would cut off
+# longer episodes, e.g. ten days of hourly timesteps
 register(
      id='SmartNanogridEnv-v0',
      entry_point='smart_nanogrid_gym.envs:SmartNanogridEnv',
-     max_episode_steps=200,
 )
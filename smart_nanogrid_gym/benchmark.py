@@ -0,0 +1,166 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from smart_nanogrid_gym.envs import SmartNanogridEnv
+
+# Version of the json result layout, increase it whenever result keys change, so that older results are not compared
+BENCHMARK_SCHEMA_VERSION = 1
+
+BENCHMARK_VARIANTS = {
+    'basic': {'vehicle_to_everything': False, 'pv_system_available_in_model': False, 'battery_system_available_in_model': False},
+    'b-pv': {'vehicle_to_everything': False, 'pv_system_available_in_model': True, 'battery_system_available_in_model': True},
+    'v2x': {'vehicle_to_everything': True, 'pv_system_available_in_model': False, 'battery_system_available_in_model': False},
+    'v2x-b-pv': {'vehicle_to_everything': True, 'pv_system_available_in_model': True, 'battery_system_available_in_model': True}
+}
+BENCHMARK_NUMBERS_OF_CHARGERS = [2, 8, 32, 128, 512]
+BENCHMARK_TIME_INTERVALS = ['15min', '30min', '1h', '2h']
+
+
+def create_benchmark_environment(variant_name, number_of_chargers, time_interval):
+    return SmartNanogridEnv(number_of_chargers=number_of_chargers, time_interval=time_interval,
+                            charging_mode='bounded', vehicle_uncharged_penalty_mode='sparse',
+                            environment_mode='training', logging_policy='off', **BENCHMARK_VARIANTS[variant_name])
+
+
+def run_random_policy(env, number_of_steps, random_generator):
+    # Actions are drawn upfront and only steps are timed, so that neither drawing nor limiting actions is measured
+    actions = random_generator.uniform(env.action_space.low, env.action_space.high,
+                                       (number_of_steps,) + env.action_space.shape).astype(np.float32)
+    vehicle_to_everything = env.central_management_system.vehicle_to_everything
+
+    stepping_time = 0.0
+    for action in actions:
+        if vehicle_to_everything:
+            limit_vehicle_discharging(env, action)
+        start_time = time.perf_counter()
+        _, _, terminated, truncated, _ = env.step(action)
+        stepping_time += time.perf_counter() - start_time
+        if terminated or truncated:
+            env.reset()
+    return stepping_time
+
+
+def limit_vehicle_discharging(env, action):
+    # Until a building is added to the model, vehicles can only discharge into other vehicles, so discharging actions
+    # are dropped, largest discharging power first, until the charging vehicles take all of the discharged power
+    charging_station = env.central_management_system.charging_station
+    electric_vehicle_info = charging_station.electric_vehicle_info
+    occupied, vehicle_state_of_charge, vehicle_capacity = charging_station.get_connected_vehicles(env.timestep)
+    charger_actions = action[:charging_station.NUMBER_OF_CHARGERS]
+
+    charging = occupied & (charger_actions > 0)
+    total_charging_power = (charger_actions[charging] * electric_vehicle_info.max_charging_power
+                            * electric_vehicle_info.charging_efficiency).sum()
+
+    # Vehicles discharge at least their requested power, but the whole stored energy if it lasts for the timestep
+    discharging_chargers = np.flatnonzero(occupied & (charger_actions < 0))
+    discharging_power = np.maximum(
+        vehicle_state_of_charge[discharging_chargers] * vehicle_capacity[discharging_chargers]
+        / env.TIME_INTERVAL,
+        -charger_actions[discharging_chargers] * electric_vehicle_info.max_discharging_power
+        * electric_vehicle_info.discharging_efficiency)
+    order = np.argsort(discharging_power)
+    # Margin keeps the total demand positive despite a different summation order in the environment
+    dropped = np.cumsum(discharging_power[order]) > 0.999 * total_charging_power
+    charger_actions[discharging_chargers[order[dropped]]] = 0
+
+
+def measure_environment(variant_name, number_of_chargers, time_interval, number_of_steps, number_of_resets, seed):
+    # Every measured value is in seconds, except for peak memory, which is in bytes
+    random_generator = np.random.default_rng(seed)
+
+    gc.collect()
+    start_time = time.perf_counter()
+    env = create_benchmark_environment(variant_name, number_of_chargers, time_interval)
+    construction_time = time.perf_counter() - start_time
+
+    reset_latencies = []
+    for reset_seed in random_generator.integers(0, 2 ** 32, number_of_resets):
+        start_time = time.perf_counter()
+        env.reset(seed=int(reset_seed))
+        reset_latencies.append(time.perf_counter() - start_time)
+
+    stepping_time = run_random_policy(env, number_of_steps, random_generator)
+    env.close()
+
+    return {
+        'construction_time': construction_time,
+        'reset_latency_mean': float(np.mean(reset_latencies)),
+        'reset_latency_max': float(np.max(reset_latencies)),
+        'steps_per_second': number_of_steps / stepping_time,
+        'peak_memory': measure_peak_memory(variant_name, number_of_chargers, time_interval, seed)
+    }
+
+
+def measure_peak_memory(variant_name, number_of_chargers, time_interval, seed):
+    # Traced in a separate run, because tracing allocations slows down the timed run
+    gc.collect()
+    tracemalloc.start()
+    try:
+        env = create_benchmark_environment(variant_name, number_of_chargers, time_interval)
+        env.reset(seed=seed)
+        run_random_policy(env, env.TOTAL_TIMESTEPS, np.random.default_rng(seed))
+        env.close()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory
+
+
+def run_benchmarks(variant_names=None, numbers_of_chargers=None, time_intervals=None, number_of_steps=1000,
+                   number_of_resets=10, seed=0):
+    variant_names = variant_names if variant_names else list(BENCHMARK_VARIANTS)
+    numbers_of_chargers = numbers_of_chargers if numbers_of_chargers else BENCHMARK_NUMBERS_OF_CHARGERS
+    time_intervals = time_intervals if time_intervals else BENCHMARK_TIME_INTERVALS
+
+    results = []
+    for variant_name in variant_names:
+        for number_of_chargers in numbers_of_chargers:
+            for time_interval in time_intervals:
+                result = {'variant': variant_name, 'number_of_chargers': number_of_chargers,
+                          'time_interval': time_interval}
+                # A failing configuration is reported in the results instead of ending the whole suite
+                try:
+                    result.update(measure_environment(variant_name, number_of_chargers, time_interval,
+                                                      number_of_steps, number_of_resets, seed))
+                except Exception as error:
+                    result['error'] = f"{type(error).__name__}: {error}"
+                results.append(result)
+
+    return {
+        'schema_version': BENCHMARK_SCHEMA_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'platform': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                     'system': platform.system(), 'cpu_count': os.cpu_count()},
+        'configuration': {'number_of_steps': number_of_steps, 'number_of_resets': number_of_resets, 'seed': seed},
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark construction, reset and step throughput of the environment')
+    parser.add_argument('--output', type=str, default='', help='Path of the json results, printed if not provided')
+    parser.add_argument('--variants', nargs='+', choices=list(BENCHMARK_VARIANTS), default=None)
+    parser.add_argument('--chargers', nargs='+', type=int, default=None)
+    parser.add_argument('--time_intervals', nargs='+', type=str, default=None)
+    parser.add_argument('--steps', type=int, default=1000, help='Number of timed steps per configuration')
+    parser.add_argument('--resets', type=int, default=10, help='Number of timed resets per configuration')
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+
+    benchmark_results = run_benchmarks(arguments.variants, arguments.chargers, arguments.time_intervals,
+                                       arguments.steps, arguments.resets, arguments.seed)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as fp:
+            json.dump(benchmark_results, fp, indent=2)
+    else:
+        json.dump(benchmark_results, sys.stdout, indent=2)
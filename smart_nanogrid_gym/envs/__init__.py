@@ -1 +1,2 @@
 from smart_nanogrid_gym.envs.smart_nanogrid_environment import SmartNanogridEnv
+from smart_nanogrid_gym.envs.smart_nanogrid_vec_environment import SmartNanogridVecEnv
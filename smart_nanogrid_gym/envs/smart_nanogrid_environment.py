@@ -1,17 +1,15 @@
-import json
-import random
-
 import numpy as np
 import gym
 from gym import spaces
-from gym.utils import seeding
-from scipy.io import savemat
+from numpy.random import SeedSequence, default_rng
 import time
 
 from smart_nanogrid_gym.utils.central_management_system import CentralManagementSystem
 from smart_nanogrid_gym.utils.charging_station import ChargingStation
-from smart_nanogrid_gym.utils.pv_system_manager import PVSystemManager
-from ..utils.config import data_files_directory_path, solvers_files_directory_path
+from smart_nanogrid_gym.utils.io_manager import IOManager
+from smart_nanogrid_gym.utils.price_series import PriceSeries
+from smart_nanogrid_gym.utils.scenario_bank import ScenarioBank
+from ..utils.config import solvers_files_directory_path
 
 
 # Todo: Feat: Set possibility of using different filetypes for saving and loading only for predictions
@@ -31,7 +29,10 @@ from ..utils.config import data_files_directory_path, solvers_files_directory_pa
 class SmartNanogridEnv(gym.Env):
     def __init__(self, price_model=0, number_of_chargers=8, pv_system_available_in_model=True, battery_system_available_in_model=True,
                  vehicle_to_everything=False, enable_different_vehicle_battery_capacities=True, enable_requested_state_of_charge=False,
-                 algorithm_used='', environment_mode='', time_interval='', charging_mode='', vehicle_uncharged_penalty_mode=''):
+                 algorithm_used='', environment_mode='', time_interval='', charging_mode='', vehicle_uncharged_penalty_mode='',
+                 logging_policy='', logging_frequency=1, logging_file_format='', asynchronous_writing=True,
+                 writer_queue_capacity=8, scenario_bank_path='', number_of_days=1, enable_profiling=False,
+                 enable_info_kpis=False, price_series_path=''):
         # Todo: Feat: Add possibility to specify whether to use same capacity or different ones for vehicle battery
         self.CURRENT_PRICE_MODEL = price_model
         self.NUMBER_OF_CHARGERS = number_of_chargers
@@ -48,8 +49,12 @@ class SmartNanogridEnv(gym.Env):
         self.CHARGING_MODE = charging_mode
         self.VEHICLE_UNCHARGED_PENALTY_MODE = vehicle_uncharged_penalty_mode
 
-        self.NUMBER_OF_DAYS_TO_PREDICT = 1
+        # Episode spans all days without reinitialisation, i.e. vehicles stay over midnight and the battery keeps its
+        # state of charge
+        self.NUMBER_OF_DAYS_TO_PREDICT = number_of_days
+        self.TOTAL_TIMESTEPS = int(24 / self.TIME_INTERVAL) * self.NUMBER_OF_DAYS_TO_PREDICT
         self.NUMBER_OF_HOURS_AHEAD = 3
+        self.ENABLE_INFO_KPIS = enable_info_kpis
 
         self.central_management_system = CentralManagementSystem(self.BATTERY_SYSTEM_AVAILABLE_IN_MODEL,
                                                                  self.PV_SYSTEM_AVAILABLE_IN_MODEL,
@@ -58,34 +63,38 @@ class SmartNanogridEnv(gym.Env):
                                                                  self.NUMBER_OF_CHARGERS,
                                                                  enable_different_vehicle_battery_capacities,
                                                                  enable_requested_state_of_charge,
-                                                                 self.CHARGING_MODE, self.VEHICLE_UNCHARGED_PENALTY_MODE)
+                                                                 self.CHARGING_MODE, self.VEHICLE_UNCHARGED_PENALTY_MODE,
+                                                                 enable_profiling)
 
         self.timestep = None
         self.info = None
         self.random_pv_shift_ratio = 1.0
+        self.seed_sequence = None
+        self.random_generator = None
+
+        self.episode_recorder = self.central_management_system.episode_recorder
+        self.io_manager = IOManager(logging_policy, logging_frequency, logging_file_format, asynchronous_writing,
+                                    writer_queue_capacity)
 
-        self.grid_energy_per_timestep, self.solar_energy_utilization_per_timestep = None, None
-        self.total_cost_per_timestep, self.total_vehicle_penalty_per_timestep = None, None
-        self.total_penalty_per_timestep, self.total_battery_penalty_per_timestep = None, None
-        self.battery_per_timestep, self.grid_energy_cost_per_timestep = None, None
-        self.initial_battery_per_simulation_day, self.grid_power_per_timestep = None, None
-
-        self.battery_soc_below_dod_penalty_per_timestep = None
-        self.low_resource_utilisation_penalty_per_timestep = None
-        self.battery_overcharging_penalty_per_timestep = None
-        self.battery_over_discharging_penalty_per_timestep = None
-        self.insufficiently_charged_vehicle_penalty_per_timestep = None
-        self.needlessly_charged_vehicle_penalty_per_timestep = None
-        self.overcharged_vehicle_penalty_per_timestep = None
-        self.over_discharged_vehicle_penalty_per_timestep = None
-        self.battery_calculated_power_value_per_timestep = None
-
-        self.battery_action_per_timestep, self.charger_actions_per_timestep = None, None
-        self.total_charging_power_per_timestep, self.total_discharging_power_per_timestep = None, None
-        self.charger_power_values_per_timestep, self.battery_power_value_per_timestep = None, None
-        self.dis_charging_nonexistent_vehicles_penalty_per_timestep = None
+        if scenario_bank_path:
+            self.scenario_bank = ScenarioBank(scenario_bank_path, self.NUMBER_OF_CHARGERS,
+                                              self.central_management_system.charging_station.array_columns)
+        else:
+            self.scenario_bank = None
+        self.scenario_index = None
+
+        # Market prices of a whole episode are taken from the series instead of the price model, if one is provided
+        if price_series_path:
+            accountant = self.central_management_system.accountant
+            self.price_series = PriceSeries(price_series_path,
+                                            self.NUMBER_OF_DAYS_TO_PREDICT + accountant.PRICE_DAY_PADDING,
+                                            self.TIME_INTERVAL)
+        else:
+            self.price_series = None
+        self.price_day_index = None
 
         self.simulated_single_day = False
+        self.seed()
 
         amount_of_observed_variables = 1 + int(self.PV_SYSTEM_AVAILABLE_IN_MODEL)
         number_of_observed_charger_values = 2
@@ -138,50 +147,28 @@ class SmartNanogridEnv(gym.Env):
             return float(1)
 
     def step(self, actions):
-        results = self.central_management_system.simulate(self.timestep, actions, self.random_pv_shift_ratio)
-
-        self.total_cost_per_timestep.append(results['Total cost'])
-        self.grid_energy_cost_per_timestep.append(results['Grid energy cost'])
-        self.grid_energy_per_timestep.append(results['Grid energy'])
-        self.grid_power_per_timestep.append(results['Grid power'])
-        self.solar_energy_utilization_per_timestep.append(results['Utilized solar energy'])
-        self.total_penalty_per_timestep.append(results['Total penalty'])
-
-        self.total_battery_penalty_per_timestep.append(results['Total battery penalty'])
-        self.battery_soc_below_dod_penalty_per_timestep.append(results['Battery soc below dod penalty'])
-        self.low_resource_utilisation_penalty_per_timestep.append(results['Low resource utilisation penalty'])
-        self.battery_overcharging_penalty_per_timestep.append(results['Battery overcharging penalty'])
-        self.battery_over_discharging_penalty_per_timestep.append(results['Battery over discharging penalty'])
-
-        self.total_vehicle_penalty_per_timestep.append(results['Total vehicle penalty'])
-        self.insufficiently_charged_vehicle_penalty_per_timestep.append(results['Insufficiently charged vehicles penalty'])
-        self.needlessly_charged_vehicle_penalty_per_timestep.append(results['Needlessly charged vehicles penalty'])
-        self.overcharged_vehicle_penalty_per_timestep.append(results['Overcharged vehicles penalty'])
-        self.over_discharged_vehicle_penalty_per_timestep.append(results['Over discharged vehicles penalty'])
-
-        self.battery_action_per_timestep.append(results['Battery action'])
-        self.charger_actions_per_timestep.append(results['Charger actions'])
-        self.total_charging_power_per_timestep.append(results['Total charging power'])
-        self.total_discharging_power_per_timestep.append(results['Total discharging power'])
-        self.charger_power_values_per_timestep.append(results['Charger power values'])
-        self.battery_power_value_per_timestep.append(results['Battery power value'])
-        self.battery_calculated_power_value_per_timestep.append(results['Battery calculated power value'])
-        self.battery_per_timestep.append(results['Battery state of charge'])
-        self.initial_battery_per_simulation_day = results['Initial battery state of charge']
-        self.dis_charging_nonexistent_vehicles_penalty_per_timestep.append(results['DisCharging nonexistent vehicles penalty'])
+        simulated_timestep = self.timestep
+        record = self.central_management_system.simulate(self.timestep, actions, self.random_pv_shift_ratio)
 
         observations = self.__get_observations()
         self.timestep = self.timestep + 1
 
-        self.simulated_single_day = self.__check_is_single_day_simulated()
+        self.simulated_single_day = self.__check_are_all_days_simulated()
         if self.simulated_single_day:
             self.timestep = 0
             # To simulate different solar days
             self.__save_prediction_results()
-            self.random_pv_shift_ratio = random.randint(0, 180) / 100
+            self.random_pv_shift_ratio = self.__generate_random_pv_shift_ratio()
 
-        reward = -results['Total cost']
+        reward = -record['Total_cost']
         self.info = {}
+        if self.ENABLE_INFO_KPIS:
+            self.info['kpis'] = self.episode_recorder.get_kpis(self.episode_recorder.get_record(simulated_timestep))
+            if self.simulated_single_day:
+                self.info['episode_kpis'] = self.episode_recorder.get_episode_kpis()
+        if self.simulated_single_day and self.central_management_system.profiler:
+            # Phase timings aggregated over all steps since construction or the last profile reset
+            self.info['profile'] = self.get_profile()
 
         out_of_scope = False
 
@@ -230,52 +217,21 @@ class SmartNanogridEnv(gym.Env):
 
         return observations
 
-    def __check_is_single_day_simulated(self):
-        if self.timestep == (24.0 / self.TIME_INTERVAL):
+    def __check_are_all_days_simulated(self):
+        if self.timestep == self.TOTAL_TIMESTEPS:
             return True
         else:
             return False
 
     def __save_prediction_results(self):
+        if not self.io_manager.register_finished_episode(self.ENVIRONMENT_MODE):
+            return
+
+        charging_station = self.central_management_system.charging_station
         if self.PV_SYSTEM_AVAILABLE_IN_MODEL:
             available_solar_energy = self.central_management_system.pv_system_manager.get_available_solar_energy()
-            available_solar_energy = available_solar_energy.tolist()
         else:
-            available_solar_energy = []
-
-        prediction_results = {
-            'SOC': self.central_management_system.charging_station.get_vehicles_state_of_charge().tolist(),
-            'Grid_power': self.grid_power_per_timestep,
-            'Grid_energy': self.grid_energy_per_timestep,
-            'Utilized_solar_energy': self.solar_energy_utilization_per_timestep,
-            'Total_vehicle_penalties': self.total_vehicle_penalty_per_timestep,
-            'Total_battery_penalties': self.total_battery_penalty_per_timestep,
-            'Total_penalties': self.total_penalty_per_timestep,
-            'Available_solar_energy': available_solar_energy,
-            'Total_cost': self.total_cost_per_timestep,
-            'Battery_state_of_charge': self.battery_per_timestep,
-            'Initial_battery_state_of_charge': self.initial_battery_per_simulation_day,
-            'Grid_energy_cost': self.grid_energy_cost_per_timestep,
-            'Battery_action': self.battery_action_per_timestep,
-            'Charger_actions': self.charger_actions_per_timestep,
-            'Total_charging_power': self.total_charging_power_per_timestep,
-            'Total_discharging_power': self.total_discharging_power_per_timestep,
-            'Charger_power_values': self.charger_power_values_per_timestep,
-            'Battery_power_value': self.battery_power_value_per_timestep,
-            'Battery_SOC_below_DoD_penalties': self.battery_soc_below_dod_penalty_per_timestep,
-            'Low_resource_utilisation_penalties': self.low_resource_utilisation_penalty_per_timestep,
-            'Battery_overcharging_penalties': self.battery_overcharging_penalty_per_timestep,
-            'Battery_over_discharging_penalties': self.battery_over_discharging_penalty_per_timestep,
-            'Insufficiently_charged_vehicle_penalties': self.insufficiently_charged_vehicle_penalty_per_timestep,
-            'Needlessly_charged_vehicle_penalties': self.needlessly_charged_vehicle_penalty_per_timestep,
-            'Overcharged_vehicle_penalties': self.overcharged_vehicle_penalty_per_timestep,
-            'Over_discharged_vehicle_penalties': self.over_discharged_vehicle_penalty_per_timestep,
-            'Battery_calculated_power_value': self.battery_calculated_power_value_per_timestep,
-            'DisCharging_nonexistent_vehicles_penalties': self.dis_charging_nonexistent_vehicles_penalty_per_timestep
-        }
-
-        with open(data_files_directory_path + "prediction_results.json", "w") as fp:
-            json.dump(prediction_results, fp, indent=4)
+            available_solar_energy = np.array([])
 
         if self.BATTERY_SYSTEM_AVAILABLE_IN_MODEL and self.PV_SYSTEM_AVAILABLE_IN_MODEL and self.VEHICLE_TO_EVERYTHING:
             model_variant_name = 'v2x-b-pv'
@@ -302,68 +258,106 @@ class SmartNanogridEnv(gym.Env):
         file_name_suffix = f'{self.NUMBER_OF_CHARGERS}ch-{self.REQUESTED_TIME_INTERVAL}'
         file_name = f'{file_name_prefix}-{file_name_root}-{file_name_suffix}'
 
-        with open(saving_directory_path + file_name + "-prediction_results.json", "w") as fp:
-            json.dump(prediction_results, fp, indent=4)
+        # Nothing is copied, records of the next episode are newly allocated and its scenario is loaded separately, so
+        # the episode can be saved later, e.g. only on closing with the last_only policy
+        episode_log = {
+            'SOC_after_episode': charging_station.get_state_of_charge_after_episode(),
+            'Available_solar_energy': available_solar_energy,
+            'Records': self.episode_recorder.get_records(),
+            'Day_fields': self.episode_recorder.DAY_FIELDS,
+            'Initial_values_collector': charging_station.get_initial_values_collector(),
+            'Saving_directory_path': saving_directory_path,
+            'File_name': file_name
+        }
+        self.io_manager.log_episode(episode_log, self.ENVIRONMENT_MODE)
 
-        self.central_management_system.charging_station.save_initial_values_to_json_file(saving_directory_path,
-                                                                                         filename=file_name)
+    def reset(self, generate_new_initial_values=True, algorithm_used='', environment_mode='', scenario_index=None,
+              seed=None, price_day_index=None, **kwargs):
+        if seed is not None:
+            self.seed(seed)
 
-    def reset(self, generate_new_initial_values=True, algorithm_used='', environment_mode='', **kwargs):
         self.timestep = 0
         self.simulated_single_day = False
-        self.total_cost_per_timestep = []
-        self.grid_power_per_timestep = []
-        self.grid_energy_per_timestep = []
-        self.solar_energy_utilization_per_timestep = []
-        self.total_vehicle_penalty_per_timestep = []
-        self.total_battery_penalty_per_timestep = []
-        self.total_penalty_per_timestep = []
-        self.battery_per_timestep = []
-        self.initial_battery_per_simulation_day = 0.0
-        self.grid_energy_cost_per_timestep = []
-        self.battery_action_per_timestep = []
-        self.charger_actions_per_timestep = []
-        self.total_charging_power_per_timestep = []
-        self.total_discharging_power_per_timestep = []
-        self.charger_power_values_per_timestep = []
-        self.battery_power_value_per_timestep = []
-
-        self.battery_soc_below_dod_penalty_per_timestep = []
-        self.low_resource_utilisation_penalty_per_timestep = []
-        self.battery_overcharging_penalty_per_timestep = []
-        self.battery_over_discharging_penalty_per_timestep = []
-        self.insufficiently_charged_vehicle_penalty_per_timestep = []
-        self.needlessly_charged_vehicle_penalty_per_timestep = []
-        self.overcharged_vehicle_penalty_per_timestep = []
-        self.over_discharged_vehicle_penalty_per_timestep = []
-        self.battery_calculated_power_value_per_timestep = []
-        self.dis_charging_nonexistent_vehicles_penalty_per_timestep = []
+        self.episode_recorder.clear()
 
         self.ALGORITHM_USED = algorithm_used if algorithm_used else self.ALGORITHM_USED
         self.ENVIRONMENT_MODE = environment_mode if environment_mode else self.ENVIRONMENT_MODE
 
         # Todo: Feat: Add reset to all subclasses and to price and pv if different models have different configs for them
 
-        self.__load_initial_simulation_values(generate_new_initial_values)
+        if self.scenario_bank:
+            self.__load_scenario_from_bank(generate_new_initial_values, scenario_index)
+            info = {'scenario_index': self.scenario_index}
+        else:
+            self.__load_initial_simulation_values(generate_new_initial_values)
+            info = {}
+
+        if self.price_series:
+            self.__load_prices_from_series(generate_new_initial_values, price_day_index)
+            info['price_day_index'] = self.price_day_index
+            info['price_day'] = str(self.price_series.get_day_timestamp(self.price_day_index))
 
-        self.random_pv_shift_ratio = random.randint(0, 180) / 100
+        self.random_pv_shift_ratio = self.__generate_random_pv_shift_ratio()
 
-        return self.__get_observations(), {}
+        return self.__get_observations(), info
+
+    def __generate_random_pv_shift_ratio(self):
+        if self.PV_SYSTEM_AVAILABLE_IN_MODEL:
+            return self.central_management_system.pv_system_manager.generate_random_shift_ratio()
+        else:
+            return 1.0
+
+    def __load_scenario_from_bank(self, generate_new_initial_values, scenario_index):
+        # A new scenario is sampled from the bank, unless a specific one is requested or the last one is replayed
+        if scenario_index is not None:
+            self.scenario_index = int(scenario_index)
+        elif generate_new_initial_values or self.scenario_index is None:
+            self.scenario_index = int(self.scenario_bank.sample_scenario_indices(self.random_generator))
+
+        scenario = self.scenario_bank.get_scenario(self.scenario_index)
+        self.central_management_system.charging_station.load_scenario(scenario)
+
+    def __load_prices_from_series(self, generate_new_initial_values, price_day_index):
+        # A new day is sampled from the series, unless a specific one is requested, e.g. to iterate over all days of
+        # the series, or the last one is replayed
+        if price_day_index is not None:
+            self.price_day_index = int(price_day_index)
+        elif generate_new_initial_values or self.price_day_index is None:
+            self.price_day_index = int(self.price_series.sample_day_indices(self.random_generator))
+
+        self.central_management_system.accountant.load_energy_price(self.price_series.get_prices(self.price_day_index),
+                                                                    self.price_series.PRICE_MAX)
 
     def __load_initial_simulation_values(self, generate_new_initial_values):
+        charging_station = self.central_management_system.charging_station
         if generate_new_initial_values:
-            self.central_management_system.charging_station.generate_new_initial_values(self.TIME_INTERVAL)
+            charging_station.generate_new_initial_values(self.TIME_INTERVAL)
+            self.io_manager.save_initial_values(charging_station.get_initial_values_collector(), self.ENVIRONMENT_MODE)
         else:
-            self.central_management_system.charging_station.load_initial_values()
+            charging_station.load_initial_values(self.io_manager.load_initial_values())
 
     def render(self, mode="human"):
         pass
 
+    def get_profile(self):
+        return self.central_management_system.get_profile()
+
+    def reset_profile(self):
+        self.central_management_system.reset_profile()
+
     def seed(self, seed=None):
-        # self.np_random, seed = seeding.np_random(seed)
-        # return [seed]
-        pass
+        # Seed can be an integer or a seed sequence spawned for one of many parallel environments. A single generator
+        # is shared by the charging station, the PV system manager and the scenario bank sampling, so the global
+        # random state is never used.
+        self.seed_sequence = seed if isinstance(seed, SeedSequence) else SeedSequence(seed)
+        self.random_generator = default_rng(self.seed_sequence)
+        self._np_random = self.random_generator
+        self.central_management_system.set_random_generator(self.random_generator)
+        return [self.seed_sequence.entropy]
+
+    def spawn_seed_sequences(self, number_of_seed_sequences):
+        # Independent child seed sequences, e.g. for environments running in parallel processes
+        return self.seed_sequence.spawn(number_of_seed_sequences)
 
     def close(self):
-        # return 0
-        pass
+        self.io_manager.close()
@@ -0,0 +1,387 @@
+import numpy as np
+from numpy.random import SeedSequence, default_rng
+
+from smart_nanogrid_gym.envs.smart_nanogrid_environment import SmartNanogridEnv
+
+try:
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:
+    # stable-baselines3 is only needed by the solvers, the batched environment also works without it
+    VecEnv = object
+
+
+class SmartNanogridVecEnv(VecEnv):
+    # Simulates N independent nanogrids with the same configuration in lockstep. Every nanogrid state is kept in
+    # (environments, chargers, timesteps) arrays so that a single step advances all nanogrids with array operations
+    # instead of looping over environments and chargers.
+    def __init__(self, number_of_environments=1, **environment_configuration):
+        self.environment = SmartNanogridEnv(**environment_configuration)
+
+        self.NUMBER_OF_ENVIRONMENTS = number_of_environments
+        self.NUMBER_OF_CHARGERS = self.environment.NUMBER_OF_CHARGERS
+        self.NUMBER_OF_HOURS_AHEAD = self.environment.NUMBER_OF_HOURS_AHEAD
+        self.TIME_INTERVAL = self.environment.TIME_INTERVAL
+        self.TOTAL_TIMESTEPS = self.environment.TOTAL_TIMESTEPS
+        self.VEHICLE_TO_EVERYTHING = self.environment.VEHICLE_TO_EVERYTHING
+
+        central_management_system = self.environment.central_management_system
+        self.charging_station = central_management_system.charging_station
+        self.accountant = central_management_system.accountant
+        self.pv_system_manager = central_management_system.pv_system_manager
+        self.battery_system = central_management_system.battery_system
+        self.penaliser = central_management_system.penaliser
+        self.episode_recorder = central_management_system.episode_recorder
+        self.electric_vehicle = self.charging_station.electric_vehicle_info
+
+        # Station only keeps a ring buffer of days, batched episodes are simulated on arrays of the whole episode
+        array_shape = (self.NUMBER_OF_ENVIRONMENTS, self.NUMBER_OF_CHARGERS, self.charging_station.array_columns)
+        self.vehicle_state_of_charge = np.zeros(array_shape)
+        self.vehicle_capacities = np.zeros(array_shape)
+        self.occupancy = np.zeros(array_shape)
+        self.requested_end_state_of_charge = np.zeros(array_shape)
+        self.is_arrival = np.zeros(array_shape, dtype=bool)
+        self.time_until_departure = np.zeros(array_shape)
+        self.vehicle_departing = np.zeros(array_shape, dtype=bool)
+        self.vehicle_departing_in_next_n_timesteps = np.zeros(array_shape, dtype=bool)
+        self.penalty_check_vehicles = np.zeros(array_shape[:2], dtype=bool)
+
+        self.battery_state_of_charge = np.zeros(self.NUMBER_OF_ENVIRONMENTS)
+        self.initial_battery_state_of_charge = np.zeros(self.NUMBER_OF_ENVIRONMENTS)
+        if self.battery_system:
+            self.battery_state_of_charge.fill(self.battery_system.get_state_of_charge())
+            self.initial_battery_state_of_charge.fill(self.battery_system.get_initial_state_of_charge())
+
+        self.random_pv_shift_ratio = np.ones(self.NUMBER_OF_ENVIRONMENTS)
+
+        # KPIs have the same keys as the ones of the single environment, penalties which are not simulated in batches
+        # are also always zero there
+        if self.environment.ENABLE_INFO_KPIS:
+            self.kpi_records = np.zeros((self.TOTAL_TIMESTEPS, self.NUMBER_OF_ENVIRONMENTS),
+                                        dtype=self.episode_recorder.kpi_record_type)
+        else:
+            self.kpi_records = None
+
+        self.scenario_bank = self.environment.scenario_bank
+        self.scenario_generator = self.charging_station.scenario_generator
+        self.scenario_indices = np.zeros(self.NUMBER_OF_ENVIRONMENTS, dtype=int)
+        # Generators of the nanogrids if they were seeded one by one, otherwise the one of the configured environment
+        self.random_generators = None
+        self.timestep = 0
+        self.actions = None
+
+        if VecEnv is object:
+            self.num_envs = self.NUMBER_OF_ENVIRONMENTS
+            self.observation_space = self.environment.observation_space
+            self.action_space = self.environment.action_space
+        else:
+            super().__init__(self.NUMBER_OF_ENVIRONMENTS, self.environment.observation_space,
+                             self.environment.action_space)
+
+    def reset(self):
+        self.timestep = 0
+        # Nanogrids seeded one by one draw a single episode each, otherwise all of them are drawn as one batch
+        if self.random_generators:
+            random_generators = self.random_generators
+            number_of_episodes_per_generator = 1
+        else:
+            random_generators = [self.environment.random_generator]
+            number_of_episodes_per_generator = self.NUMBER_OF_ENVIRONMENTS
+
+        if self.scenario_bank:
+            self.scenario_indices = np.concatenate([
+                self.scenario_bank.sample_scenario_indices(random_generator, number_of_episodes_per_generator)
+                for random_generator in random_generators])
+            self.load_scenarios(self.scenario_bank.get_scenarios(self.scenario_indices))
+        else:
+            self.load_scenarios(np.concatenate([
+                self.scenario_generator.generate_days(number_of_episodes_per_generator, random_generator)
+                for random_generator in random_generators]))
+
+        price_series = self.environment.price_series
+        if price_series:
+            # Accountant is shared, therefore all nanogrids of the batch are simulated with prices of the same day
+            price_day_index = int(price_series.sample_day_indices(self.environment.random_generator))
+            self.accountant.load_energy_price(price_series.get_prices(price_day_index), price_series.PRICE_MAX)
+
+        self.random_pv_shift_ratio = self.generate_random_pv_shift_ratios(random_generators,
+                                                                          number_of_episodes_per_generator)
+
+        return self.get_observations()
+
+    def load_scenarios(self, scenarios):
+        self.vehicle_state_of_charge[:] = scenarios['SOC']
+        self.vehicle_capacities[:] = scenarios['Vehicle_capacities']
+        self.occupancy[:] = scenarios['Charger_occupancy']
+        self.requested_end_state_of_charge[:] = scenarios['Requested_SOC']
+        self.is_arrival[:] = scenarios['Is_arrival']
+
+        self.time_until_departure[:] = scenarios['Time_until_departure']
+        self.vehicle_departing[:] = self.time_until_departure == 1
+        self.vehicle_departing_in_next_n_timesteps[:] = \
+            (self.time_until_departure >= 1) & \
+            (self.time_until_departure <= self.charging_station.DEPARTURE_CHECK_TIMESTEPS)
+
+    def generate_random_pv_shift_ratios(self, random_generators, number_of_ratios_per_generator):
+        if self.pv_system_manager:
+            return np.concatenate([
+                self.pv_system_manager.generate_random_shift_ratio(number_of_ratios_per_generator, random_generator)
+                for random_generator in random_generators])
+        else:
+            return np.ones(self.NUMBER_OF_ENVIRONMENTS)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def step_async(self, actions):
+        self.actions = np.asarray(actions, dtype=np.float64).reshape(self.NUMBER_OF_ENVIRONMENTS, -1)
+
+    def step_wait(self):
+        simulated_timestep = self.timestep
+        total_cost = self.manage_nanogrids(self.timestep, self.actions)
+
+        observations = self.get_observations()
+        self.timestep = self.timestep + 1
+
+        rewards = (-total_cost).astype(np.float32)
+        infos = [{} for _ in range(self.NUMBER_OF_ENVIRONMENTS)]
+        if self.kpi_records is not None:
+            for environment_index, info in enumerate(infos):
+                info['kpis'] = self.episode_recorder.get_kpis(self.kpi_records[simulated_timestep, environment_index])
+
+        simulated_single_day = self.timestep == self.TOTAL_TIMESTEPS
+        dones = np.full(self.NUMBER_OF_ENVIRONMENTS, simulated_single_day)
+        if simulated_single_day:
+            for environment_index, info in enumerate(infos):
+                info['terminal_observation'] = observations[environment_index]
+                info['TimeLimit.truncated'] = False
+                if self.kpi_records is not None:
+                    info['episode_kpis'] = self.episode_recorder.get_episode_kpis(self.kpi_records[:, environment_index])
+            observations = self.reset()
+
+        return observations, rewards, dones, infos
+
+    def manage_nanogrids(self, timestep, actions):
+        charger_actions = actions[:, 0:self.NUMBER_OF_CHARGERS]
+
+        if self.battery_system:
+            battery_actions = actions[:, -1]
+        else:
+            battery_actions = np.zeros(self.NUMBER_OF_ENVIRONMENTS)
+
+        if timestep == 0:
+            self.initial_battery_state_of_charge[:] = self.battery_state_of_charge
+
+        charger_power_values = self.simulate_vehicle_charging(charger_actions, timestep)
+        total_vehicle_penalty = self.penalise_insufficiently_charged_vehicles(timestep)
+
+        if self.pv_system_manager:
+            available_solar_power = self.pv_system_manager.get_available_solar_produced_power_at_timestep_t(timestep)
+            available_solar_power = available_solar_power * self.random_pv_shift_ratio
+        else:
+            available_solar_power = np.zeros(self.NUMBER_OF_ENVIRONMENTS)
+
+        total_power = charger_power_values.sum(axis=1)
+        grid_power = self.calculate_grid_power(total_power, available_solar_power, battery_actions)
+        grid_energy = grid_power * self.TIME_INTERVAL
+
+        energy_price = self.accountant.get_energy_price_at_time_t(timestep)
+        grid_energy_cost = np.where(grid_energy < 0,
+                                    grid_energy * self.accountant.SELLING_ENERGY_TO_GRID_PRICE_COEFFICIENT * energy_price,
+                                    grid_energy * energy_price)
+
+        total_battery_penalty = self.penalise_battery_state_below_depth_of_discharge()
+        total_penalty = 0.8 * total_battery_penalty + 1 * total_vehicle_penalty
+        total_cost = 0.75 * np.abs(grid_energy_cost) + total_penalty
+
+        if self.kpi_records is not None:
+            # Every simulated field is written at each timestep, so records of the previous episode need no clearing
+            kpi_record = self.kpi_records[timestep]
+            kpi_record['Grid_energy'] = grid_energy
+            kpi_record['Grid_energy_cost'] = grid_energy_cost
+            kpi_record['Total_cost'] = total_cost
+            kpi_record['Utilized_solar_energy'] = available_solar_power
+            kpi_record['Total_penalties'] = total_penalty
+            kpi_record['Total_vehicle_penalties'] = total_vehicle_penalty
+            kpi_record['Total_battery_penalties'] = total_battery_penalty
+            kpi_record['Insufficiently_charged_vehicle_penalties'] = total_vehicle_penalty
+            kpi_record['Battery_SOC_below_DoD_penalties'] = total_battery_penalty
+            kpi_record['DisCharging_nonexistent_vehicles_penalties'] = \
+                100 * ((self.occupancy[:, :, timestep] != 1) & (charger_actions != 0)).sum(axis=1)
+            kpi_record['Battery_state_of_charge'] = self.battery_state_of_charge
+
+        return total_cost
+
+    def simulate_vehicle_charging(self, charger_actions, timestep):
+        occupied = self.occupancy[:, :, timestep] == 1
+        arriving = self.is_arrival[:, :, timestep]
+
+        vehicle_state_of_charge = np.where(arriving, self.vehicle_state_of_charge[:, :, timestep],
+                                           self.vehicle_state_of_charge[:, :, timestep - 1])
+        vehicle_capacity = np.where(arriving, self.vehicle_capacities[:, :, timestep],
+                                    self.vehicle_capacities[:, :, timestep - 1])
+
+        charging = occupied & (charger_actions > 0)
+        discharging = occupied & (charger_actions < 0)
+
+        charging_power = charger_actions * self.electric_vehicle.max_charging_power \
+            * self.electric_vehicle.charging_efficiency
+        discharging_power = charger_actions * self.electric_vehicle.max_discharging_power \
+            * self.electric_vehicle.discharging_efficiency
+        power_values = np.where(charging, charging_power, np.where(discharging, discharging_power, 0.0))
+
+        state_of_charge_value_change = np.divide(power_values * self.TIME_INTERVAL, vehicle_capacity,
+                                                 out=np.zeros_like(power_values), where=occupied)
+        calculated_state_of_charge = vehicle_state_of_charge + state_of_charge_value_change
+
+        # Same flag as in ChargingStation.simulate_vehicle_charging, it limits discharging power to the energy stored
+        # in the vehicle
+        over_discharging_flag = np.ceil(0.5 * (1 + np.sign(calculated_state_of_charge))).astype(bool)
+        possible_discharging_power = (vehicle_state_of_charge * vehicle_capacity) / self.TIME_INTERVAL
+        power_values = np.where(discharging & over_discharging_flag, -possible_discharging_power, power_values)
+
+        next_state_of_charge = np.where(charging, np.minimum(calculated_state_of_charge, 1.0),
+                                        np.where(discharging, np.maximum(0.0, calculated_state_of_charge),
+                                                 vehicle_state_of_charge))
+        self.vehicle_state_of_charge[:, :, timestep] = np.where(occupied, next_state_of_charge,
+                                                                self.vehicle_state_of_charge[:, :, timestep])
+
+        return power_values
+
+    def penalise_insufficiently_charged_vehicles(self, timestep):
+        arriving = self.is_arrival[:, :, timestep]
+        requested_state_of_charge = np.where(arriving, self.requested_end_state_of_charge[:, :, timestep],
+                                             self.requested_end_state_of_charge[:, :, timestep - 1])
+        current_state_of_charge = np.where(arriving, self.vehicle_state_of_charge[:, :, timestep],
+                                           self.vehicle_state_of_charge[:, :, timestep - 1])
+
+        insufficiently_charged_vehicle_penalty, _ = self.penaliser.calculate_state_of_charge_penalties(
+            requested_state_of_charge, current_state_of_charge, self.penalty_check_vehicles)
+
+        return insufficiently_charged_vehicle_penalty.sum(axis=1)
+
+    def calculate_grid_power(self, power_demand, available_solar_power, battery_actions):
+        if not self.VEHICLE_TO_EVERYTHING and (power_demand < 0).any():
+            raise ValueError("Error: If V2X mode is not enabled, then power_demand cannot be less than 0!")
+
+        remaining_power_demand = power_demand - available_solar_power
+
+        if self.battery_system:
+            remaining_power_demand = self.charge_or_discharge_batteries(battery_actions, remaining_power_demand)
+
+        return remaining_power_demand
+
+    def charge_or_discharge_batteries(self, battery_actions, power_demand):
+        charging = battery_actions > 0
+        discharging = battery_actions < 0
+
+        charging_power = battery_actions * self.battery_system.max_charging_power * self.battery_system.charging_efficiency
+        discharging_power = battery_actions * self.battery_system.max_discharging_power \
+            * self.battery_system.discharging_efficiency
+        power_values = np.where(charging, charging_power, np.where(discharging, discharging_power, 0.0))
+
+        calculated_state_of_charge = self.battery_state_of_charge \
+            + (power_values * self.TIME_INTERVAL) / self.battery_system.max_capacity
+
+        over_discharging = discharging & (calculated_state_of_charge < 0)
+        possible_discharging_power = (self.battery_state_of_charge * self.battery_system.max_capacity) / self.TIME_INTERVAL
+        power_values = np.where(over_discharging, -possible_discharging_power, power_values)
+
+        self.battery_state_of_charge = np.where(charging, np.minimum(calculated_state_of_charge, 1.0),
+                                                np.where(discharging, np.maximum(0.0, calculated_state_of_charge),
+                                                         self.battery_state_of_charge))
+
+        return power_demand + power_values
+
+    def penalise_battery_state_below_depth_of_discharge(self):
+        if not self.battery_system:
+            return np.zeros(self.NUMBER_OF_ENVIRONMENTS)
+
+        depth_of_discharge = self.battery_system.depth_of_discharge
+        return np.where(self.battery_state_of_charge < depth_of_discharge,
+                        ((depth_of_discharge - self.battery_state_of_charge) * 10) ** 2, 0.0)
+
+    def get_observations(self):
+        timestep = self.timestep
+        min_timesteps_ahead = timestep + 1
+        max_timesteps_ahead = min_timesteps_ahead + self.NUMBER_OF_HOURS_AHEAD
+
+        self.find_vehicles_for_penalty_check(timestep)
+
+        energy_price = self.accountant.get_normalised_energy_price_at_time_t(timestep)
+        price_predictions = self.accountant.get_normalised_energy_price_in_range(min_timesteps_ahead,
+                                                                                 max_timesteps_ahead)
+        energy_price = np.full((self.NUMBER_OF_ENVIRONMENTS, 1), energy_price)
+        price_predictions = np.tile(price_predictions, (self.NUMBER_OF_ENVIRONMENTS, 1))
+
+        if self.pv_system_manager:
+            random_pv_shift_ratio = self.random_pv_shift_ratio[:, np.newaxis]
+            solar_radiation = self.pv_system_manager.get_normalized_solar_radiation_at_timestep_t(timestep) \
+                * random_pv_shift_ratio
+            radiation_predictions = self.pv_system_manager.get_normalized_solar_predictions_in_range(
+                min_timesteps_ahead, max_timesteps_ahead) * random_pv_shift_ratio
+
+            observed_disturbances = [solar_radiation, energy_price, radiation_predictions, price_predictions]
+        else:
+            observed_disturbances = [energy_price, price_predictions]
+
+        normalized_departures = self.time_until_departure[:, :, timestep] / 24
+        observed_states = [self.vehicle_state_of_charge[:, :, timestep], normalized_departures]
+        if self.battery_system:
+            observed_states.append(self.battery_state_of_charge[:, np.newaxis])
+
+        return np.concatenate(observed_disturbances + observed_states, axis=1, dtype=np.float32)
+
+    def find_vehicles_for_penalty_check(self, timestep):
+        uncharged_penalty_mode = self.charging_station.UNCHARGED_PENALTY_MODE
+
+        if uncharged_penalty_mode == 'no_penalty':
+            self.penalty_check_vehicles = np.zeros(self.penalty_check_vehicles.shape, dtype=bool)
+        elif uncharged_penalty_mode == 'on_departure':
+            self.penalty_check_vehicles = self.vehicle_departing[:, :, timestep]
+        elif uncharged_penalty_mode == 'sparse':
+            self.penalty_check_vehicles = self.vehicle_departing_in_next_n_timesteps[:, :, timestep]
+        elif uncharged_penalty_mode == 'dense':
+            self.penalty_check_vehicles = self.occupancy[:, :, timestep] == 1
+        else:
+            raise ValueError("Error: Wrong vehicle uncharged - penalty mode provided!")
+
+    def close(self):
+        self.environment.close()
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.environment, attr_name) for _ in self.get_environment_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # All nanogrids share one configuration, therefore attributes are set only on the configured environment
+        setattr(self.environment, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self.environment, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self.get_environment_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self.get_environment_indices(indices)]
+
+    def seed(self, seed=None):
+        # A list of seeds or seed sequences gives every nanogrid its own generator, so that nanogrid i draws the same
+        # episodes as a single environment seeded with seed i. A single seed draws all nanogrids as one batch from the
+        # generator of the configured environment and reproduces the whole batch.
+        if isinstance(seed, (list, tuple, np.ndarray)):
+            if len(seed) != self.NUMBER_OF_ENVIRONMENTS:
+                raise ValueError(f"Error: {len(seed)} seeds were provided for {self.NUMBER_OF_ENVIRONMENTS} nanogrids!")
+            seed_sequences = [environment_seed if isinstance(environment_seed, SeedSequence)
+                              else SeedSequence(environment_seed) for environment_seed in seed]
+            self.random_generators = [default_rng(seed_sequence) for seed_sequence in seed_sequences]
+            return [seed_sequence.entropy for seed_sequence in seed_sequences]
+
+        self.random_generators = None
+        seeds = self.environment.seed(seed)
+        return seeds * self.NUMBER_OF_ENVIRONMENTS
+
+    def get_environment_indices(self, indices):
+        if indices is None:
+            return range(self.NUMBER_OF_ENVIRONMENTS)
+        elif isinstance(indices, int):
+            return [indices]
+        return indices
@@ -1,4 +1,36 @@
-from numpy import zeros, array, concatenate
+from functools import cached_property
+
+from numpy import array, repeat, arange, where
+
+MINUTES_PER_HOUR = 60
+HOURS_PER_DAY = 24
+
+# Hourly tariff levels of price model 0, 0 is the low and 1 the high grid tariff
+TARIFF_LEVELS_PER_HOUR = [0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0]
+# Hourly prices of a day per price model, models with several days use them one after another on consecutive days
+HOURLY_PRICES_PER_MODEL = {
+    # low high
+    1: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05, 0.05]],
+    # dynamic
+    2: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06,
+         0.05, 0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05]],
+    # dynamic
+    3: [[0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
+         0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070]],
+    # dynamic
+    4: [[0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1]],
+    # changing days
+    5: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05],
+        [0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06, 0.05,
+         0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05],
+        [0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
+         0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070],
+        [0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1]]
+}
 
 
 class Accountant:
@@ -11,8 +43,11 @@ class Accountant:
         self.low_tariff = 0.0
         self.set_grid_tariffs()
 
-        self.energy_price = zeros((1, 2 * 24))
-        self.energy_price_max = 0.0
+        # One more day of prices than simulated, so that price predictions can look past the last timestep
+        self.PRICE_DAY_PADDING = 1
+        self.current_price_model = 0
+        self.experiment_length_in_days = 1
+        self.time_interval = 1.0
 
     def set_grid_tariffs(self):
         grid_tariff_high = 0.028
@@ -36,66 +71,75 @@ class Accountant:
         return self.total_cost
 
     def get_energy_price_at_time_t(self, t):
-        # Todo: Adjust method to include different simulation days
         return self.energy_price[0, t]
 
     def get_normalised_energy_price_at_time_t(self, t):
-        return self.energy_price[0, t] / self.energy_price_max
+        return self.normalised_energy_price[0, t]
 
     def get_normalised_energy_price_in_range(self, min_timesteps_ahead, max_timesteps_ahead):
-        return self.energy_price[0, min_timesteps_ahead:max_timesteps_ahead] / self.energy_price_max
+        return self.normalised_energy_price[0, min_timesteps_ahead:max_timesteps_ahead]
 
     def set_energy_price(self, current_price_model, experiment_length_in_days, time_interval):
-        self.energy_price = zeros((experiment_length_in_days, 2 * 24))
-        self.initialise_energy_price(current_price_model, experiment_length_in_days, time_interval)
-        self.energy_price_max = self.energy_price.max(where=(self.energy_price >= 0), initial=0)
+        if current_price_model != 0 and current_price_model not in HOURLY_PRICES_PER_MODEL:
+            raise ValueError(f"Error: Price model {current_price_model} does not exist, it should be one of the "
+                             f"following: {[0] + list(HOURLY_PRICES_PER_MODEL)}!")
+        if (MINUTES_PER_HOUR * HOURS_PER_DAY) % round(MINUTES_PER_HOUR * time_interval):
+            raise ValueError(f"Error: Time interval of {time_interval}h does not divide a day into whole minutes!")
+
+        # Prices are only built on first use, a new price model drops the prices built for the previous one
+        self.current_price_model = current_price_model
+        self.experiment_length_in_days = experiment_length_in_days
+        self.time_interval = time_interval
+        self.__dict__.pop('energy_price', None)
+        self.__dict__.pop('energy_price_max', None)
+        self.__dict__.pop('normalised_energy_price', None)
+
+    def load_energy_price(self, energy_price, energy_price_max):
+        # Prices of an episode taken from elsewhere, e.g. a price series, replace the prices of the price model
+        self.energy_price = energy_price
+        self.energy_price_max = energy_price_max
+        self.normalised_energy_price = energy_price / energy_price_max
+
+    @cached_property
+    def energy_price(self):
+        return self.initialise_energy_price(self.current_price_model, self.experiment_length_in_days,
+                                            self.time_interval)
+
+    @cached_property
+    def energy_price_max(self):
+        return self.energy_price.max(where=(self.energy_price >= 0), initial=0)
+
+    @cached_property
+    def normalised_energy_price(self):
+        # Normalised once for the whole episode, so observing prices and their predictions only takes slices
+        return self.energy_price / self.energy_price_max
 
     def initialise_energy_price(self, current_price_model, experiment_length_in_days, time_interval):
-        price_day = self.get_price_day(current_price_model, time_interval)
-        for day in range(0, experiment_length_in_days):
-            self.energy_price[day, :] = price_day
-
-    def get_price_day(self, current_price_model, time_interval):
-        price_day = []
+        # Prices of all days are kept in a single row, so that they are indexed by the timestep of the whole episode.
+        # The row is small and cheap to build, so unlike solar irradiance it is not shared as a dataset file.
+        price_days = self.get_price_days(current_price_model, time_interval)
+        return self.arrange_price_days(price_days, experiment_length_in_days + self.PRICE_DAY_PADDING)
+
+    def arrange_price_days(self, price_days, number_of_days):
+        # Price days of a model follow each other and start over, once all of them were used
+        day_indices = arange(number_of_days) % len(price_days)
+        return price_days[day_indices].reshape(1, -1)
+
+    def get_price_days(self, current_price_model, time_interval):
+        # Returns prices per timestep with one row for each price day of the model
         if current_price_model == 0:
-            tariffs = []
-            for i in range(int(24 / time_interval)):
-                if i < 7 / time_interval or i > 19 / time_interval:
-                    tariffs.append(self.low_tariff)
-                else:
-                    tariffs.append(self.high_tariff)
-
-            day_tariffs = array(tariffs)
-            price_day = array([self.low_tariff, self.low_tariff, self.low_tariff, self.low_tariff, self.low_tariff,
-                               self.low_tariff, self.low_tariff, self.high_tariff, self.high_tariff, self.high_tariff,
-                               self.high_tariff, self.high_tariff, self.high_tariff, self.high_tariff, self.high_tariff,
-                               self.high_tariff, self.high_tariff, self.high_tariff, self.high_tariff, self.high_tariff,
-                               self.low_tariff, self.low_tariff, self.low_tariff, self.low_tariff])
-        if current_price_model == 1:
-            price_day = array([0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
-                               0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05, 0.05])
-            # low high
-        elif current_price_model == 2:
-            price_day = array([0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06,
-                               0.05, 0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05])
-            # dynamic
-        elif current_price_model == 3:
-            price_day = array([0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
-                               0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070])
-            # dynamic
-        elif current_price_model == 4:
-            price_day = array([0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
-                               0.1, 0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1])
-            # dynamic
-        elif current_price_model == 5:
-            price_day[1, :] = [0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
-                               0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05]
-            price_day[2, :] = [0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06, 0.05,
-                               0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05]
-            price_day[3, :] = [0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
-                               0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070]
-            price_day[4, :] = [0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
-                               0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1]
-
-        price_day = concatenate([price_day, price_day], axis=0)
-        return price_day
+            hourly_prices = where(array([TARIFF_LEVELS_PER_HOUR]), self.high_tariff, self.low_tariff)
+        else:
+            hourly_prices = array(HOURLY_PRICES_PER_MODEL[current_price_model])
+
+        return self.resample_hourly_prices(hourly_prices, time_interval)
+
+    def resample_hourly_prices(self, hourly_prices, time_interval):
+        # Every timestep costs the mean price of the minutes it covers, i.e. shorter intervals repeat the hourly price
+        # and longer ones average it
+        timestep_in_minutes = round(MINUTES_PER_HOUR * time_interval)
+        if MINUTES_PER_HOUR % timestep_in_minutes == 0:
+            return repeat(hourly_prices, MINUTES_PER_HOUR // timestep_in_minutes, axis=1)
+
+        minute_prices = repeat(hourly_prices, MINUTES_PER_HOUR, axis=1)
+        return minute_prices.reshape(len(hourly_prices), -1, timestep_in_minutes).mean(axis=2)
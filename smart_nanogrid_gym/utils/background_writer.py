@@ -0,0 +1,58 @@
+from queue import Queue
+from threading import Thread
+
+
+class BackgroundWriter:
+    def __init__(self, queue_capacity):
+        if queue_capacity < 1:
+            raise ValueError("Error: Writer queue capacity must be at least 1!")
+
+        self.QUEUE_CAPACITY = queue_capacity
+        # Bounded queue, so that a slow file system blocks the simulation instead of piling up episode copies
+        self.write_queue = Queue(maxsize=self.QUEUE_CAPACITY)
+        self.write_error = None
+        self.closed = False
+
+        self.writer_thread = Thread(target=self.process_write_queue, name='SmartNanogridWriter', daemon=True)
+        self.writer_thread.start()
+
+    def process_write_queue(self):
+        while True:
+            write_task = self.write_queue.get()
+            try:
+                if write_task is None:
+                    return
+
+                write_function, arguments = write_task
+                if self.write_error is None:
+                    write_function(*arguments)
+            except Exception as error:
+                self.write_error = error
+            finally:
+                self.write_queue.task_done()
+
+    def submit(self, write_function, *arguments):
+        if self.closed:
+            raise ValueError("Error: Writer is already closed!")
+
+        self.raise_write_error()
+        self.write_queue.put((write_function, arguments))
+
+    def flush(self):
+        self.write_queue.join()
+        self.raise_write_error()
+
+    def raise_write_error(self):
+        if self.write_error is not None:
+            write_error = self.write_error
+            self.write_error = None
+            raise write_error
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.closed = True
+        self.write_queue.put(None)
+        self.writer_thread.join()
+        self.raise_write_error()
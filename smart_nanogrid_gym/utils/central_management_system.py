@@ -3,7 +3,9 @@ from numpy import zeros, array, concatenate, random
 from smart_nanogrid_gym.utils.accountant import Accountant
 from smart_nanogrid_gym.utils.battery_energy_storage_system import BatteryEnergyStorageSystem
 from smart_nanogrid_gym.utils.charging_station import ChargingStation
+from smart_nanogrid_gym.utils.episode_recorder import EpisodeRecorder
 from smart_nanogrid_gym.utils.penaliser import Penaliser
+from smart_nanogrid_gym.utils.phase_profiler import PhaseProfiler
 from smart_nanogrid_gym.utils.pv_system_manager import PVSystemManager
 
 
@@ -11,7 +13,7 @@ class CentralManagementSystem:
     def __init__(self, battery_system_available_in_model, pv_system_available_in_model, vehicle_to_everything,
                  current_price_model, experiment_length_in_days, time_interval, number_of_chargers,
                  enable_different_vehicle_battery_capacities, enable_requested_state_of_charge,
-                 charging_mode, vehicle_uncharged_penalty_mode):
+                 charging_mode, vehicle_uncharged_penalty_mode, enable_profiling=False):
         self.TIME_INTERVAL = time_interval
         self.EXPERIMENT_LENGTH_IN_DAYS = experiment_length_in_days
         self.NUMBER_OF_CHARGERS = number_of_chargers
@@ -23,13 +25,20 @@ class CentralManagementSystem:
         self.charging_station = ChargingStation(number_of_chargers, time_interval,
                                                 enable_different_vehicle_battery_capacities,
                                                 enable_requested_state_of_charge, charging_mode,
-                                                vehicle_uncharged_penalty_mode)
+                                                vehicle_uncharged_penalty_mode, experiment_length_in_days)
 
         self.accountant = Accountant()
         self.accountant.set_energy_price(current_price_model, experiment_length_in_days, time_interval)
 
         self.penaliser = Penaliser(number_of_chargers)
 
+        timesteps_per_experiment = int(24 / time_interval) * experiment_length_in_days
+        self.episode_recorder = EpisodeRecorder(timesteps_per_experiment, number_of_chargers)
+
+        # Phases of observing and managing the nanogrid are only timed with a profiler, without one the hot path only
+        # pays for checking that it is missing
+        self.profiler = PhaseProfiler() if enable_profiling else None
+
     def initialise_battery_system(self, battery_system_available_in_model, charging_mode):
         if battery_system_available_in_model:
             return BatteryEnergyStorageSystem(charging_mode, 80, 0.5, 44, 44, 0.95, 0.95, 0.15)
@@ -42,8 +51,26 @@ class CentralManagementSystem:
         else:
             return None
 
+    def set_random_generator(self, random_generator):
+        self.charging_station.random_generator = random_generator
+        if self.pv_system_manager:
+            self.pv_system_manager.random_generator = random_generator
+
+    def get_profile(self):
+        return self.profiler.get_profile() if self.profiler else {}
+
+    def reset_profile(self):
+        if self.profiler:
+            self.profiler.reset()
+
     def observe(self, timestep, min_timesteps_ahead, max_timesteps_ahead, random_pv_shift_ratio):
+        profiler = self.profiler
+        if profiler:
+            phase_start = profiler.start()
+
         [departure_times, vehicles_state_of_charge] = self.charging_station.simulate(timestep, self.TIME_INTERVAL)
+        if profiler:
+            phase_start = profiler.record('vehicle_observation', phase_start)
 
         if self.battery_system:
             battery_soc = self.battery_system.get_state_of_charge()
@@ -58,6 +85,8 @@ class CentralManagementSystem:
             solar_radiation = self.pv_system_manager.get_normalized_solar_radiation_at_timestep_t(timestep)*random_pv_shift_ratio
             radiation_predictions = self.pv_system_manager.get_normalized_solar_predictions_in_range(min_timesteps_ahead,
                                                                                                      max_timesteps_ahead)*random_pv_shift_ratio
+            if profiler:
+                profiler.record('observation_assembly', phase_start)
 
             return {
                 'departures': departure_times,
@@ -69,6 +98,9 @@ class CentralManagementSystem:
                 'radiation_predictions': radiation_predictions
             }
 
+        if profiler:
+            profiler.record('observation_assembly', phase_start)
+
         return {
             'departures': departure_times,
             'vehicles_state_of_charge': vehicles_state_of_charge,
@@ -82,6 +114,11 @@ class CentralManagementSystem:
         return management_results
 
     def manage_nanogrid(self, timestep, actions, random_pv_shift_ratio):
+        profiler = self.profiler
+        if profiler:
+            phase_start = profiler.start()
+
+        record = self.episode_recorder.get_record(timestep)
         charger_actions = actions[0:self.NUMBER_OF_CHARGERS]
 
         if self.battery_system:
@@ -93,66 +130,76 @@ class CentralManagementSystem:
         if timestep == 0 and self.battery_system:
             self.battery_system.set_initial_state_of_charge_on_new_day_start()
 
-        result = self.charging_station.simulate_vehicle_charging(charger_actions, timestep, self.TIME_INTERVAL)
-        self.penaliser.penalise_charging_station_issues(timestep, **self.charging_station.get_info_for_penalisation())
+        total_charging_power, total_discharging_power = self.charging_station.simulate_vehicle_charging(
+            charger_actions, timestep, self.TIME_INTERVAL)
+        if profiler:
+            phase_start = profiler.record('vehicle_charging', phase_start)
+
+        # Per timestep arrays of the station are a ring buffer, which is indexed by the column of the timestep
+        self.penaliser.penalise_charging_station_issues(self.charging_station.get_buffer_column(timestep),
+                                                        **self.charging_station.get_info_for_penalisation())
+        if profiler:
+            phase_start = profiler.record('penalisation', phase_start)
 
         if self.pv_system_manager:
             available_solar_power = self.pv_system_manager.get_available_solar_produced_power_at_timestep_t(timestep)
             available_solar_power = available_solar_power * random_pv_shift_ratio
         else:
             available_solar_power = 0
+        if profiler:
+            phase_start = profiler.record('pv_lookup', phase_start)
 
-        total_power = result['Total charging power'] + result['Total discharging power']
+        total_power = total_charging_power + total_discharging_power
         grid_power = self.calculate_grid_power(total_power, available_solar_power, battery_action)
         grid_energy = grid_power * self.TIME_INTERVAL
+        if profiler:
+            phase_start = profiler.record('grid_power_and_battery', phase_start)
 
         energy_price = self.accountant.get_energy_price_at_time_t(timestep)
         grid_energy_cost = self.accountant.calculate_grid_energy_cost(grid_energy, energy_price)
 
         total_penalty = self.penaliser.get_total_penalty()
         total_cost = self.accountant.calculate_total_cost(additional_cost=total_penalty)
+        if profiler:
+            phase_start = profiler.record('accounting', phase_start)
+
+        record['Total_cost'] = total_cost
+        record['Grid_energy_cost'] = grid_energy_cost
+        record['Grid_energy'] = grid_energy
+        record['Grid_power'] = grid_power
+        record['Utilized_solar_energy'] = available_solar_power
+        record['Total_penalties'] = total_penalty
+        record['Battery_action'] = battery_action
+        record['Charger_actions'] = charger_actions
+        record['Total_charging_power'] = total_charging_power
+        record['Total_discharging_power'] = total_discharging_power
+        record['Charger_power_values'] = self.charging_station.get_charger_power_values()
+        record['Vehicle_state_of_charge'] = self.charging_station.get_vehicles_state_of_charge_at_timestep(timestep)
+        self.record_penalties(record)
 
         if self.battery_system:
-            initial_battery_soc = self.battery_system.get_initial_state_of_charge()
-            battery_soc = self.battery_system.get_state_of_charge()
-            battery_power_value = self.battery_system.get_used_power_value()
-            battery_calculated_power_value = self.battery_system.get_calculated_power_value()
-        else:
-            initial_battery_soc = 0.0
-            battery_soc = 0.0
-            battery_power_value = 0.0
-            battery_calculated_power_value = 0.0
-
-        # Todo: Also return specific battery and vehicle penalties, temporarily, for checking their value movements
-
-        return {
-            'Total cost': total_cost,
-            'Grid energy cost': grid_energy_cost,
-            'Grid energy': grid_energy,
-            'Grid power': grid_power,
-            'Utilized solar energy': available_solar_power,
-            'Total penalty': total_penalty,
-            'Total battery penalty': self.penaliser.get_total_battery_penalty(),
-            'Battery soc below dod penalty': self.penaliser.get_battery_state_of_charge_below_dod_penalty(),
-            'Battery overcharging penalty': self.penaliser.get_battery_overcharging_penalty(),
-            'Battery over discharging penalty': self.penaliser.get_battery_over_discharging_penalty(),
-            'Low resource utilisation penalty': self.penaliser.get_low_resource_utilisation_penalty(),
-            'Total vehicle penalty': self.penaliser.get_total_vehicle_penalty(),
-            'Insufficiently charged vehicles penalty': self.penaliser.get_insufficiently_charged_vehicles_penalty(),
-            'Needlessly charged vehicles penalty': self.penaliser.get_needlessly_charged_vehicles_penalty(),
-            'Overcharged vehicles penalty': self.penaliser.get_overcharged_vehicles_penalty(),
-            'Over discharged vehicles penalty': self.penaliser.get_over_discharged_vehicles_penalty(),
-            'Battery action': battery_action,
-            'Charger actions': charger_actions.tolist(),
-            'Total charging power': result['Total charging power'],
-            'Total discharging power': result['Total discharging power'],
-            'Charger power values': result['Charger power values'],
-            'Battery power value': battery_power_value,
-            'Battery calculated power value': battery_calculated_power_value,
-            'Battery state of charge': battery_soc,
-            'Initial battery state of charge': initial_battery_soc,
-            'DisCharging nonexistent vehicles penalty': self.penaliser.get_charging_nonexistent_vehicles_penalty()
-        }
+            record['Initial_battery_state_of_charge'] = self.battery_system.get_initial_state_of_charge()
+            record['Battery_state_of_charge'] = self.battery_system.get_state_of_charge()
+            record['Battery_power_value'] = self.battery_system.get_used_power_value()
+            record['Battery_calculated_power_value'] = self.battery_system.get_calculated_power_value()
+        if profiler:
+            profiler.record('recording', phase_start)
+
+        return record
+
+    def record_penalties(self, record):
+        record['Total_battery_penalties'] = self.penaliser.get_total_battery_penalty()
+        record['Battery_SOC_below_DoD_penalties'] = self.penaliser.get_battery_state_of_charge_below_dod_penalty()
+        record['Battery_overcharging_penalties'] = self.penaliser.get_battery_overcharging_penalty()
+        record['Battery_over_discharging_penalties'] = self.penaliser.get_battery_over_discharging_penalty()
+        record['Low_resource_utilisation_penalties'] = self.penaliser.get_low_resource_utilisation_penalty()
+        record['Total_vehicle_penalties'] = self.penaliser.get_total_vehicle_penalty()
+        record['Insufficiently_charged_vehicle_penalties'] = self.penaliser.get_insufficiently_charged_vehicles_penalty()
+        record['Needlessly_charged_vehicle_penalties'] = self.penaliser.get_needlessly_charged_vehicles_penalty()
+        record['Overcharged_vehicle_penalties'] = self.penaliser.get_overcharged_vehicles_penalty()
+        record['Over_discharged_vehicle_penalties'] = self.penaliser.get_over_discharged_vehicles_penalty()
+        record['DisCharging_nonexistent_vehicles_penalties'] = \
+            self.penaliser.get_charging_nonexistent_vehicles_penalty()
 
     def calculate_grid_power(self, power_demand, available_solar_power, battery_action):
         if power_demand < 0 and not self.vehicle_to_everything:
@@ -161,8 +208,8 @@ class CentralManagementSystem:
             # Todo: Add penalty for this, because until building is added to model, this is unwanted behaviour,
             #       i.e. until building is included, Total discharging power provided from EVs cannot be greater
             #       than total charging power demand
-            # Todo: Also add, here and above, and elsewhere, Error handling
-            breakpoint()
+            raise ValueError("Error: Until a building is added to the model, total discharging power of vehicles "
+                             "cannot be greater than their total charging power!")
 
         remaining_power_demand = power_demand - available_solar_power
 
@@ -1,37 +1,79 @@
-import json
+from functools import partial
 
-from numpy import random, zeros, asarray, ndarray, array, vstack
-from scipy.io import loadmat, savemat
+from numpy import zeros, copyto, arange, nonzero, searchsorted, split, flatnonzero, where, divide, floor, ceil, \
+    sign, minimum, maximum, asarray, float64, newaxis
+from numpy.random import default_rng
 
-from smart_nanogrid_gym.utils.charger import Charger
-from smart_nanogrid_gym.utils.config import data_files_directory_path
 from smart_nanogrid_gym.utils.electric_vehicle import ElectricVehicle
+from smart_nanogrid_gym.utils.scenario_generator import ScenarioGenerator, get_array_columns
 
 
 class ChargingStation:
     def __init__(self, number_of_chargers, time_interval, enable_different_vehicle_battery_capacities,
-                 enable_requested_state_of_charge, charging_mode, vehicle_uncharged_penalty_mode):
+                 enable_requested_state_of_charge, charging_mode, vehicle_uncharged_penalty_mode, number_of_days=1):
         self.NUMBER_OF_CHARGERS = number_of_chargers
-        self.array_columns = int(25 / time_interval)
+        self.TIMESTEPS_PER_DAY = int(24 / time_interval)
+        self.TOTAL_TIMESTEPS = self.TIMESTEPS_PER_DAY * number_of_days
+        self.array_columns = get_array_columns(time_interval, number_of_days)
         self.enable_different_vehicle_battery_capacities = enable_different_vehicle_battery_capacities
         self.enable_requested_state_of_charge = enable_requested_state_of_charge
-        self.chargers = [Charger(charging_mode) for _ in range(self.NUMBER_OF_CHARGERS)]
+        self.CHARGING_MODE = charging_mode
         self.UNCHARGED_PENALTY_MODE = vehicle_uncharged_penalty_mode
 
+        # Per timestep arrays are a ring buffer of blocks, which are filled from the scenario of the episode right
+        # before they are simulated, so memory does not grow with the number of days. A single day fits into one
+        # block, longer episodes keep the simulated day and the previous one, whose last timestep is still looked at.
+        if number_of_days > 1:
+            self.BLOCK_COLUMNS = self.TIMESTEPS_PER_DAY
+            self.BUFFER_COLUMNS = 2 * self.BLOCK_COLUMNS
+        else:
+            self.BLOCK_COLUMNS = self.array_columns
+            self.BUFFER_COLUMNS = self.array_columns
+
+        array_shape = (self.NUMBER_OF_CHARGERS, self.BUFFER_COLUMNS)
+        self.vehicle_state_of_charge = zeros(array_shape)
+        self.vehicle_capacities = zeros(array_shape)
+        self.occupancy = zeros(array_shape)
+        self.requested_end_state_of_charge = zeros(array_shape)
+
+        self.is_arrival = zeros(array_shape, dtype=bool)
+
+        self.DEPARTURE_CHECK_TIMESTEPS = 3
+        self.time_until_departure = zeros(array_shape)
+        self.vehicle_departing = zeros(array_shape, dtype=bool)
+        self.vehicle_departing_in_next_n_timesteps = zeros(array_shape, dtype=bool)
+
+        self.charger_power_values = zeros(self.NUMBER_OF_CHARGERS)
+        self.vehicle_overcharging_values = zeros(self.NUMBER_OF_CHARGERS)
+        self.vehicle_over_discharging_values = zeros(self.NUMBER_OF_CHARGERS)
+        self.charging_non_existent_vehicles = zeros(self.NUMBER_OF_CHARGERS)
+
         self.arrivals = []
         self.departures = []
         self.departure_times = []
         self.vehicle_state_of_charge_at_current_timestep = []
         self._departing_vehicles = []
-        self._penalty_check_vehicles = []
+        self._penalty_check_vehicles = zeros(self.NUMBER_OF_CHARGERS, dtype=bool)
+        self._loaded_initial_values = None
+        self._loaded_scenario = None
+
+        # Scenario of the episode, either a compact table of generated vehicles or per timestep arrays of all days
+        self.scenario_vehicles = None
+        self.scenario = None
+        self.next_block_timestep = 0
+        self._generated_initial_values = None
 
         self.electric_vehicle_info = ElectricVehicle(battery_capacity=40, current_capacity=0, charging_efficiency=0.95,
                                                      discharging_efficiency=0.95, max_charging_power=22,
                                                      max_discharging_power=22, requested_end_capacity=0.8)
-        self.generated_initial_values = {}
-        self.generated_initial_values_json = {}
+
+        self.random_generator = default_rng()
+        self.scenario_generator = ScenarioGenerator(self.NUMBER_OF_CHARGERS, time_interval, self.array_columns,
+                                                    self.enable_different_vehicle_battery_capacities,
+                                                    self.enable_requested_state_of_charge, number_of_days)
 
     def simulate(self, current_timestep, time_interval):
+        self.fill_buffer_up_to_timestep(current_timestep)
         self.find_vehicles_for_penalty_check(current_timestep, time_interval)
         # self.find_departing_vehicles(current_timestep, time_interval)  # Keep this to use if needed
         self.calculate_departure_times(current_timestep)
@@ -39,112 +81,130 @@ class ChargingStation:
 
         return self.departure_times, self.vehicle_state_of_charge_at_current_timestep
 
+    def get_buffer_column(self, timestep):
+        return timestep % self.BUFFER_COLUMNS
+
+    def fill_buffer_up_to_timestep(self, timestep):
+        while self.next_block_timestep <= min(timestep, self.TOTAL_TIMESTEPS - 1):
+            self.fill_block(self.next_block_timestep)
+            self.next_block_timestep = self.next_block_timestep + self.BLOCK_COLUMNS
+
+    def fill_block(self, first_timestep):
+        number_of_columns = min(self.BLOCK_COLUMNS, self.array_columns - first_timestep)
+        if self.scenario_vehicles is not None:
+            block = self.scenario_generator.fill_scenarios(self.scenario_vehicles[newaxis], first_timestep,
+                                                           number_of_columns)[0]
+        else:
+            block = {field: self.scenario[field][:, first_timestep:first_timestep + number_of_columns]
+                     for field in ['SOC', 'Charger_occupancy', 'Vehicle_capacities', 'Requested_SOC', 'Is_arrival',
+                                   'Time_until_departure']}
+
+        first_column = self.get_buffer_column(first_timestep)
+        columns = slice(first_column, first_column + number_of_columns)
+        copyto(self.vehicle_state_of_charge[:, columns], block['SOC'])
+        copyto(self.occupancy[:, columns], block['Charger_occupancy'])
+        copyto(self.vehicle_capacities[:, columns], block['Vehicle_capacities'])
+        copyto(self.requested_end_state_of_charge[:, columns], block['Requested_SOC'])
+        copyto(self.is_arrival[:, columns], block['Is_arrival'])
+        copyto(self.time_until_departure[:, columns], block['Time_until_departure'])
+        self.build_departure_lookups(columns)
+
     def find_vehicles_for_penalty_check(self, timestep, time_interval):
-        if timestep >= (24 / time_interval):
+        if timestep >= self.TOTAL_TIMESTEPS:
             return []
 
-        self._penalty_check_vehicles.clear()
-        for index, charger in enumerate(self.chargers):
-            charger_occupied = charger.occupancy[timestep]
-
-            if self.UNCHARGED_PENALTY_MODE == 'no_penalty':
-                penalty_check_allowed = False
-            elif self.UNCHARGED_PENALTY_MODE == 'on_departure':
-                penalty_check_allowed = self.check_is_vehicle_departing(self.departures[index], timestep)
-            elif self.UNCHARGED_PENALTY_MODE == 'sparse':
-                penalty_check_allowed = self.check_is_vehicle_departing_in_next_n_timesteps(self.departures[index],
-                                                                                            timestep, n=3)
-            elif self.UNCHARGED_PENALTY_MODE == 'dense':
-                penalty_check_allowed = True
-            else:
-                raise ValueError("Error: Wrong vehicle uncharged - penalty mode provided!")
-
-            if charger_occupied and penalty_check_allowed:
-                self._penalty_check_vehicles.append(index)
+        column = self.get_buffer_column(timestep)
+        if self.UNCHARGED_PENALTY_MODE == 'no_penalty':
+            penalty_check_allowed = zeros(self.NUMBER_OF_CHARGERS, dtype=bool)
+        elif self.UNCHARGED_PENALTY_MODE == 'on_departure':
+            penalty_check_allowed = self.vehicle_departing[:, column]
+        elif self.UNCHARGED_PENALTY_MODE == 'sparse':
+            penalty_check_allowed = self.vehicle_departing_in_next_n_timesteps[:, column]
+        elif self.UNCHARGED_PENALTY_MODE == 'dense':
+            penalty_check_allowed = self.occupancy[:, column] == 1
+        else:
+            raise ValueError("Error: Wrong vehicle uncharged - penalty mode provided!")
+
+        self._penalty_check_vehicles = penalty_check_allowed
 
     def find_departing_vehicles(self, timestep, time_interval):
-        if timestep >= (24 / time_interval):
+        if timestep >= self.TOTAL_TIMESTEPS:
             return []
 
-        self._departing_vehicles.clear()
-        for index, charger in enumerate(self.chargers):
-            charger_occupied = charger.occupancy[timestep]
+        self._departing_vehicles = flatnonzero(self.vehicle_departing[:, self.get_buffer_column(timestep)])
+        # self._departing_vehicles = flatnonzero(self.vehicle_departing_in_next_n_timesteps[:, timestep])
 
-            vehicle_departing = self.check_is_vehicle_departing(self.departures[index], timestep)
-            # vehicle_departing = self.check_is_vehicle_departing_in_next_n_timesteps(self.departures[index], timestep, n=3)
-
-            if charger_occupied and vehicle_departing:
-                self._departing_vehicles.append(index)
-
-    def check_is_vehicle_departing(self, vehicle_departure, timestep):
-        # Todo: Combine this and below method and include possibility for checking n timesteps ahead
-        if timestep + 1 in vehicle_departure:
-            return True
-        else:
-            return False
+    def check_is_vehicle_departing(self, charger_index, timestep):
+        return self.vehicle_departing[charger_index, self.get_buffer_column(timestep)]
 
-    def check_is_vehicle_departing_in_next_n_timesteps(self, vehicle_departure, timestep, n):
-        if (timestep + 1 in vehicle_departure) or (timestep + 2 in vehicle_departure) or (timestep + 3 in vehicle_departure):
-            return True
-        else:
-            return False
+    def check_is_vehicle_departing_in_next_n_timesteps(self, charger_index, timestep, n):
+        return 1 <= self.time_until_departure[charger_index, self.get_buffer_column(timestep)] <= n
 
     def calculate_departure_times(self, timestep):
-        self.departure_times.clear()
-        for index, charger in enumerate(self.chargers):
-            charger_occupied = charger.occupancy[timestep]
-
-            if charger_occupied:
-                departure_time = self.calculate_next_departure_time(self.departures[index], timestep)
-                if isinstance(departure_time, ndarray):
-                    breakpoint()
-                self.departure_times.append(departure_time)
-            else:
-                self.departure_times.append(0)
-
-    def calculate_next_departure_time(self, charger_departures, timestep):
-        for departure_time in charger_departures:
-            if timestep <= departure_time:
-                a = departure_time - timestep
-                if isinstance(a, ndarray):
-                    breakpoint()
-                return a
-        return []
+        self.departure_times = self.time_until_departure[:, self.get_buffer_column(timestep)]
+
+    def build_arrival_table(self):
+        is_arrival = zeros((self.NUMBER_OF_CHARGERS, self.array_columns), dtype=bool)
+        for charger_index, arrivals in enumerate(self.arrivals):
+            is_arrival[charger_index, arrivals] = True
+        return is_arrival
+
+    def build_departure_table(self, occupancy):
+        # Time until departure is only kept for occupied timesteps, i.e. it belongs to the vehicle currently on the
+        # charger, so departing vehicles are found with a lookup instead of scanning departures on every step
+        time_until_departure = zeros((self.NUMBER_OF_CHARGERS, self.array_columns))
+        for charger_index, (arrivals, departures) in enumerate(zip(self.arrivals, self.departures)):
+            for arrival, departure in zip(arrivals, departures):
+                stay = arange(arrival, min(departure, self.array_columns))
+                time_until_departure[charger_index, stay] = departure - stay
+
+        return time_until_departure * occupancy
+
+    def build_departure_lookups(self, columns=slice(None)):
+        time_until_departure = self.time_until_departure[:, columns]
+        self.vehicle_departing[:, columns] = time_until_departure == 1
+        self.vehicle_departing_in_next_n_timesteps[:, columns] = (time_until_departure >= 1) & \
+                                                                 (time_until_departure <= self.DEPARTURE_CHECK_TIMESTEPS)
 
     def extract_current_state_of_charge_per_vehicle(self, timestep):
-        self.vehicle_state_of_charge_at_current_timestep.clear()
-        for charger in self.chargers:
-            self.vehicle_state_of_charge_at_current_timestep.append(charger.vehicle_state_of_charge[timestep])
+        self.vehicle_state_of_charge_at_current_timestep = self.vehicle_state_of_charge[:, self.get_buffer_column(timestep)]
 
-    def load_initial_values(self):
-        self.clear_initialisation_variables()
+    def load_initial_values(self, initial_values):
+        if initial_values is not self._loaded_initial_values:
+            # Tables are only built once for the same cached initial values, later loads just refill the buffer
+            self._loaded_initial_values = initial_values
+            self._loaded_scenario = self.build_scenario_from_initial_values(initial_values)
 
-        with open(data_files_directory_path + "\\initial_values.json", "r") as fp:
-            initials = json.load(fp)
+        self.load_scenario(self._loaded_scenario)
 
-        self.arrivals = initials['Arrivals']
-        self.departures = initials['Departures']
+    def build_scenario_from_initial_values(self, initial_values):
+        self.arrivals = [list(charger_arrivals) for charger_arrivals in initial_values['Arrivals']]
+        self.departures = [list(charger_departures) for charger_departures in initial_values['Departures']]
 
-        vehicle_state_of_charge = array(initials['SOC'])
-        charger_occupancy = array(initials['Charger_occupancy'])
-        vehicle_capacities = array(initials['Vehicle_capacities'])
+        array_shape = (self.NUMBER_OF_CHARGERS, self.array_columns)
+        occupancy = asarray(initial_values['Charger_occupancy'], dtype=float64).reshape(array_shape)
+        if 'Requested_SOC' in initial_values:
+            requested_state_of_charge = asarray(initial_values['Requested_SOC'], dtype=float64).reshape(array_shape)
+        else:
+            requested_state_of_charge = zeros(array_shape)
 
-        for index, charger in enumerate(self.chargers):
-            charger.vehicle_arrivals = self.arrivals[index]
-            charger.vehicle_state_of_charge = vehicle_state_of_charge[index, :]
-            charger.occupancy = charger_occupancy[index, :]
-            charger.vehicle_capacities = vehicle_capacities[index, :]
+        return {
+            'SOC': asarray(initial_values['SOC'], dtype=float64).reshape(array_shape),
+            'Charger_occupancy': occupancy,
+            'Vehicle_capacities': asarray(initial_values['Vehicle_capacities'], dtype=float64).reshape(array_shape),
+            'Requested_SOC': requested_state_of_charge,
+            'Is_arrival': self.build_arrival_table(),
+            'Time_until_departure': self.build_departure_table(occupancy)
+        }
 
     def clear_initialisation_variables(self):
         try:
             self.arrivals.clear()
             self.departures.clear()
-            for charger in self.chargers:
-                charger.vehicle_arrivals.clear()
-                charger.vehicle_state_of_charge.fill(0)
-                charger.vehicle_capacities.fill(0)
-                charger.occupancy.fill(0)
-                charger.requested_end_state_of_charge.fill(0)
+            self.vehicle_state_of_charge.fill(0)
+            self.vehicle_capacities.fill(0)
+            self.occupancy.fill(0)
+            self.requested_end_state_of_charge.fill(0)
             return True
         except ValueError:
             return False
@@ -152,168 +212,175 @@ class ChargingStation:
     def generate_new_initial_values(self, time_interval):
         initial_variables_cleared = self.clear_initialisation_variables()
         initial_vehicle_presence_generated = self.generate_initial_vehicle_presence(initial_variables_cleared, time_interval)
+        if not initial_vehicle_presence_generated:
+            self.scenario_vehicles = None
+            self.scenario = None
+
+    @property
+    def generated_initial_values(self):
+        # Collected only when needed, e.g. for saving, because generated vehicles are otherwise never expanded to
+        # arrays of all days
+        if self._generated_initial_values is None:
+            self._generated_initial_values = self.collect_initial_values(self.scenario_vehicles, self.scenario)
+        return self._generated_initial_values
+
+    def get_initial_values_collector(self):
+        # Loaded scenarios are never modified, so the initial values of an episode can still be collected after the
+        # next episode was loaded, e.g. only when the episode is written
+        return partial(self.collect_initial_values, self.scenario_vehicles, self.scenario)
+
+    def collect_initial_values(self, scenario_vehicles, scenario):
+        if scenario_vehicles is not None:
+            arrivals, departures = self.get_vehicle_schedules_of_vehicles(scenario_vehicles)
+            scenario = self.scenario_generator.fill_scenarios(scenario_vehicles[newaxis])[0]
+        elif scenario is not None:
+            arrivals, departures = self.get_vehicle_schedules_of_scenario(scenario)
+        else:
+            return {}
 
-        arrivals_array = asarray(self.arrivals, dtype=object)
-        departures_array = asarray(self.departures, dtype=object)
+        # Arrays are copied, the scenario may be a read-only bank entry
+        return {
+            'SOC': asarray(scenario['SOC'], dtype=float64).copy(),
+            'Arrivals': arrivals,
+            'Departures': departures,
+            'Charger_occupancy': asarray(scenario['Charger_occupancy'], dtype=float64).copy(),
+            'Vehicle_capacities': asarray(scenario['Vehicle_capacities'], dtype=float64).copy(),
+            'Requested_SOC': asarray(scenario['Requested_SOC'], dtype=float64).copy()
+        }
 
-        vehicles_state_of_charge = self.get_vehicles_state_of_charge()
-        charger_occupancy = self.get_occupancy_for_all_chargers()
-        vehicle_capacities = self.get_vehicle_capacities_for_all_chargers()
-        requested_vehicle_state_of_charge = self.get_requested_end_state_of_charge_for_all_chargers()
-
-        generated_initial_values = {
-            'SOC': vehicles_state_of_charge,
-            'Arrivals': arrivals_array,
-            'Departures': departures_array,
-            'Charger_occupancy': charger_occupancy,
-            'Vehicle_capacities': vehicle_capacities,
-            'Requested_SOC': requested_vehicle_state_of_charge
-        } if initial_vehicle_presence_generated else {}
-
-        generated_initial_values_json = {
-            'SOC': vehicles_state_of_charge.tolist(),
-            'Arrivals': self.arrivals,
-            'Departures': self.departures,
-            'Charger_occupancy': charger_occupancy.tolist(),
-            'Vehicle_capacities': vehicle_capacities.tolist(),
-            'Requested_SOC': requested_vehicle_state_of_charge.tolist()
-        } if initial_vehicle_presence_generated else {}
-
-        self.generated_initial_values = generated_initial_values
-        self.generated_initial_values_json = generated_initial_values_json
-
-        with open(data_files_directory_path + "\\initial_values.json", "w") as fp:
-            json.dump(generated_initial_values_json, fp, indent=4)
-
-    def save_initial_values_to_json_file(self, path, filename):
-        prefix = f'\\{filename}-' if filename else ''
-        with open(path + f'\\{prefix}initial_values.json', "w") as fp:
-            json.dump(self.generated_initial_values_json, fp, indent=4)
+    def get_vehicle_schedules_of_vehicles(self, vehicles):
+        vehicles_present = vehicles['Arrivals'] < self.TOTAL_TIMESTEPS
+        arrivals = [charger_vehicles['Arrivals'][present].tolist()
+                    for charger_vehicles, present in zip(vehicles, vehicles_present)]
+        departures = [charger_vehicles['Departures'][present].tolist()
+                      for charger_vehicles, present in zip(vehicles, vehicles_present)]
+        return arrivals, departures
+
+    def get_vehicle_schedules_of_scenario(self, scenario):
+        charger_indices, arrival_timesteps = nonzero(scenario['Is_arrival'])
+        departure_timesteps = arrival_timesteps + scenario['Time_until_departure'][charger_indices, arrival_timesteps]
+        split_indices = searchsorted(charger_indices, arange(1, self.NUMBER_OF_CHARGERS))
+        arrivals = [charger_arrivals.tolist() for charger_arrivals in split(arrival_timesteps, split_indices)]
+        departures = [charger_departures.astype(int).tolist()
+                      for charger_departures in split(departure_timesteps, split_indices)]
+        return arrivals, departures
+
+    def load_scenario(self, scenario):
+        self.scenario = scenario
+        self.scenario_vehicles = None
+
+        # Schedules are only derived for logging, the simulation itself works with the loaded arrays
+        self.arrivals, self.departures = self.get_vehicle_schedules_of_scenario(scenario)
+        self.start_episode()
+
+    def load_vehicles(self, vehicles):
+        self.scenario_vehicles = vehicles
+        self.scenario = None
+
+        self.arrivals, self.departures = self.get_vehicle_schedules_of_vehicles(vehicles)
+        self.start_episode()
+
+    def start_episode(self):
+        self._generated_initial_values = None
+        self.next_block_timestep = 0
+        self.fill_buffer_up_to_timestep(0)
 
     def generate_initial_vehicle_presence(self, initial_variables_cleared, time_interval):
         if initial_variables_cleared:
-            for charger in self.chargers:
-                self.generate_initial_vehicle_presence_per_charger(charger, time_interval)
+            vehicles = self.scenario_generator.generate_vehicles(1, self.random_generator)[0]
+            self.load_vehicles(vehicles)
             return True
         return False
 
-    def generate_initial_vehicle_presence_per_charger(self, charger, time_interval):
-        vehicle_arrivals = []
-        vehicle_departures = []
-
-        vehicle_present = False
-        current_departure_time = 0
-        current_vehicle_capacity = 0
-        vehicle_capacity_generated = False
-        current_requested_end_of_charge = 0
-        requested_soc_generated = False
-
-        total_timesteps = int(24 / time_interval)
-        for timestep in range(total_timesteps):
-            if not vehicle_present:
-                arrival = round(random.rand() - 0.1)
-                if arrival == 1 and timestep < total_timesteps:
-                    vehicle_present = True
-
-                    self.generate_random_arrival_vehicle_state_of_charge(charger, timestep)
-                    self.generate_random_requested_end_vehicle_state_of_charge(charger, timestep)
-                    if self.enable_different_vehicle_battery_capacities and not vehicle_capacity_generated:
-                        current_vehicle_capacity = self.generate_random_vehicle_battery_capacity()
-                        vehicle_capacity_generated = True
-                    elif not self.enable_different_vehicle_battery_capacities and not vehicle_capacity_generated:
-                        current_vehicle_capacity = 40
-                        vehicle_capacity_generated = True
-
-                    if self.enable_requested_state_of_charge and not requested_soc_generated:
-                        current_requested_end_of_charge = self.generate_random_requested_end_vehicle_state_of_charge(charger, timestep)
-                        requested_soc_generated = True
-                    elif not self.enable_requested_state_of_charge and not requested_soc_generated:
-                        current_requested_end_of_charge = 1.0
-                        requested_soc_generated = True
-
-                    vehicle_arrivals.append(timestep)
-
-                    current_departure_time = self.generate_random_vehicle_departure_time(timestep, time_interval, total_timesteps)
-                    vehicle_departures.append(current_departure_time)
-
-            if vehicle_present and timestep < current_departure_time:
-                charger.occupancy[timestep] = 1
-                charger.vehicle_capacities[timestep] = current_vehicle_capacity
-                charger.requested_end_state_of_charge[timestep] = current_requested_end_of_charge
-            else:
-                vehicle_present = False
-                charger.occupancy[timestep] = 0
-                charger.vehicle_capacities[timestep] = 0
-                vehicle_capacity_generated = False
-                current_vehicle_capacity = 0.0
-                charger.requested_end_state_of_charge[timestep] = 0
-                current_requested_end_of_charge = 0
-                requested_soc_generated = False
-
-        self.arrivals.append(vehicle_arrivals)
-        self.departures.append(vehicle_departures)
-        charger.vehicle_arrivals.extend(vehicle_arrivals)
-
-    def generate_random_arrival_vehicle_state_of_charge(self, charger, timestep):
-        random_state_of_charge = random.uniform(0.1, 0.9)
-        charger.vehicle_state_of_charge[timestep] = random_state_of_charge
-
-    def generate_random_requested_end_vehicle_state_of_charge(self, charger, timestep):
-        arrival_state_of_charge = charger.vehicle_state_of_charge[timestep]
-        arrival_state_of_charge = arrival_state_of_charge + 0.1 if arrival_state_of_charge <= 0.9 else 1.0
-        random_state_of_charge = random.uniform(arrival_state_of_charge, 1.0)
-        return random_state_of_charge
-
-    def generate_random_vehicle_battery_capacity(self):
-        random_vehicle_capacity = random.randint(15, 120)
-        return random_vehicle_capacity
-
-    def generate_random_vehicle_departure_time(self, timestep, time_interval, total_timesteps):
-        max_charging_time = timestep + int(10 / time_interval)
-        max_departing_time = total_timesteps + int(1 / time_interval)
-        upper_limit = min(max_charging_time, max_departing_time)
-        low = timestep + int(4 / time_interval)
-        high = int(upper_limit)
-        if low >= high:
-            return int(low)
-        return random.randint(low, high)
-
     def simulate_vehicle_charging(self, actions, current_timestep, time_interval):
-        charger_power_values = zeros(self.NUMBER_OF_CHARGERS)
-
-        for index, charger in enumerate(self.chargers):
-            action = actions[index]
-            # to-do later (maybe): -1=Charger reserved -> lasts for max 15 minutes, 1=Occupied, 0=Empty
-            if charger.occupancy[current_timestep] == 1:
-                charger_power_values[index] = charger.charge_or_discharge_vehicle(action, current_timestep, time_interval)
-            else:
-                charger_power_values[index] = 0
-                charger.reset_info_values(action)
-
-        total_discharging_power = charger_power_values[charger_power_values < 0].sum()
-        total_charging_power = charger_power_values[charger_power_values > 0].sum()
-
-        return {
-            'Total charging power': total_charging_power,
-            'Total discharging power': total_discharging_power,
-            'Charger power values': charger_power_values.tolist()
-        }
+        if self.CHARGING_MODE != 'bounded':
+            raise ValueError("Error: Wrong charging mode provided!")
+
+        occupied, vehicle_state_of_charge, vehicle_capacity = self.get_connected_vehicles(current_timestep)
+        column = self.get_buffer_column(current_timestep)
+        charging = occupied & (actions > 0)
+        discharging = occupied & (actions < 0)
+
+        charging_power = actions * self.electric_vehicle_info.max_charging_power \
+            * self.electric_vehicle_info.charging_efficiency
+        discharging_power = actions * self.electric_vehicle_info.max_discharging_power \
+            * self.electric_vehicle_info.discharging_efficiency
+        power_values = where(charging, charging_power, where(discharging, discharging_power, 0.0))
+
+        state_of_charge_value_change = divide(power_values * time_interval, vehicle_capacity,
+                                              out=zeros(self.NUMBER_OF_CHARGERS), where=occupied)
+        calculated_state_of_charge = vehicle_state_of_charge + state_of_charge_value_change
+
+        overcharging_flag = floor(0.5 * (1 + sign(calculated_state_of_charge - 1)))
+        self.vehicle_overcharging_values = where(charging, overcharging_flag, 0.0) \
+            * self.electric_vehicle_info.max_charging_power
+
+        # NON-CONSTANT PENALTIES TEND TO LEAD TO ALGORITHM STILL BEING IN UNWANTED AREA BUT LOWERING ACTIONS TO MIN
+        # SO THAT THE PENALTY IS MINIMAL!!!
+        over_discharging_flag = ceil(0.5 * (1 + sign(calculated_state_of_charge)))
+        self.vehicle_over_discharging_values = where(discharging, over_discharging_flag, 0.0) \
+            * self.electric_vehicle_info.max_discharging_power
+        possible_discharging_power = (vehicle_state_of_charge * vehicle_capacity) / time_interval
+        power_values = where(self.vehicle_over_discharging_values > 0, -possible_discharging_power, power_values)
+
+        next_state_of_charge = where(charging, minimum(calculated_state_of_charge, 1.0),
+                                     where(discharging, maximum(0.0, calculated_state_of_charge),
+                                           vehicle_state_of_charge))
+        self.vehicle_state_of_charge[occupied, column] = next_state_of_charge[occupied]
+
+        self.charging_non_existent_vehicles = where(~occupied & (actions != 0), 100, 0.0)
+        self.charger_power_values = power_values
+
+        total_discharging_power = power_values[power_values < 0].sum()
+        total_charging_power = power_values[power_values > 0].sum()
+
+        return total_charging_power, total_discharging_power
+
+    def get_connected_vehicles(self, timestep):
+        # Occupied chargers with state of charge and capacity of their vehicles before charging at the timestep,
+        # arriving vehicles bring their own values. Managing the timestep can happen before it is observed, so its
+        # block may still need to be filled.
+        self.fill_buffer_up_to_timestep(timestep)
+        column = self.get_buffer_column(timestep)
+        previous_column = self.get_buffer_column(timestep - 1)
+
+        # to-do later (maybe): -1=Charger reserved -> lasts for max 15 minutes, 1=Occupied, 0=Empty
+        occupied = self.occupancy[:, column] == 1
+        arriving = self.is_arrival[:, column]
+        vehicle_state_of_charge = where(arriving, self.vehicle_state_of_charge[:, column],
+                                        self.vehicle_state_of_charge[:, previous_column])
+        vehicle_capacity = where(arriving, self.vehicle_capacities[:, column],
+                                 self.vehicle_capacities[:, previous_column])
+        return occupied, vehicle_state_of_charge, vehicle_capacity
+
+    def get_charger_power_values(self):
+        return self.charger_power_values
 
     def get_vehicles_state_of_charge(self):
-        vehicle_state_of_charge = vstack([charger.vehicle_state_of_charge for charger in self.chargers])
-        return vehicle_state_of_charge
+        return self.vehicle_state_of_charge
+
+    def get_vehicles_state_of_charge_at_timestep(self, timestep):
+        return self.vehicle_state_of_charge[:, self.get_buffer_column(timestep)]
+
+    def get_state_of_charge_after_episode(self):
+        # Columns after the last timestep are never simulated, so they keep the states of charge of the scenario
+        number_of_columns = self.array_columns - self.TOTAL_TIMESTEPS
+        if self.scenario is not None:
+            return asarray(self.scenario['SOC'][:, self.TOTAL_TIMESTEPS:], dtype=float64)
+        elif self.scenario_vehicles is not None and number_of_columns > 0:
+            return self.scenario_generator.fill_scenarios(self.scenario_vehicles[newaxis], self.TOTAL_TIMESTEPS,
+                                                          number_of_columns)[0]['SOC']
+        else:
+            return zeros((self.NUMBER_OF_CHARGERS, number_of_columns))
 
     def get_occupancy_for_all_chargers(self):
-        occupancy = vstack([charger.occupancy for charger in self.chargers])
-        return occupancy
+        return self.occupancy
 
     def get_vehicle_capacities_for_all_chargers(self):
-        capacities = vstack([charger.vehicle_capacities for charger in self.chargers])
-        return capacities
+        return self.vehicle_capacities
 
     def get_requested_end_state_of_charge_for_all_chargers(self):
-        requested_soc = vstack([charger.requested_end_state_of_charge for charger in self.chargers])
-        return requested_soc
+        return self.requested_end_state_of_charge
 
     def get_all_departing_vehicles(self):
         return self._departing_vehicles
@@ -322,7 +389,7 @@ class ChargingStation:
         vehicles_for_penalty_check = self._penalty_check_vehicles
         vehicles_state_of_charge = self.get_vehicles_state_of_charge()
         requested_end_state_of_charge_per_charger = self.get_requested_end_state_of_charge_for_all_chargers()
-        arrivals = self.arrivals
+        arrivals = self.is_arrival
         overcharging_values = self.get_vehicles_overcharging_value_per_charger()
         over_discharging_values = self.get_vehicles_over_discharging_value_per_charger()
         charging_nonexistent_vehicles = self.get_charging_non_existent_vehicles()
@@ -338,10 +405,10 @@ class ChargingStation:
         }
 
     def get_vehicles_overcharging_value_per_charger(self):
-        return [charger.vehicle_overcharging_value for charger in self.chargers]
+        return self.vehicle_overcharging_values
 
     def get_vehicles_over_discharging_value_per_charger(self):
-        return [charger.vehicle_over_discharging_value for charger in self.chargers]
+        return self.vehicle_over_discharging_values
 
     def get_charging_non_existent_vehicles(self):
-        return [charger.charging_non_existent_vehicle for charger in self.chargers]
+        return self.charging_non_existent_vehicles
@@ -0,0 +1,63 @@
+from numpy import zeros, dtype, float64
+
+
+class EpisodeRecorder:
+    def __init__(self, number_of_timesteps, number_of_chargers):
+        self.NUMBER_OF_TIMESTEPS = number_of_timesteps
+        self.NUMBER_OF_CHARGERS = number_of_chargers
+
+        self.TIMESTEP_FIELDS = [
+            'Grid_power', 'Grid_energy', 'Utilized_solar_energy', 'Total_vehicle_penalties', 'Total_battery_penalties',
+            'Total_penalties', 'Total_cost', 'Battery_state_of_charge', 'Grid_energy_cost', 'Battery_action',
+            'Total_charging_power', 'Total_discharging_power', 'Battery_power_value', 'Battery_SOC_below_DoD_penalties',
+            'Low_resource_utilisation_penalties', 'Battery_overcharging_penalties',
+            'Battery_over_discharging_penalties', 'Insufficiently_charged_vehicle_penalties',
+            'Needlessly_charged_vehicle_penalties', 'Overcharged_vehicle_penalties', 'Over_discharged_vehicle_penalties',
+            'Battery_calculated_power_value', 'DisCharging_nonexistent_vehicles_penalties'
+        ]
+        # Vehicle states of charge are recorded per timestep, because the per timestep arrays of the charging station
+        # are a ring buffer, which only keeps the last days of an episode
+        self.CHARGER_FIELDS = ['Charger_actions', 'Charger_power_values', 'Vehicle_state_of_charge']
+        # Value which is the same for every timestep of a simulated day, only the last recorded one is saved
+        self.DAY_FIELDS = ['Initial_battery_state_of_charge']
+        # Values reported as KPIs of a timestep, all of them are summed up over the episode except for the battery state
+        # of charge, whose mean and last value are reported instead
+        self.KPI_FIELDS = [
+            'Grid_energy', 'Grid_energy_cost', 'Total_cost', 'Utilized_solar_energy', 'Total_penalties',
+            'Total_vehicle_penalties', 'Total_battery_penalties', 'Insufficiently_charged_vehicle_penalties',
+            'Needlessly_charged_vehicle_penalties', 'Overcharged_vehicle_penalties', 'Over_discharged_vehicle_penalties',
+            'DisCharging_nonexistent_vehicles_penalties', 'Battery_SOC_below_DoD_penalties',
+            'Battery_overcharging_penalties', 'Battery_over_discharging_penalties', 'Low_resource_utilisation_penalties',
+            'Battery_state_of_charge'
+        ]
+
+        self.record_type = dtype(
+            [(field, float64) for field in self.TIMESTEP_FIELDS]
+            + [(field, float64, (self.NUMBER_OF_CHARGERS,)) for field in self.CHARGER_FIELDS]
+            + [(field, float64) for field in self.DAY_FIELDS]
+        )
+        # Batched environments record KPIs of several nanogrids in records of this type
+        self.kpi_record_type = dtype([(field, float64) for field in self.KPI_FIELDS])
+        self.records = zeros(self.NUMBER_OF_TIMESTEPS, dtype=self.record_type)
+
+    def clear(self):
+        # Records of the finished episode may still be held for saving, so new ones are allocated instead of zeroed
+        self.records = zeros(self.NUMBER_OF_TIMESTEPS, dtype=self.record_type)
+
+    def get_record(self, timestep):
+        return self.records[timestep]
+
+    def get_records(self):
+        return self.records
+
+    def get_kpis(self, record):
+        # Plain floats, so that KPIs can be logged or serialised without numpy
+        return {field: float(record[field]) for field in self.KPI_FIELDS}
+
+    def get_episode_kpis(self, records=None):
+        # Records of the episode are the ones of this recorder, unless KPI records of a batched nanogrid are given
+        records = self.records if records is None else records
+        episode_kpis = {field: float(records[field].sum()) for field in self.KPI_FIELDS[:-1]}
+        episode_kpis['Mean_battery_state_of_charge'] = float(records['Battery_state_of_charge'].mean())
+        episode_kpis['Final_battery_state_of_charge'] = float(records['Battery_state_of_charge'][-1])
+        return episode_kpis
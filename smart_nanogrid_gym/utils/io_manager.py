@@ -1,34 +1,263 @@
-# Todo: Transfer all io operations to this file and combine it into class IOManager
-def load_initial_values(self):
-    self.clear_initialisation_variables()
-
-    initial_values = loadmat(data_files_directory_path + '\\initial_values.mat')
-    with open(data_files_directory_path + "\\initial_values.json", "r") as fp:
-        initials = json.load(fp)
-        a = 2
-
-    arrival_times = initial_values['Arrivals']
-    departure_times = initial_values['Departures']
-
-    self.vehicle_state_of_charge = initial_values['SOC']
-    self.charger_occupancy = initial_values['Charger_occupancy']
-
-    for charger in range(self.NUMBER_OF_CHARGERS):
-        if arrival_times.shape == (1, self.NUMBER_OF_CHARGERS):
-            arrivals = arrival_times[0][charger][0]
-            departures = departure_times[0][charger][0]
-        elif arrival_times.shape == (self.NUMBER_OF_CHARGERS, 3):
-            arrivals = arrival_times[charger]
-            departures = departure_times[charger]
+import json
+import os
+from weakref import finalize
+
+from numpy import savez_compressed, load, full, asarray, float64, concatenate
+
+from smart_nanogrid_gym.utils.background_writer import BackgroundWriter
+from smart_nanogrid_gym.utils.config import data_files_directory_path
+
+# Version of the npz file layout, increase it whenever saved keys or their shapes change
+SCHEMA_VERSION = 1
+VEHICLE_SCHEDULE_KEYS = ['Arrivals', 'Departures']
+
+# Parsed initial values shared by all environments of the process, keyed by file path and validated by file version
+_initial_values_cache = {}
+
+
+def read_prediction_results(file_path):
+    # Returns prediction results with the same keys and layout for both json and npz files
+    if file_path.endswith('.json'):
+        with open(file_path, "r") as fp:
+            return json.load(fp)
+
+    with load(file_path) as npz_file:
+        check_schema_version(npz_file, file_path)
+        return {key: npz_file[key] for key in npz_file.files if key != 'Schema_version'}
+
+
+def read_initial_values(file_path):
+    # Returns initial values with the same keys and layout for both json and npz files, schedules are lists per charger
+    if file_path.endswith('.json'):
+        with open(file_path, "r") as fp:
+            return json.load(fp)
+
+    with load(file_path) as npz_file:
+        check_schema_version(npz_file, file_path)
+        initial_values = {key: npz_file[key] for key in npz_file.files if key != 'Schema_version'}
+
+    for key in VEHICLE_SCHEDULE_KEYS:
+        if key in initial_values:
+            initial_values[key] = convert_array_to_vehicle_schedule(initial_values[key])
+    return initial_values
+
+
+def read_cached_initial_values(file_path):
+    # Replaying the same day only parses the file once, cached arrays are read-only and copied by the caller
+    file_status = os.stat(file_path)
+    file_version = (file_status.st_mtime_ns, file_status.st_size)
+
+    cached_file_version, initial_values = _initial_values_cache.get(file_path, (None, None))
+    if cached_file_version != file_version:
+        initial_values = read_initial_values(file_path)
+        for key, value in initial_values.items():
+            if key not in VEHICLE_SCHEDULE_KEYS:
+                initial_values[key] = asarray(value, dtype=float64)
+                initial_values[key].setflags(write=False)
+        _initial_values_cache[file_path] = (file_version, initial_values)
+
+    return initial_values
+
+
+def clear_initial_values_cache(file_path=None):
+    if file_path is None:
+        _initial_values_cache.clear()
+    else:
+        _initial_values_cache.pop(file_path, None)
+
+
+def check_schema_version(npz_file, file_path):
+    schema_version = int(npz_file['Schema_version']) if 'Schema_version' in npz_file.files else 0
+    if schema_version != SCHEMA_VERSION:
+        raise ValueError(f"Error: {file_path} has schema version {schema_version}, only version {SCHEMA_VERSION} "
+                         f"is supported!")
+
+
+def convert_vehicle_schedule_to_array(vehicle_schedule):
+    # Arrivals and departures have different length per charger, missing values are padded with -1
+    longest_schedule = max([len(charger_schedule) for charger_schedule in vehicle_schedule], default=0)
+    schedule_array = full((len(vehicle_schedule), longest_schedule), -1)
+    for charger_index, charger_schedule in enumerate(vehicle_schedule):
+        schedule_array[charger_index, :len(charger_schedule)] = charger_schedule
+    return schedule_array
+
+
+def convert_array_to_vehicle_schedule(schedule_array):
+    return [[int(timestep) for timestep in charger_schedule if timestep >= 0] for charger_schedule in schedule_array]
+
+
+# Todo: Transfer all io operations to this file
+class IOManager:
+    def __init__(self, logging_policy, logging_frequency, file_format, asynchronous_writing=True,
+                 writer_queue_capacity=8):
+        # Logging policies: off, every_n_episodes, last_only, always; empty string selects it by environment mode
+        self.LOGGING_POLICIES = ['off', 'every_n_episodes', 'last_only', 'always']
+        # Npz is the default file format, json is kept as an export option
+        self.FILE_FORMATS = ['npz', 'json']
+
+        if logging_policy and logging_policy not in self.LOGGING_POLICIES:
+            raise ValueError("Error: Wrong logging policy provided!")
+        if file_format and file_format not in self.FILE_FORMATS:
+            raise ValueError("Error: Wrong logging file format provided!")
+        if logging_frequency < 1:
+            raise ValueError("Error: Logging frequency must be at least 1 episode!")
+
+        self.REQUESTED_LOGGING_POLICY = logging_policy
+        self.LOGGING_FREQUENCY = logging_frequency
+        self.FILE_FORMAT = file_format if file_format else 'npz'
+
+        self.finished_episodes = 0
+        # With the last_only policy the last episode and initial values are only held and written once on closing
+        self.pending_episode_log = None
+        self.pending_initial_values_collector = None
+        # Last generated initial values are replayed from memory, they are only collected from their scenario once
+        self.generated_initial_values_collector = None
+        self.generated_initial_values = None
+
+        if asynchronous_writing:
+            self.background_writer = BackgroundWriter(writer_queue_capacity)
+            # Drains the writer at interpreter exit if the environment was never closed
+            self._writer_finalizer = finalize(self, self.background_writer.close)
         else:
-            raise Exception("Initial values loaded from initial_values.mat have wrong shape.")
+            self.background_writer = None
+            self._writer_finalizer = None
+
+    def get_logging_policy(self, environment_mode):
+        if self.REQUESTED_LOGGING_POLICY:
+            return self.REQUESTED_LOGGING_POLICY
+        elif environment_mode == 'training':
+            return 'last_only'
+        else:
+            return 'always'
+
+    def register_finished_episode(self, environment_mode):
+        self.finished_episodes = self.finished_episodes + 1
+        return self.is_episode_logged(self.finished_episodes, environment_mode)
+
+    def is_episode_logged(self, episode_number, environment_mode):
+        logging_policy = self.get_logging_policy(environment_mode)
+
+        if logging_policy == 'off':
+            return False
+        elif logging_policy == 'every_n_episodes':
+            return episode_number % self.LOGGING_FREQUENCY == 0
+        else:
+            return True
+
+    def log_episode(self, episode_log, environment_mode):
+        if self.get_logging_policy(environment_mode) == 'last_only':
+            self.pending_episode_log = episode_log
+        else:
+            self.save_episode(episode_log)
+
+    def save_episode(self, episode_log):
+        self.submit_write(self.write_episode, episode_log)
+
+    def save_initial_values(self, initial_values_collector, environment_mode):
+        # Initial values are written only if the episode they start is logged, or once on closing with the last_only
+        # policy, nothing is collected from the scenario of other episodes
+        self.generated_initial_values_collector = initial_values_collector
+        self.generated_initial_values = None
+
+        logging_policy = self.get_logging_policy(environment_mode)
+        if logging_policy == 'last_only':
+            self.pending_initial_values_collector = initial_values_collector
+        elif self.is_episode_logged(self.finished_episodes + 1, environment_mode):
+            self.pending_initial_values_collector = None
+            self.submit_write(self.write_generated_initial_values, initial_values_collector)
+
+    def submit_write(self, write_function, *arguments):
+        if self.background_writer:
+            self.background_writer.submit(write_function, *arguments)
+        else:
+            write_function(*arguments)
+
+    def flush(self):
+        if self.background_writer:
+            self.background_writer.flush()
+
+    def load_initial_values(self):
+        if self.generated_initial_values_collector is not None:
+            if self.generated_initial_values is None:
+                self.generated_initial_values = self.generated_initial_values_collector()
+            return self.generated_initial_values
+
+        # Initial values file may still be waiting in the writer queue
+        self.flush()
+
+        file_paths = [data_files_directory_path + "\\initial_values." + file_format
+                      for file_format in [self.FILE_FORMAT] + self.FILE_FORMATS]
+        # Falls back to other formats, e.g. to the json file shipped with the package
+        existing_file_paths = [file_path for file_path in file_paths if os.path.exists(file_path)]
+        file_path = existing_file_paths[0] if existing_file_paths else file_paths[0]
+
+        return read_cached_initial_values(file_path)
+
+    def write_episode(self, episode_log):
+        prediction_results = self.collect_prediction_results(episode_log)
+        file_path = episode_log['Saving_directory_path'] + episode_log['File_name']
+
+        self.write_prediction_results([data_files_directory_path + "prediction_results",
+                                       file_path + "-prediction_results"], prediction_results)
+        self.write_initial_values(file_path + "-initial_values", episode_log['Initial_values_collector']())
+
+    def write_generated_initial_values(self, initial_values_collector):
+        self.write_initial_values(data_files_directory_path + "\\initial_values", initial_values_collector())
+
+    def collect_prediction_results(self, episode_log):
+        records = episode_log['Records']
+        day_fields = episode_log['Day_fields']
+
+        # States of charge are saved per charger and timestep, followed by the columns after the episode
+        prediction_results = {
+            'SOC': concatenate((records['Vehicle_state_of_charge'].T, episode_log['SOC_after_episode']), axis=1),
+            'Available_solar_energy': episode_log['Available_solar_energy'],
+            **{field: records[field] for field in records.dtype.names
+               if field not in day_fields and field != 'Vehicle_state_of_charge'}
+        }
+        for field in day_fields:
+            prediction_results[field] = records[field][-1]
+        return prediction_results
+
+    def write_prediction_results(self, file_path_roots, prediction_results):
+        if self.FILE_FORMAT == 'npz':
+            for file_path_root in file_path_roots:
+                savez_compressed(file_path_root + ".npz", Schema_version=SCHEMA_VERSION, **prediction_results)
+        else:
+            # Serialized only once for all destinations
+            prediction_results = {key: value.tolist() for key, value in prediction_results.items()}
+            prediction_results = json.dumps(prediction_results, indent=4)
+            for file_path_root in file_path_roots:
+                with open(file_path_root + ".json", "w") as fp:
+                    fp.write(prediction_results)
+
+    def write_initial_values(self, file_path_root, initial_values):
+        if self.FILE_FORMAT == 'npz':
+            initial_values = {
+                key: convert_vehicle_schedule_to_array(value) if key in VEHICLE_SCHEDULE_KEYS else asarray(value)
+                for key, value in initial_values.items()
+            }
+            file_path = file_path_root + ".npz"
+            savez_compressed(file_path, Schema_version=SCHEMA_VERSION, **initial_values)
+        else:
+            initial_values = {
+                key: value if key in VEHICLE_SCHEDULE_KEYS else asarray(value).tolist()
+                for key, value in initial_values.items()
+            }
+            file_path = file_path_root + ".json"
+            with open(file_path, "w") as fp:
+                json.dump(initial_values, fp, indent=4)
+
+        # File modification time alone can miss a rewrite within the timer resolution of the file system
+        clear_initial_values_cache(file_path)
 
-        if isinstance(departures[0], ndarray):
-            departures = array(departures.tolist()).flatten()
-            arrivals = array(arrivals.tolist()).flatten()
+    def close(self):
+        if self.pending_episode_log:
+            self.save_episode(self.pending_episode_log)
+            self.pending_episode_log = None
+        if self.pending_initial_values_collector:
+            self.submit_write(self.write_generated_initial_values, self.pending_initial_values_collector)
+            self.pending_initial_values_collector = None
 
-        self.arrivals.append(arrivals.tolist())
-        self.departures.append(departures.tolist())
-        self.chargers[charger].vehicle_arrivals = self.arrivals[charger]
-        self.chargers[charger].vehicle_state_of_charge = self.vehicle_state_of_charge[charger, :]
-        self.chargers[charger].occupancy = initial_values['Charger_occupancy'][charger, :]
\ No newline at end of file
+        if self._writer_finalizer:
+            self._writer_finalizer()
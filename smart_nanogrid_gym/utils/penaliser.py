@@ -1,4 +1,4 @@
-from numpy import floor, ceil, sign
+from numpy import floor, ceil, sign, where, zeros
 
 
 class Penaliser:
@@ -6,9 +6,9 @@ class Penaliser:
         self.NUMBER_OF_CHARGERS = number_of_chargers
         self.END_STATE_OF_CHARGE_MARGIN_RATIO = 0.05
 
-        self._insufficiently_charged_vehicle_penalty = 0.0
+        self.insufficiently_charged_vehicle_penalties = zeros(self.NUMBER_OF_CHARGERS)
         self.total_insufficiently_charged_vehicles_penalty = 0.0
-        self._needless_vehicle_charging_penalty = 0.0
+        self.needless_vehicle_charging_penalties = zeros(self.NUMBER_OF_CHARGERS)
         self.total_needless_vehicles_charging_penalty = 0.0
         self.vehicles_overcharging_penalty = 0.0
         self.vehicles_over_discharging_penalty = 0.0
@@ -38,53 +38,42 @@ class Penaliser:
 
     def penalise_charging_vehicles_outside_bounds(self, timestep, penalty_check_vehicles, requested_end_soc, soc, arrivals,
                                                   charging_nonexistent_vehicles):
-        self.charging_nonexistent_vehicles_penalty = sum(charging_nonexistent_vehicles)
-        insufficiency_penalties = []
-        needless_charging_penalties = []
+        self.charging_nonexistent_vehicles_penalty = charging_nonexistent_vehicles.sum()
         self.vehicle_reward = 0.0
-        for vehicle in penalty_check_vehicles:
-            vehicle_state_of_charge = self.extract_state_of_charge(vehicle, timestep, arrivals, soc)
-            requested_vehicle_state_of_charge = self.extract_requested_state_of_charge(vehicle, timestep, arrivals,
-                                                                                       requested_end_soc)
 
-            self.penalise_state_of_charge_outside_margin(requested_vehicle_state_of_charge, vehicle_state_of_charge)
+        vehicle_state_of_charge = self.extract_state_of_charge(timestep, arrivals, soc)
+        requested_vehicle_state_of_charge = self.extract_requested_state_of_charge(timestep, arrivals, requested_end_soc)
 
-            insufficiency_penalties.append(self._insufficiently_charged_vehicle_penalty)
-            # needless_charging_penalties.append(self._needless_vehicle_charging_penalty)
+        insufficiency_penalties, needless_charging_penalties = self.calculate_state_of_charge_penalties(
+            requested_vehicle_state_of_charge, vehicle_state_of_charge, penalty_check_vehicles)
+        self.insufficiently_charged_vehicle_penalties = insufficiency_penalties
+        self.needless_vehicle_charging_penalties = needless_charging_penalties
 
-        self.total_insufficiently_charged_vehicles_penalty = sum(insufficiency_penalties)
-        # self.total_needless_vehicles_charging_penalty = sum(needless_charging_penalties)
+        self.total_insufficiently_charged_vehicles_penalty = insufficiency_penalties.sum()
+        # self.total_needless_vehicles_charging_penalty = needless_charging_penalties.sum()
         # self.vehicle_reward = self.vehicle_reward * 10
 
-    def extract_state_of_charge(self, vehicle, timestep, arrivals, states_of_charge):
-        if timestep in arrivals:
-            return states_of_charge[vehicle, timestep]
-        else:
-            return states_of_charge[vehicle, timestep - 1]
+    def extract_state_of_charge(self, timestep, arrivals, states_of_charge):
+        return where(arrivals[:, timestep], states_of_charge[:, timestep], states_of_charge[:, timestep - 1])
 
-    def extract_requested_state_of_charge(self, vehicle, timestep, arrivals, requested_states_of_charge):
-        if timestep in arrivals:
-            return requested_states_of_charge[vehicle, timestep]
-        else:
-            return requested_states_of_charge[vehicle, timestep - 1]
+    def extract_requested_state_of_charge(self, timestep, arrivals, requested_states_of_charge):
+        return where(arrivals[:, timestep], requested_states_of_charge[:, timestep],
+                     requested_states_of_charge[:, timestep - 1])
 
-    def penalise_state_of_charge_outside_margin(self, requested_soc, current_soc):
+    def calculate_state_of_charge_penalties(self, requested_soc, current_soc, penalty_check_vehicles):
+        # Works element-wise, so states of charge of any shape are penalised only where penalty check is allowed
         lower_charged_state_margin = self.END_STATE_OF_CHARGE_MARGIN_RATIO * requested_soc
-        upper_charged_state_margin = lower_charged_state_margin
-
-        if requested_soc == 1.0:
-            upper_charged_state_margin = 0.0
-
-        if current_soc < requested_soc - lower_charged_state_margin:
-            self._insufficiently_charged_vehicle_penalty = ((requested_soc - current_soc) * 10) ** 2
-            # self._insufficiently_charged_vehicle_penalty = 10 * (requested_soc - current_soc) ** requested_soc
-            self._needless_vehicle_charging_penalty = 0.0
-        elif requested_soc + upper_charged_state_margin < current_soc:
-            self._insufficiently_charged_vehicle_penalty = 0.0
-            self._needless_vehicle_charging_penalty = ((requested_soc - current_soc) * 10) ** 2
-        elif requested_soc - lower_charged_state_margin <= current_soc <= requested_soc + upper_charged_state_margin:
-            self._insufficiently_charged_vehicle_penalty = 0.0
-            self._needless_vehicle_charging_penalty = 0.0
+        upper_charged_state_margin = where(requested_soc == 1.0, 0.0, lower_charged_state_margin)
+
+        state_of_charge_penalty = ((requested_soc - current_soc) * 10) ** 2
+        # state_of_charge_penalty = 10 * (requested_soc - current_soc) ** requested_soc
+        insufficiently_charged = penalty_check_vehicles & (current_soc < requested_soc - lower_charged_state_margin)
+        needlessly_charged = penalty_check_vehicles & (requested_soc + upper_charged_state_margin < current_soc)
+
+        insufficiency_penalties = where(insufficiently_charged, state_of_charge_penalty, 0.0)
+        needless_charging_penalties = where(needlessly_charged, state_of_charge_penalty, 0.0)
+
+        return insufficiency_penalties, needless_charging_penalties
 
     def penalise_vehicle_overcharging(self, overcharging_powers):
         self.vehicles_overcharging_penalty = sum(overcharging_powers)
@@ -92,7 +81,9 @@ class Penaliser:
     def penalise_vehicle_over_discharging(self, over_discharging_powers):
         self.vehicles_over_discharging_penalty = sum(over_discharging_powers)
 
-    def penalise_nanogrid_resource_issues(self, current_state_of_charge, depth_of_discharge):
+    def penalise_nanogrid_resource_issues(self, current_state_of_charge, depth_of_discharge, overcharging_value,
+                                          over_discharging_value, solar_power, grid_power, battery_power,
+                                          vehicle_power_demand):
         self.penalise_battery_state_below_depth_of_discharge(current_state_of_charge, depth_of_discharge)
 
     def penalise_battery_overcharging(self, overcharging_value):
@@ -137,6 +128,12 @@ class Penaliser:
     def get_needlessly_charged_vehicles_penalty(self):
         return self.total_needless_vehicles_charging_penalty
 
+    def get_insufficiently_charged_vehicle_penalty_per_charger(self):
+        return self.insufficiently_charged_vehicle_penalties
+
+    def get_needlessly_charged_vehicle_penalty_per_charger(self):
+        return self.needless_vehicle_charging_penalties
+
     def get_overcharged_vehicles_penalty(self):
         return self.vehicles_overcharging_penalty
 
@@ -0,0 +1,50 @@
+from time import perf_counter_ns
+
+
+class PhaseProfiler:
+    # Aggregates durations of named phases into histograms with power of two buckets in nanoseconds, i.e. a duration
+    # d falls into bucket d.bit_length(), which covers [2^(b-1), 2^b) nanoseconds. Recording a phase returns the end
+    # time, which is the start time of the next phase, so consecutive phases are timed with a single clock read each.
+    NUMBER_OF_BUCKETS = 40
+
+    def __init__(self):
+        self.phases = {}
+
+    def start(self):
+        return perf_counter_ns()
+
+    def record(self, phase_name, start_time):
+        end_time = perf_counter_ns()
+        duration = end_time - start_time
+
+        phase = self.phases.get(phase_name)
+        if phase is None:
+            phase = self.phases[phase_name] = {'count': 0, 'total': 0, 'min': duration, 'max': duration,
+                                               'histogram': [0] * self.NUMBER_OF_BUCKETS}
+        phase['count'] += 1
+        phase['total'] += duration
+        if duration < phase['min']:
+            phase['min'] = duration
+        if duration > phase['max']:
+            phase['max'] = duration
+        phase['histogram'][min(duration.bit_length(), self.NUMBER_OF_BUCKETS - 1)] += 1
+
+        return end_time
+
+    def reset(self):
+        self.phases.clear()
+
+    def get_profile(self):
+        # Times are in seconds, histogram buckets are given by their upper bound and only non-empty ones are kept
+        profile = {}
+        for phase_name, phase in self.phases.items():
+            profile[phase_name] = {
+                'count': phase['count'],
+                'total_time': phase['total'] * 1e-9,
+                'mean_time': phase['total'] / phase['count'] * 1e-9,
+                'min_time': phase['min'] * 1e-9,
+                'max_time': phase['max'] * 1e-9,
+                'histogram': {(2 ** bucket) * 1e-9: count
+                              for bucket, count in enumerate(phase['histogram']) if count}
+            }
+        return profile
@@ -0,0 +1,157 @@
+import argparse
+import os
+
+from numpy import dtype, float64, load, loadtxt, diff, flatnonzero, repeat, searchsorted, timedelta64, datetime64, \
+    concatenate, maximum, arange, zeros
+from numpy.lib.format import open_memmap
+
+MINUTES_PER_DAY = 24 * 60
+
+# Timestamps are local times without time zone offsets, resolution of minutes is enough for market prices. Days of
+# daylight saving time changes are normalised to 24 hours when a csv file is converted.
+PRICE_SERIES_TYPE = dtype([('Timestamp', 'datetime64[m]'), ('Price', float64)])
+
+
+def get_price_series_cache_file_path(csv_file_path):
+    return os.path.splitext(csv_file_path)[0] + '.prices.npy'
+
+
+def convert_price_series_csv(csv_file_path, npy_file_path):
+    # Csv file has a timestamp and a price column, e.g. "2023-01-01 00:15,84.3", with an optional header row. It is
+    # parsed once into a structured npy file, which is memory-mapped afterwards.
+    with open(csv_file_path, "r") as fp:
+        first_field = fp.readline().split(',')[0].strip().strip('"')
+    header_rows = 0 if first_field[:1].isdigit() else 1
+    price_series = loadtxt(csv_file_path, dtype=PRICE_SERIES_TYPE, delimiter=',', skiprows=header_rows, ndmin=1,
+                           converters={0: lambda timestamp: timestamp.strip().strip('"').replace(' ', 'T')})
+    price_series = normalise_daylight_saving_time(price_series)
+
+    # Written to a temporary file first, so that other processes never map a partially converted series
+    temporary_file_path = f"{npy_file_path}.{os.getpid()}.tmp"
+    converted_series = open_memmap(temporary_file_path, mode='w+', dtype=PRICE_SERIES_TYPE, shape=price_series.shape)
+    converted_series[:] = price_series
+    converted_series.flush()
+    del converted_series
+    os.replace(temporary_file_path, npy_file_path)
+
+
+def normalise_daylight_saving_time(price_series):
+    # Local time exports have a day of 23 hours, which misses an hour, and a day of 25 hours, which repeats one. The
+    # repeated prices are dropped and the missing ones take the price before them, so that every day has 24 hours.
+    # Other gaps and steps back in time are kept, they are rejected when the series is loaded.
+    if len(price_series) < 2:
+        return price_series
+
+    timestamps = price_series['Timestamp']
+    latest_previous_timestamps = maximum.accumulate(timestamps)[:-1]
+    is_repeated = (timestamps[1:] <= latest_previous_timestamps) & \
+        (latest_previous_timestamps - timestamps[1:] < timedelta64(1, 'h'))
+    price_series = price_series[~concatenate(([False], is_repeated))]
+    timestamps = price_series['Timestamp']
+
+    series_intervals = diff(timestamps)
+    series_interval = series_intervals.min()
+    is_missing_hour = series_intervals == series_interval + timedelta64(1, 'h')
+    if series_interval <= timedelta64(0, 'm') or timedelta64(1, 'h') % series_interval or not is_missing_hour.any() \
+            or (series_intervals[~is_missing_hour] != series_interval).any():
+        return price_series
+
+    positions = (timestamps - timestamps[0]) // series_interval
+    regular_positions = arange(positions[-1] + 1)
+    regular_series = zeros(len(regular_positions), dtype=PRICE_SERIES_TYPE)
+    regular_series['Timestamp'] = timestamps[0] + regular_positions * series_interval
+    regular_series['Price'] = price_series['Price'][searchsorted(positions, regular_positions, side='right') - 1]
+    return regular_series
+
+
+def load_price_series_file(file_path):
+    if file_path.endswith('.csv'):
+        npy_file_path = get_price_series_cache_file_path(file_path)
+        if not os.path.exists(npy_file_path) or os.path.getmtime(npy_file_path) < os.path.getmtime(file_path):
+            convert_price_series_csv(file_path, npy_file_path)
+        file_path = npy_file_path
+
+    return load(file_path, mmap_mode='r')
+
+
+class PriceSeries:
+    # Long series of market prices, e.g. years of day-ahead or intraday prices, which is memory-mapped instead of
+    # loaded. Episodes take the prices of whole days starting at midnight, which are indexed once, so sampling and
+    # slicing days never goes through the whole series.
+    def __init__(self, file_path, number_of_days, time_interval):
+        self.FILE_PATH = file_path
+        self.series = load_price_series_file(file_path)
+
+        if self.series.dtype != PRICE_SERIES_TYPE:
+            raise ValueError(f"Error: Price series {file_path} should have a Timestamp and a Price field!")
+        if len(self.series) < 2:
+            raise ValueError(f"Error: Price series {file_path} has less than two prices!")
+
+        self.timestamps = self.series['Timestamp']
+        self.prices = self.series['Price']
+
+        series_intervals = diff(self.timestamps)
+        self.SERIES_INTERVAL_IN_MINUTES = int(series_intervals[0] / timedelta64(1, 'm'))
+        if self.SERIES_INTERVAL_IN_MINUTES <= 0 or (series_intervals != series_intervals[0]).any():
+            raise ValueError(f"Error: Timestamps of price series {file_path} should be ascending with a constant "
+                             f"interval and without gaps, apart from daylight saving time changes of csv files!")
+        if MINUTES_PER_DAY % self.SERIES_INTERVAL_IN_MINUTES:
+            raise ValueError(f"Error: Interval of price series {file_path} does not divide a day!")
+
+        self.TIMESTEP_IN_MINUTES = round(60 * time_interval)
+        if self.TIMESTEP_IN_MINUTES % self.SERIES_INTERVAL_IN_MINUTES and \
+                self.SERIES_INTERVAL_IN_MINUTES % self.TIMESTEP_IN_MINUTES:
+            raise ValueError(f"Error: Time interval of {time_interval}h can not be resampled from the "
+                             f"{self.SERIES_INTERVAL_IN_MINUTES}min interval of price series {file_path}!")
+
+        # Days which start at midnight and are followed by enough prices for a whole episode
+        self.NUMBER_OF_DAYS = number_of_days
+        self.SERIES_VALUES_PER_DAY = MINUTES_PER_DAY // self.SERIES_INTERVAL_IN_MINUTES
+        values_per_episode = self.SERIES_VALUES_PER_DAY * self.NUMBER_OF_DAYS
+        midnight_indices = flatnonzero(self.timestamps == self.timestamps.astype('datetime64[D]'))
+        self.day_start_indices = midnight_indices[midnight_indices + values_per_episode <= len(self.series)]
+        self.NUMBER_OF_AVAILABLE_DAYS = len(self.day_start_indices)
+        if self.NUMBER_OF_AVAILABLE_DAYS == 0:
+            raise ValueError(f"Error: Price series {file_path} does not cover {number_of_days} whole days!")
+
+        # Positive prices are normalised by the highest one of the whole series, so that observations of all days
+        # are on the same scale
+        self.PRICE_MAX = float(self.prices.max(where=(self.prices >= 0), initial=0))
+
+    def sample_day_indices(self, random_generator, number_of_indices=None):
+        return random_generator.integers(0, self.NUMBER_OF_AVAILABLE_DAYS, size=number_of_indices)
+
+    def find_day_index(self, timestamp):
+        # Index of the first available day starting at or after the timestamp
+        day_index = searchsorted(self.timestamps[self.day_start_indices], datetime64(timestamp, 'm'))
+        if day_index == self.NUMBER_OF_AVAILABLE_DAYS:
+            raise ValueError(f"Error: Price series {self.FILE_PATH} has no available day after {timestamp}!")
+        return int(day_index)
+
+    def get_day_timestamp(self, day_index):
+        return self.timestamps[self.day_start_indices[day_index]]
+
+    def get_prices(self, day_index):
+        # Prices of the episode starting with the day, resampled to the time interval of the environment. Only this
+        # slice of the memory-mapped series is read.
+        if not 0 <= day_index < self.NUMBER_OF_AVAILABLE_DAYS:
+            raise ValueError(f"Error: Day index {day_index} is outside of price series {self.FILE_PATH}!")
+
+        first_value = self.day_start_indices[day_index]
+        episode_prices = self.prices[first_value:first_value + self.SERIES_VALUES_PER_DAY * self.NUMBER_OF_DAYS]
+
+        if self.TIMESTEP_IN_MINUTES >= self.SERIES_INTERVAL_IN_MINUTES:
+            values_per_timestep = self.TIMESTEP_IN_MINUTES // self.SERIES_INTERVAL_IN_MINUTES
+            return episode_prices.reshape(1, -1, values_per_timestep).mean(axis=2)
+        else:
+            return repeat(episode_prices, self.SERIES_INTERVAL_IN_MINUTES // self.TIMESTEP_IN_MINUTES).reshape(1, -1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a csv price series into a memory-mapped npy file')
+    parser.add_argument('csv_file_path', type=str)
+    parser.add_argument('--output', type=str, default='', help='Path of the npy file, next to the csv by default')
+    arguments = parser.parse_args()
+
+    convert_price_series_csv(arguments.csv_file_path,
+                             arguments.output if arguments.output else get_price_series_cache_file_path(arguments.csv_file_path))
@@ -1,68 +1,86 @@
-import numpy as np
-from numpy import mean, reshape, zeros
-from scipy.io import loadmat
+from functools import cached_property
+
+from numpy import reshape, resize
+from numpy.random import default_rng
 
 from smart_nanogrid_gym.utils.pv_system import PVSystem
 from smart_nanogrid_gym.utils.config import data_files_directory_path
+from smart_nanogrid_gym.utils.shared_datasets import attach_shared_dataset, get_file_version
 
 
 class PVSystemManager:
     def __init__(self, number_of_days_to_predict, time_interval):
         self.PREDICTION_DAY_PADDING = 1
-        total_timesteps = int(24 / time_interval)
-        self.padded_total_timesteps = total_timesteps * 2
+        self.MINUTES_PER_DAY = 24 * 60
+        self.total_timesteps = int(24 / time_interval)
         self.padded_number_of_prediction_days = number_of_days_to_predict + self.PREDICTION_DAY_PADDING
-        padded_experiment_length = total_timesteps * self.padded_number_of_prediction_days
+        self.padded_experiment_length = self.total_timesteps * self.padded_number_of_prediction_days
+        self.TIME_INTERVAL = time_interval
 
         self.pv_system = PVSystem(length=2.279, width=1.134, depth=20, total_dimensions=2.279*1.134*20, efficiency=0.21)
-        self.solar_irradiance = self.load_solar_irradiance_per_timestep(padded_experiment_length, time_interval)
-        self.solar_irradiance_2 = self.reshape_solar_irradiance_per_days_of_experiment(number_of_days_to_predict)
-        self.max_radiation = self.solar_irradiance_2.max(where=(self.solar_irradiance_2 >= 0), initial=0)
-        self.available_solar_energy = self.calculate_available_solar_energy()
-        self.available_solar_power = self.calculate_available_solar_produced_power(time_interval)
 
-    def load_solar_irradiance_per_timestep(self, padded_experiment_length, time_interval):
-        solar_irradiance_forecast = self.load_raw_irradiance_data_from_mat_file('solar_irradiance.mat')
-        solar_irradiance = self.calculate_solar_irradiance_mean(solar_irradiance_forecast, padded_experiment_length,
-                                                                time_interval)
-        return solar_irradiance
+        # Ratio by which the produced solar power is scaled, to simulate different solar days
+        self.MAX_SHIFT_RATIO_PERCENTAGE = 180
+        self.random_generator = default_rng()
 
-    def load_raw_irradiance_data_from_mat_file(self, irradiance_data_filename):
-        irradiance_data = loadmat(data_files_directory_path + irradiance_data_filename)
-        return irradiance_data['irradiance']
+    # Solar data is only loaded on first use, so constructing a manager, e.g. for an environment which is then never
+    # stepped, costs nothing. Afterwards the cached values are plain attributes.
+    @cached_property
+    def solar_irradiance(self):
+        return self.load_solar_irradiance_per_timestep(self.padded_experiment_length, self.TIME_INTERVAL)
+
+    @cached_property
+    def solar_irradiance_2(self):
+        return self.reshape_solar_irradiance_per_days_of_experiment()
+
+    @cached_property
+    def max_radiation(self):
+        return self.solar_irradiance_2.max(where=(self.solar_irradiance_2 >= 0), initial=0)
+
+    @cached_property
+    def available_solar_energy(self):
+        return self.calculate_available_solar_energy()
 
-    def calculate_solar_irradiance_mean(self, irradiance_forecast, padded_experiment_length, time_interval):
+    @cached_property
+    def available_solar_power(self):
+        return self.calculate_available_solar_produced_power(self.TIME_INTERVAL)
+
+    def load_solar_irradiance_per_timestep(self, padded_experiment_length, time_interval):
+        # Resampled irradiance is a shared read-only dataset per time interval and number of days, the raw minute
+        # data is only loaded when it has to be built
+        source_file_path = data_files_directory_path + 'solar_irradiance.mat'
         timestep_in_minutes = int(60 * time_interval)
-        solar_irradiance = zeros([1, padded_experiment_length])
-        experiment_length_in_minutes = timestep_in_minutes * padded_experiment_length
-
-        count = 0
-        for interval in range(0, experiment_length_in_minutes, timestep_in_minutes):
-            next_interval = interval + timestep_in_minutes
-            solar_irradiance[0, count] = (mean(irradiance_forecast[interval: next_interval]))
-            count = count + 1
-        return solar_irradiance
-
-    def reshape_solar_irradiance_per_days_of_experiment(self, number_of_days_to_predict):
-        if number_of_days_to_predict == 1:
-            reshaped_solar_irradiance = reshape(
-                self.solar_irradiance,
-                (number_of_days_to_predict, self.padded_total_timesteps)
-            )
-        else:
-            reshaped_solar_irradiance = np.reshape(self.solar_irradiance.flatten(),
-                                                   (self.padded_number_of_prediction_days, -1))
-            repeated_solar_irradiance = np.repeat(reshaped_solar_irradiance, 2, axis=0)
-            mask = np.ones(repeated_solar_irradiance.shape, dtype=bool)
-            mask[[0, -1]] = False
-            solar_irradiance_with_repeated_middle = repeated_solar_irradiance[mask]
-
-            reshaped_solar_irradiance = reshape(
-                solar_irradiance_with_repeated_middle,
-                (number_of_days_to_predict, self.padded_total_timesteps)
-            )
-
-        return reshaped_solar_irradiance
+        dataset_name = f"solar_irradiance_{timestep_in_minutes}min_{self.padded_number_of_prediction_days}days"
+        return attach_shared_dataset(dataset_name, get_file_version(source_file_path),
+                                     lambda: self.resample_solar_irradiance(source_file_path, padded_experiment_length,
+                                                                            timestep_in_minutes))
+
+    def resample_solar_irradiance(self, source_file_path, padded_experiment_length, timestep_in_minutes):
+        solar_irradiance_forecast = self.load_raw_irradiance_data_from_mat_file(source_file_path)
+
+        # Irradiance data covers only a few days, longer experiments repeat its whole days one after another
+        available_days = len(solar_irradiance_forecast) // self.MINUTES_PER_DAY
+        available_experiment_length = min(self.total_timesteps * available_days, padded_experiment_length)
+        solar_irradiance = self.calculate_solar_irradiance_mean(solar_irradiance_forecast, available_experiment_length,
+                                                                timestep_in_minutes)
+        return resize(solar_irradiance, (1, padded_experiment_length))
+
+    def load_raw_irradiance_data_from_mat_file(self, irradiance_data_file_path):
+        # Imported here, because scipy is slow to import and only needed when the irradiance cache misses
+        from scipy.io import loadmat
+
+        irradiance_data = loadmat(irradiance_data_file_path)
+        return irradiance_data['irradiance']
+
+    def calculate_solar_irradiance_mean(self, irradiance_forecast, experiment_length, timestep_in_minutes):
+        # Minutes of every timestep are laid out in a row, so all means are taken at once
+        experiment_length_in_minutes = timestep_in_minutes * experiment_length
+        minute_irradiance = irradiance_forecast.ravel()[:experiment_length_in_minutes]
+        return minute_irradiance.reshape(1, experiment_length, timestep_in_minutes).mean(axis=2)
+
+    def reshape_solar_irradiance_per_days_of_experiment(self):
+        # All days are kept in a single row, so that they are indexed by the timestep of the whole episode
+        return reshape(self.solar_irradiance, (1, -1))
 
     def calculate_available_solar_energy(self):
         scaling_pv = self.calculate_pv_scaling_coefficient()
@@ -89,3 +107,8 @@ class PVSystemManager:
 
     def get_available_solar_produced_power_at_timestep_t(self, t):
         return self.available_solar_power[0, t]
+
+    def generate_random_shift_ratio(self, number_of_ratios=None, random_generator=None):
+        # Generator of the manager is used, unless the ratios belong to a nanogrid with its own generator
+        random_generator = random_generator if random_generator else self.random_generator
+        return random_generator.integers(0, self.MAX_SHIFT_RATIO_PERCENTAGE + 1, size=number_of_ratios) / 100
@@ -0,0 +1,70 @@
+import argparse
+
+from numpy import load, random
+from numpy.lib.format import open_memmap
+
+from smart_nanogrid_gym.utils.scenario_generator import ScenarioGenerator, get_array_columns, get_scenario_type
+
+
+def generate_scenario_bank(file_path, number_of_scenarios, number_of_chargers=8, time_interval=1.0,
+                           enable_different_vehicle_battery_capacities=True, enable_requested_state_of_charge=False,
+                           seed=None, days_per_batch=10000, number_of_days=1):
+    # Scenarios are written straight into the memory-mapped file batch by batch, so banks larger than memory can be
+    # generated. Every scenario covers a whole episode of number_of_days days.
+    random_generator = random.default_rng(seed)
+    array_columns = get_array_columns(time_interval, number_of_days)
+    scenario_generator = ScenarioGenerator(number_of_chargers, time_interval, array_columns,
+                                           enable_different_vehicle_battery_capacities,
+                                           enable_requested_state_of_charge, number_of_days)
+
+    scenarios = open_memmap(file_path, mode='w+', dtype=scenario_generator.scenario_type, shape=(number_of_scenarios,))
+    for first_scenario in range(0, number_of_scenarios, days_per_batch):
+        number_of_scenarios_in_batch = min(days_per_batch, number_of_scenarios - first_scenario)
+        scenarios[first_scenario:first_scenario + number_of_scenarios_in_batch] = \
+            scenario_generator.generate_days(number_of_scenarios_in_batch, random_generator)
+
+    scenarios.flush()
+    return scenarios
+
+
+class ScenarioBank:
+    def __init__(self, file_path, number_of_chargers, array_columns):
+        self.FILE_PATH = file_path
+        self.scenarios = load(file_path, mmap_mode='r')
+
+        if self.scenarios.dtype != get_scenario_type(number_of_chargers, array_columns):
+            raise ValueError(f"Error: Scenario bank {file_path} was generated for a different number of chargers, "
+                             f"time interval or number of days!")
+
+        self.NUMBER_OF_SCENARIOS = len(self.scenarios)
+        if self.NUMBER_OF_SCENARIOS == 0:
+            raise ValueError(f"Error: Scenario bank {file_path} is empty!")
+
+    def sample_scenario_indices(self, random_generator, number_of_indices=None):
+        return random_generator.integers(0, self.NUMBER_OF_SCENARIOS, size=number_of_indices)
+
+    def get_scenario(self, scenario_index):
+        if not 0 <= scenario_index < self.NUMBER_OF_SCENARIOS:
+            raise ValueError(f"Error: Scenario index {scenario_index} is outside of the scenario bank!")
+        return self.scenarios[scenario_index]
+
+    def get_scenarios(self, scenario_indices):
+        # Fancy indexing gathers all requested scenarios from the file in a single copy
+        return self.scenarios[scenario_indices]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pregenerate a memory-mapped bank of charging days')
+    parser.add_argument('file_path', type=str)
+    parser.add_argument('--scenarios', type=int, default=100000)
+    parser.add_argument('--chargers', type=int, default=8)
+    parser.add_argument('--time_interval', type=float, default=1.0, help='Time interval in hours')
+    parser.add_argument('--same_vehicle_capacities', action='store_true')
+    parser.add_argument('--requested_state_of_charge', action='store_true')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--days', type=int, default=1, help='Number of days simulated in one episode')
+    arguments = parser.parse_args()
+
+    generate_scenario_bank(arguments.file_path, arguments.scenarios, arguments.chargers, arguments.time_interval,
+                           not arguments.same_vehicle_capacities, arguments.requested_state_of_charge, arguments.seed,
+                           number_of_days=arguments.days)
@@ -0,0 +1,155 @@
+from numpy import dtype, float64, float32, int16, arange, zeros, minimum, maximum, nonzero, cumsum, concatenate
+
+
+def get_array_columns(time_interval, number_of_days=1):
+    # Simulated days and one more hour, so that vehicles can depart after the last timestep
+    return int((24 * number_of_days + 1) / time_interval)
+
+
+def get_scenario_type(number_of_chargers, array_columns):
+    # Departure lookup tables are derived from time until departure, so only it is stored
+    array_shape = (number_of_chargers, array_columns)
+    return dtype([
+        ('SOC', float64, array_shape),
+        ('Charger_occupancy', bool, array_shape),
+        ('Vehicle_capacities', float32, array_shape),
+        ('Requested_SOC', float64, array_shape),
+        ('Is_arrival', bool, array_shape),
+        ('Time_until_departure', int16, array_shape)
+    ])
+
+
+def get_vehicle_type():
+    return dtype([
+        ('Arrivals', int),
+        ('Departures', int),
+        ('SOC', float64),
+        ('Vehicle_capacities', float64),
+        ('Requested_SOC', float64)
+    ])
+
+
+class ScenarioGenerator:
+    # Generates charging days for all chargers and a batch of days at once, a generated day spans the whole episode
+    # of number_of_days days. Every charger alternates between being empty, when a vehicle arrives with probability
+    # 0.4 at each timestep, and being occupied for 4 to 10 hours. Vehicles are drawn slot by slot, i.e. the first
+    # vehicle of every charger, then the second one and so on.
+    def __init__(self, number_of_chargers, time_interval, array_columns, enable_different_vehicle_battery_capacities,
+                 enable_requested_state_of_charge, number_of_days=1):
+        self.NUMBER_OF_CHARGERS = number_of_chargers
+        self.TIME_INTERVAL = time_interval
+        self.ARRAY_COLUMNS = array_columns
+        self.TOTAL_TIMESTEPS = int(24 / time_interval) * number_of_days
+        self.enable_different_vehicle_battery_capacities = enable_different_vehicle_battery_capacities
+        self.enable_requested_state_of_charge = enable_requested_state_of_charge
+
+        self.VEHICLE_ARRIVAL_PROBABILITY = 0.4
+        self.MIN_CHARGING_TIMESTEPS = int(4 / time_interval)
+        self.MAX_CHARGING_TIMESTEPS = int(10 / time_interval)
+        self.LATEST_DEPARTURE_TIMESTEP = self.TOTAL_TIMESTEPS + int(1 / time_interval)
+        # After a departure the charger is empty for at least one timestep, which bounds vehicles per charger and day
+        self.MAX_VEHICLES_PER_CHARGER = self.TOTAL_TIMESTEPS // (self.MIN_CHARGING_TIMESTEPS + 1) + 1
+
+        self.scenario_type = get_scenario_type(self.NUMBER_OF_CHARGERS, self.ARRAY_COLUMNS)
+        self.vehicle_type = get_vehicle_type()
+
+    def generate_days(self, number_of_days, random_generator):
+        return self.fill_scenarios(self.generate_vehicles(number_of_days, random_generator))
+
+    def generate_vehicles(self, number_of_days, random_generator):
+        # Compact table of drawn vehicles, its size depends on the number of vehicles instead of timesteps. Vehicles
+        # of unused slots arrive after the last timestep.
+        vehicle_shape = (number_of_days, self.NUMBER_OF_CHARGERS, self.MAX_VEHICLES_PER_CHARGER)
+        vehicles = zeros(vehicle_shape, dtype=self.vehicle_type)
+        vehicles['Arrivals'], vehicles['Departures'] = self.generate_vehicle_schedules(vehicle_shape, random_generator)
+
+        arrival_state_of_charge = random_generator.uniform(0.1, 0.9, vehicle_shape)
+        vehicles['SOC'] = arrival_state_of_charge
+        if self.enable_different_vehicle_battery_capacities:
+            vehicles['Vehicle_capacities'] = random_generator.integers(15, 120, vehicle_shape)
+        else:
+            vehicles['Vehicle_capacities'] = 40.0
+        if self.enable_requested_state_of_charge:
+            lowest_requested_state_of_charge = arrival_state_of_charge + 0.1
+            vehicles['Requested_SOC'] = lowest_requested_state_of_charge + \
+                (1.0 - lowest_requested_state_of_charge) * random_generator.random(vehicle_shape)
+        else:
+            vehicles['Requested_SOC'] = 1.0
+
+        return vehicles
+
+    def fill_scenarios(self, vehicles, first_timestep=0, number_of_columns=None):
+        # Fills per timestep arrays for columns from first_timestep on, by default for the whole episode. Vehicles
+        # which arrived before the first column are present from its start, but are not marked as arriving.
+        number_of_columns = self.ARRAY_COLUMNS if number_of_columns is None else number_of_columns
+        if number_of_columns == self.ARRAY_COLUMNS:
+            scenario_type = self.scenario_type
+        else:
+            scenario_type = get_scenario_type(self.NUMBER_OF_CHARGERS, number_of_columns)
+
+        window_end = min(first_timestep + number_of_columns, self.TOTAL_TIMESTEPS)
+        stay_ends = minimum(vehicles['Departures'], window_end)
+        vehicles_present = (vehicles['Arrivals'] < window_end) & (stay_ends > first_timestep)
+
+        day_indices, charger_indices, _ = nonzero(vehicles_present)
+        vehicle_arrivals = vehicles['Arrivals'][vehicles_present] - first_timestep
+        vehicle_departures = vehicles['Departures'][vehicles_present]
+
+        scenarios = zeros(len(vehicles), dtype=scenario_type)
+        arriving = vehicle_arrivals >= 0
+        scenarios['Is_arrival'][day_indices[arriving], charger_indices[arriving], vehicle_arrivals[arriving]] = True
+        scenarios['SOC'][day_indices[arriving], charger_indices[arriving], vehicle_arrivals[arriving]] = \
+            vehicles['SOC'][vehicles_present][arriving]
+
+        # Values of the vehicle present at each timestep are gathered from per vehicle tables, 0 means no vehicle
+        present_vehicles = self.find_present_vehicles(len(vehicles), number_of_columns, day_indices, charger_indices,
+                                                      maximum(vehicle_arrivals, 0),
+                                                      stay_ends[vehicles_present] - first_timestep)
+        occupancy = present_vehicles > 0
+        scenarios['Charger_occupancy'] = occupancy
+        scenarios['Vehicle_capacities'] = self.gather_vehicle_values(vehicles['Vehicle_capacities'][vehicles_present],
+                                                                     present_vehicles)
+        scenarios['Requested_SOC'] = self.gather_vehicle_values(vehicles['Requested_SOC'][vehicles_present],
+                                                                present_vehicles)
+        timesteps = first_timestep + arange(number_of_columns)
+        scenarios['Time_until_departure'] = \
+            (self.gather_vehicle_values(vehicle_departures, present_vehicles) - timesteps) * occupancy
+
+        return scenarios
+
+    def find_present_vehicles(self, number_of_days, number_of_columns, day_indices, charger_indices, stay_starts,
+                              stay_ends):
+        # Stays of the same charger never overlap, so a vehicle number added at the arrival and removed at the end of
+        # the stay is restored by the cumulative sum along timesteps. Every charger row sums back to zero, therefore
+        # the faster cumulative sum over the flattened array gives the same result.
+        vehicle_numbers = arange(1, len(stay_starts) + 1)
+        vehicle_changes = zeros((number_of_days, self.NUMBER_OF_CHARGERS, number_of_columns + 1), dtype=int)
+        vehicle_changes[day_indices, charger_indices, stay_starts] = vehicle_numbers
+        vehicle_changes[day_indices, charger_indices, stay_ends] = -vehicle_numbers
+        return cumsum(vehicle_changes.ravel()).reshape(vehicle_changes.shape)[:, :, :number_of_columns]
+
+    def gather_vehicle_values(self, vehicle_values, present_vehicles):
+        return concatenate(([0], vehicle_values)).take(present_vehicles)
+
+    def generate_vehicle_schedules(self, vehicle_shape, random_generator):
+        waiting_timesteps = random_generator.geometric(self.VEHICLE_ARRIVAL_PROBABILITY, vehicle_shape) - 1
+        departure_draws = random_generator.random(vehicle_shape)
+
+        arrivals = zeros(vehicle_shape, dtype=int)
+        departures = zeros(vehicle_shape, dtype=int)
+
+        # Arrival of a vehicle depends on the departure of the previous one, so only vehicles are looped over
+        first_possible_arrival = zeros(vehicle_shape[:2], dtype=int)
+        for vehicle in range(self.MAX_VEHICLES_PER_CHARGER):
+            arrival = first_possible_arrival + waiting_timesteps[:, :, vehicle]
+
+            earliest_departure = arrival + self.MIN_CHARGING_TIMESTEPS
+            latest_departure = minimum(arrival + self.MAX_CHARGING_TIMESTEPS, self.LATEST_DEPARTURE_TIMESTEP)
+            departure_range = maximum(latest_departure - earliest_departure, 0)
+            departure = earliest_departure + (departure_draws[:, :, vehicle] * departure_range).astype(int)
+
+            arrivals[:, :, vehicle] = arrival
+            departures[:, :, vehicle] = departure
+            first_possible_arrival = departure + 1
+
+        return arrivals, departures
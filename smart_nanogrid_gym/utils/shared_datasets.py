@@ -0,0 +1,75 @@
+import os
+
+from numpy import dtype, float64, int64, load
+from numpy.lib.format import open_memmap
+
+from smart_nanogrid_gym.utils.config import data_files_directory_path
+
+# Read-only datasets attached by this process, keyed by file path and validated by the version of their source
+_shared_datasets = {}
+
+
+def get_file_version(file_path):
+    file_status = os.stat(file_path)
+    return file_status.st_mtime_ns, file_status.st_size
+
+
+def get_dataset_file_path(dataset_name):
+    return data_files_directory_path + f"{dataset_name}.dataset.npy"
+
+
+def get_dataset_type(values_shape):
+    return dtype([('Source_version', int64, (2,)), ('Values', float64, values_shape)])
+
+
+def attach_shared_dataset(dataset_name, source_version, build_values):
+    # Datasets are stored as memory-mapped files next to the data, which every process maps read-only. Worker
+    # processes therefore share a single copy of the data in memory and only the first one to miss builds it.
+    file_path = get_dataset_file_path(dataset_name)
+    attached_version, values = _shared_datasets.get(file_path, (None, None))
+    if attached_version != source_version:
+        values = read_dataset_file(file_path, source_version)
+        if values is None:
+            values = write_dataset_file(file_path, source_version, build_values())
+        _shared_datasets[file_path] = (source_version, values)
+
+    return values
+
+
+def read_dataset_file(file_path, source_version):
+    try:
+        dataset = load(file_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    if dataset.dtype.names != ('Source_version', 'Values') or len(dataset) != 1 or \
+            tuple(dataset['Source_version'][0]) != tuple(source_version):
+        return None
+    return dataset['Values'][0]
+
+
+def write_dataset_file(file_path, source_version, values):
+    # Written to a temporary file first, so that other processes never map a partially written dataset. When the file
+    # can not be written, e.g. without write access or while it is mapped on Windows, values stay in this process.
+    temporary_file_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        dataset = open_memmap(temporary_file_path, mode='w+', dtype=get_dataset_type(values.shape), shape=(1,))
+        dataset['Source_version'] = source_version
+        dataset['Values'] = values
+        dataset.flush()
+        del dataset
+        os.replace(temporary_file_path, file_path)
+    except OSError:
+        if os.path.exists(temporary_file_path):
+            os.remove(temporary_file_path)
+    else:
+        shared_values = read_dataset_file(file_path, source_version)
+        if shared_values is not None:
+            return shared_values
+
+    values.setflags(write=False)
+    return values
+
+
+def detach_shared_datasets():
+    _shared_datasets.clear()
@@ -0,0 +1,207 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+
+import gym
+import numpy as np
+import torch
+from numpy.random import SeedSequence
+from stable_baselines3 import DDPG, PPO
+
+# Registers the environment in gym, also in spawned worker processes
+import smart_nanogrid_gym
+from smart_nanogrid_gym.envs import SmartNanogridVecEnv
+
+ALGORITHMS = {'DDPG': DDPG, 'PPO': PPO}
+ENVIRONMENT_VARIANTS = {
+    'basic': {'vehicle_to_everything': False, 'pv_system_available_in_model': False, 'battery_system_available_in_model': False},
+    'b-pv': {'vehicle_to_everything': False, 'pv_system_available_in_model': True, 'battery_system_available_in_model': True},
+    'v2x': {'vehicle_to_everything': True, 'pv_system_available_in_model': False, 'battery_system_available_in_model': False},
+    'v2x-b-pv': {'vehicle_to_everything': True, 'pv_system_available_in_model': True, 'battery_system_available_in_model': True}
+}
+# Episode sums of recorded values, which are evaluated for every model next to the total reward
+EVALUATION_KPI_FIELDS = ['Total_cost', 'Grid_energy', 'Grid_energy_cost', 'Utilized_solar_energy', 'Total_penalties',
+                         'Total_vehicle_penalties', 'Total_battery_penalties']
+
+# Environments and models loaded by a worker process, reused by all following jobs of the same model and batch size
+_worker_models = {}
+
+
+def find_environment_variant_name(model_name):
+    lowercase_name = model_name.lower()
+    if 'v2x-b-pv' in lowercase_name:
+        return 'v2x-b-pv'
+    elif 'v2x' in lowercase_name:
+        return 'v2x'
+    elif 'b-pv' in lowercase_name:
+        return 'b-pv'
+    elif 'basic' in lowercase_name:
+        return 'basic'
+    else:
+        raise ValueError(f"{model_name} should be a variant of a nanogrid model and have it specified in it's file "
+                         f"name, i.e. should be one of the following: [basic, b-pv, v2x, v2x-b-pv], but it is not!")
+
+
+def find_algorithm_name(model_name):
+    uppercase_name = model_name.upper()
+    for algorithm_name in ALGORITHMS:
+        if algorithm_name in uppercase_name:
+            return algorithm_name
+
+    raise ValueError(f"{model_name} nanogrid model variant should in it's name have specified which algorithm it used "
+                     f"during model training, e.g. DDPG or PPO or ddpg or Ppo, etc. "
+                     f"Currently accepted algorithms are: DDPG and PPO!")
+
+
+def create_model_specification(model_name, model_path, number_of_chargers, device='cpu', **environment_configuration):
+    # Plain dictionary, so that it can be sent to worker processes, which load the model themselves
+    environment_variant_name = find_environment_variant_name(model_name)
+    return {
+        'name': model_name,
+        'path': model_path,
+        'algorithm': find_algorithm_name(model_name),
+        'env_name': environment_variant_name,
+        'device': device,
+        'environment_configuration': {
+            **ENVIRONMENT_VARIANTS[environment_variant_name],
+            'number_of_chargers': number_of_chargers,
+            # Workers would overwrite each other's result files, so episodes are not logged by default
+            'logging_policy': 'off',
+            'enable_info_kpis': True,
+            **environment_configuration
+        }
+    }
+
+
+def initialise_worker():
+    # Every worker runs a single model at a time, more threads per worker would only compete for the same cores
+    torch.set_num_threads(1)
+
+
+def load_model_with_environment(model_specification, number_of_batched_episodes=None):
+    model_key = (model_specification['name'], number_of_batched_episodes)
+    if model_key not in _worker_models:
+        if number_of_batched_episodes:
+            env = SmartNanogridVecEnv(number_of_batched_episodes, **model_specification['environment_configuration'])
+        else:
+            env = gym.make('SmartNanogridEnv-v0', **model_specification['environment_configuration'])
+        algorithm = ALGORITHMS[model_specification['algorithm']]
+        model = algorithm.load(model_specification['path'], env=env, device=model_specification['device'])
+        _worker_models[model_key] = (env, model)
+
+    return _worker_models[model_key]
+
+
+def evaluate_model_for_single_episode(current_model, env, kwargs):
+    rewards_list = []
+
+    obs, _ = env.reset(**kwargs)
+    done = False
+    while not done:
+        action, _states = current_model.predict(obs)
+        obs, reward, terminated, truncated, info = env.step(action)
+        done = terminated or truncated
+        rewards_list.append(reward)
+
+    return rewards_list
+
+
+def evaluate_model_for_batch_of_episodes(current_model, vec_env, seeds):
+    # Episodes of the batch are simulated in lockstep, so the policy is called once per timestep for all of them.
+    # Every episode is drawn from its own seed.
+    vec_env.seed(seeds)
+    obs = vec_env.reset()
+    total_rewards = np.zeros(vec_env.num_envs)
+    infos = []
+    for _ in range(vec_env.TOTAL_TIMESTEPS):
+        actions, _states = current_model.predict(obs)
+        obs, rewards, dones, infos = vec_env.step(actions)
+        total_rewards += rewards
+
+    # Infos of the last step hold the KPIs of every finished episode
+    episode_kpis = [info['episode_kpis'] for info in infos]
+    return total_rewards, episode_kpis
+
+
+def evaluate_episodes(model_specification, episode_indices, episode_seeds):
+    env, model = load_model_with_environment(model_specification)
+    episode_recorder = env.unwrapped.episode_recorder
+
+    results = []
+    for episode_index, episode_seed in zip(episode_indices, episode_seeds):
+        reset_config = {
+            'seed': episode_seed,
+            'generate_new_initial_values': True,
+            'algorithm_used': model_specification['algorithm'],
+            'environment_mode': 'evaluation'
+        }
+        rewards = evaluate_model_for_single_episode(model, env, reset_config)
+
+        records = episode_recorder.get_records()
+        kpis = [float(records[field].sum()) for field in EVALUATION_KPI_FIELDS]
+        results.append((model_specification['name'], episode_index, float(sum(rewards)), *kpis))
+
+    return results
+
+
+def evaluate_batched_episodes(model_specification, episode_indices, episode_seeds, number_of_batched_episodes=None):
+    # Every episode of the chunk is drawn from its own seed, so it runs on the same day as in sequential evaluation.
+    # A shorter last chunk reuses the environment and model of full chunks, its unused nanogrids replay the last
+    # episode and their results are dropped.
+    number_of_batched_episodes = number_of_batched_episodes if number_of_batched_episodes else len(episode_indices)
+    vec_env, model = load_model_with_environment(model_specification, number_of_batched_episodes)
+    batch_seeds = list(episode_seeds) + [episode_seeds[-1]] * (number_of_batched_episodes - len(episode_seeds))
+    total_rewards, episode_kpis = evaluate_model_for_batch_of_episodes(model, vec_env, batch_seeds)
+
+    return [(model_specification['name'], episode_index, float(total_reward),
+             *[kpis[field] for field in EVALUATION_KPI_FIELDS])
+            for episode_index, total_reward, kpis in zip(episode_indices, total_rewards, episode_kpis)]
+
+
+def evaluate_models_in_parallel(model_specifications, number_of_episodes, seed=None, number_of_workers=None,
+                                episodes_per_job=10, batched_inference=False):
+    # Jobs are (model, chunk of episodes) pairs. Episode i is seeded with the same spawned seed sequence for every
+    # model, so all models are evaluated on the same days no matter which worker runs them. With batched inference
+    # every job runs its chunk of episodes in lockstep on a vectorized environment.
+    if batched_inference:
+        evaluate_job = partial(evaluate_batched_episodes,
+                               number_of_batched_episodes=min(episodes_per_job, number_of_episodes))
+    else:
+        evaluate_job = evaluate_episodes
+    episode_seeds = SeedSequence(seed).spawn(number_of_episodes)
+    jobs = []
+    for model_specification in model_specifications:
+        for first_episode in range(0, number_of_episodes, episodes_per_job):
+            episode_indices = list(range(first_episode, min(first_episode + episodes_per_job, number_of_episodes)))
+            jobs.append((model_specification, episode_indices, [episode_seeds[index] for index in episode_indices]))
+
+    number_of_workers = number_of_workers if number_of_workers else os.cpu_count()
+    # Spawned workers do not inherit CUDA or thread pool state of the parent process
+    with ProcessPoolExecutor(max_workers=number_of_workers, mp_context=get_context('spawn'),
+                             initializer=initialise_worker) as executor:
+        job_futures = [executor.submit(evaluate_job, *job) for job in jobs]
+        results = [result for job_future in job_futures for result in job_future.result()]
+
+    return create_results_table(results, model_specifications)
+
+
+def create_results_table(results, model_specifications):
+    longest_model_name = max([len(model_specification['name']) for model_specification in model_specifications],
+                             default=1)
+    results_type = np.dtype(
+        [('Model', f'U{longest_model_name}'), ('Episode', int), ('Total_reward', np.float64)]
+        + [(field, np.float64) for field in EVALUATION_KPI_FIELDS]
+    )
+    results_table = np.array(results, dtype=results_type)
+    return np.sort(results_table, order=['Model', 'Episode'])
+
+
+def summarise_results_table(results_table):
+    # Mean of the total reward and of every KPI over all evaluated episodes, per model
+    value_fields = ['Total_reward'] + EVALUATION_KPI_FIELDS
+    return {
+        str(model_name): {field: float(np.mean(results_table[field][results_table['Model'] == model_name]))
+                     for field in value_fields}
+        for model_name in np.unique(results_table['Model'])
+    }
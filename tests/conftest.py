@@ -0,0 +1,53 @@
+import os
+import shutil
+import warnings
+
+import pytest
+
+# Gym warns about numpy 2 on import, which is not what these tests are about
+warnings.filterwarnings('ignore', module='gym')
+
+import smart_nanogrid_gym.envs.smart_nanogrid_environment as smart_nanogrid_environment
+from smart_nanogrid_gym.envs import SmartNanogridEnv
+from smart_nanogrid_gym.utils import io_manager, pv_system_manager, shared_datasets
+
+PACKAGE_FILES_DIRECTORY_PATH = os.path.join(os.path.dirname(__file__), '..', 'smart_nanogrid_gym', 'files')
+
+
+@pytest.fixture
+def files_directory(tmp_path, monkeypatch):
+    # Data files are copied to a temporary directory, which also receives every file written by the environment, so
+    # tests never touch the package files and do not depend on the Windows style separators of the configured paths
+    data_files_directory = tmp_path / 'files'
+    shutil.copytree(PACKAGE_FILES_DIRECTORY_PATH, data_files_directory)
+    solvers_files_directory = tmp_path / 'solvers'
+    solvers_files_directory.mkdir()
+
+    for module in [io_manager, pv_system_manager, shared_datasets]:
+        monkeypatch.setattr(module, 'data_files_directory_path', str(data_files_directory) + os.sep)
+    monkeypatch.setattr(smart_nanogrid_environment, 'solvers_files_directory_path',
+                        str(solvers_files_directory) + os.sep)
+
+    io_manager.clear_initial_values_cache()
+    shared_datasets.detach_shared_datasets()
+    yield data_files_directory
+    io_manager.clear_initial_values_cache()
+    shared_datasets.detach_shared_datasets()
+
+
+@pytest.fixture
+def environment_configuration():
+    # Small nanogrid without PV system and battery, which writes nothing unless a test enables logging
+    def create_environment_configuration(**configuration):
+        return {'number_of_chargers': 4, 'time_interval': '1h', 'charging_mode': 'bounded',
+                'vehicle_uncharged_penalty_mode': 'dense', 'environment_mode': 'training', 'algorithm_used': 'PPO',
+                'logging_policy': 'off', 'asynchronous_writing': False, 'pv_system_available_in_model': False,
+                'battery_system_available_in_model': False, **configuration}
+    return create_environment_configuration
+
+
+@pytest.fixture
+def create_environment(files_directory, environment_configuration):
+    def create_configured_environment(**configuration):
+        return SmartNanogridEnv(**environment_configuration(**configuration))
+    return create_configured_environment
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils.accountant import Accountant, HOURLY_PRICES_PER_MODEL
+
+
+def test_energy_price_is_built_in_process(files_directory, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    accountant = Accountant()
+    accountant.set_energy_price(5, 4, 0.25)
+
+    # Price days of the model follow each other and start over, with one more day than simulated
+    hourly_prices = np.array(HOURLY_PRICES_PER_MODEL[5])
+    expected_energy_price = np.repeat(hourly_prices[[0, 1, 2, 3, 0]], 4, axis=1).reshape(1, -1)
+    assert np.array_equal(accountant.energy_price, expected_energy_price)
+    assert accountant.get_energy_price_at_time_t(4 * 24) == hourly_prices[1, 0]
+
+    assert not list(files_directory.glob('*.dataset.npy'))
+    assert not list(tmp_path.glob('*.dataset.npy'))
+
+
+LOW_TARIFF = 0.013333333 + 0.087613333 + 0.014
+HIGH_TARIFF = 0.028 + 0.148933333 + 0.014
+# Hourly price days of the baseline get_price_day, model 5 filled in these four rows but indexed an empty list
+BASELINE_PRICE_DAYS = {
+    0: [[LOW_TARIFF] * 7 + [HIGH_TARIFF] * 13 + [LOW_TARIFF] * 4],
+    1: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05, 0.05]],
+    2: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06,
+         0.05, 0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05]],
+    3: [[0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
+         0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070]],
+    4: [[0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1]],
+    5: [[0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.1, 0.1, 0.1, 0.1, 0.05, 0.05, 0.05],
+        [0.05, 0.05, 0.05, 0.05, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1, 0.1, 0.1, 0.08, 0.06, 0.05,
+         0.05, 0.05, 0.06, 0.06, 0.06, 0.06, 0.05, 0.05, 0.05],
+        [0.071, 0.060, 0.056, 0.056, 0.056, 0.060, 0.060, 0.060, 0.066, 0.066, 0.076, 0.080,
+         0.080, 0.1, 0.1, 0.076, 0.076, 0.1, 0.082, 0.080, 0.085, 0.079, 0.086, 0.070],
+        [0.1, 0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.08, 0.08, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1,
+         0.1, 0.06, 0.06, 0.06, 0.1, 0.1, 0.1, 0.1]]
+}
+
+
+def get_expected_energy_price(price_model, number_of_days, time_interval):
+    # Price of every timestep is the mean of the hourly prices of the minutes it covers, days of the model cycle
+    timestep_in_minutes = round(60 * time_interval)
+    price_days = BASELINE_PRICE_DAYS[price_model]
+    energy_price = []
+    for day in range(number_of_days + 1):
+        hourly_prices = price_days[day % len(price_days)]
+        for timestep in range(24 * 60 // timestep_in_minutes):
+            minutes = range(timestep * timestep_in_minutes, (timestep + 1) * timestep_in_minutes)
+            energy_price.append(np.mean([hourly_prices[minute // 60] for minute in minutes]))
+    return np.array([energy_price])
+
+
+@pytest.mark.parametrize('price_model', [0, 1, 2, 3, 4])
+def test_hourly_energy_price_matches_baseline(price_model):
+    # Baseline set_energy_price of a single day, which was only correct for hourly timesteps
+    baseline_price_day = np.array(BASELINE_PRICE_DAYS[price_model][0])
+    accountant = Accountant()
+    accountant.set_energy_price(price_model, 1, 1.0)
+
+    assert np.allclose(accountant.energy_price, np.concatenate([baseline_price_day, baseline_price_day]).reshape(1, -1))
+    assert accountant.energy_price_max == pytest.approx(baseline_price_day.max())
+
+
+@pytest.mark.parametrize('time_interval', [5 / 60, 0.25, 0.5, 0.75, 1.0, 2.0, 3.0])
+@pytest.mark.parametrize('price_model', [0, 1, 2, 3, 4, 5])
+def test_energy_price_is_resampled_for_every_model(price_model, time_interval):
+    accountant = Accountant()
+    accountant.set_energy_price(price_model, 6, time_interval)
+
+    expected_energy_price = get_expected_energy_price(price_model, 6, time_interval)
+    assert accountant.energy_price.shape == (1, 7 * round(24 / time_interval))
+    assert np.allclose(accountant.energy_price, expected_energy_price)
+    assert np.allclose(accountant.get_normalised_energy_price_in_range(0, expected_energy_price.shape[1]),
+                       expected_energy_price[0] / expected_energy_price.max())
+
+
+def test_price_model_five_cycles_through_four_days():
+    accountant = Accountant()
+    accountant.set_energy_price(5, 6, 0.5)
+
+    price_days = accountant.energy_price.reshape(7, 48)
+    assert all(np.array_equal(price_days[day], np.repeat(BASELINE_PRICE_DAYS[5][day % 4], 2)) for day in range(7))
+    assert not np.array_equal(price_days[0], price_days[1])
+
+
+def test_unknown_price_model_and_uneven_time_interval_are_rejected():
+    accountant = Accountant()
+    with pytest.raises(ValueError):
+        accountant.set_energy_price(6, 1, 1.0)
+    with pytest.raises(ValueError):
+        accountant.set_energy_price(1, 1, 7 / 60)
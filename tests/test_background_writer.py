@@ -0,0 +1,64 @@
+from threading import Event, Thread
+
+import pytest
+
+from smart_nanogrid_gym.utils.background_writer import BackgroundWriter
+
+
+def fail_writing(message):
+    raise OSError(message)
+
+
+def test_writes_are_done_in_submission_order():
+    writer = BackgroundWriter(2)
+    written_values = []
+    writing_allowed = Event()
+
+    writer.submit(writing_allowed.wait)
+    for value in range(2):
+        writer.submit(written_values.append, value)
+
+    # A full queue blocks the caller until the writer takes the next task
+    blocked_submit = Thread(target=writer.submit, args=(written_values.append, 2))
+    blocked_submit.start()
+    blocked_submit.join(timeout=0.1)
+    assert blocked_submit.is_alive()
+    assert written_values == []
+
+    writing_allowed.set()
+    blocked_submit.join()
+    writer.flush()
+    assert written_values == [0, 1, 2]
+
+    writer.submit(written_values.append, 3)
+    writer.close()
+    assert written_values == [0, 1, 2, 3]
+    assert not writer.writer_thread.is_alive()
+
+
+def test_write_error_is_raised_by_caller():
+    writer = BackgroundWriter(4)
+    written_values = []
+
+    writer.submit(fail_writing, 'disk full')
+    writer.submit(written_values.append, 0)
+    with pytest.raises(OSError, match='disk full'):
+        writer.flush()
+    # Writes after a failed one are skipped until the error is raised
+    assert written_values == []
+
+    writer.submit(written_values.append, 1)
+    writer.flush()
+    assert written_values == [1]
+
+    writer.submit(fail_writing, 'disk removed')
+    with pytest.raises(OSError, match='disk removed'):
+        writer.close()
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.submit(written_values.append, 2)
+
+
+def test_queue_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        BackgroundWriter(0)
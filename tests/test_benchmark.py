@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.benchmark import create_benchmark_environment, limit_vehicle_discharging, run_random_policy
+
+
+@pytest.mark.parametrize('variant_name', ['v2x', 'v2x-b-pv'])
+def test_random_policy_never_discharges_more_than_is_charged(files_directory, variant_name):
+    env = create_benchmark_environment(variant_name, 8, '1h')
+    env.reset(seed=0)
+    random_generator = np.random.default_rng(0)
+
+    discharging_vehicles = 0
+    for _ in range(5 * env.TOTAL_TIMESTEPS):
+        action = random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32)
+        limit_vehicle_discharging(env, action)
+        _, _, terminated, _, _ = env.step(action)
+
+        power_values = env.central_management_system.charging_station.get_charger_power_values()
+        assert power_values.sum() >= 0
+        discharging_vehicles += (power_values < 0).sum()
+        if terminated:
+            env.reset()
+
+    # Limiting keeps the vehicle to everything path in use
+    assert discharging_vehicles > 0
+    assert run_random_policy(env, env.TOTAL_TIMESTEPS, random_generator) > 0
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+
+def forward_fill_arrival_state_of_charge(initial_values):
+    # Without charging actions a vehicle keeps its arrival state of charge until it departs
+    occupancy = initial_values['Charger_occupancy']
+    expected_state_of_charge = np.zeros_like(occupancy)
+    for charger_index, charger_arrivals in enumerate(initial_values['Arrivals']):
+        for arrival in charger_arrivals:
+            present_timesteps = np.flatnonzero(occupancy[charger_index, arrival:] == 0)
+            departure = arrival + present_timesteps[0] if len(present_timesteps) else occupancy.shape[1]
+            expected_state_of_charge[charger_index, arrival:departure] = initial_values['SOC'][charger_index, arrival]
+    return expected_state_of_charge
+
+
+@pytest.mark.parametrize('time_interval', ['15min', '1h', '2h'])
+def test_ring_buffer_matches_whole_scenario_for_multiple_days(create_environment, time_interval):
+    env = create_environment(number_of_days=3, time_interval=time_interval)
+    env.reset(seed=7)
+    charging_station = env.central_management_system.charging_station
+    scenario = charging_station.scenario_generator.fill_scenarios(charging_station.scenario_vehicles[np.newaxis])[0]
+    assert charging_station.BUFFER_COLUMNS < charging_station.array_columns
+
+    random_generator = np.random.default_rng(7)
+    for timestep in range(env.TOTAL_TIMESTEPS):
+        env.step(random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32))
+        # Blocks are filled when their first timestep is simulated, so the column holds the simulated timestep
+        column = charging_station.get_buffer_column(timestep)
+        assert np.array_equal(charging_station.occupancy[:, column], scenario['Charger_occupancy'][:, timestep])
+        assert np.array_equal(charging_station.is_arrival[:, column], scenario['Is_arrival'][:, timestep])
+        assert np.array_equal(charging_station.vehicle_capacities[:, column],
+                              scenario['Vehicle_capacities'][:, timestep])
+        assert np.array_equal(charging_station.time_until_departure[:, column],
+                              scenario['Time_until_departure'][:, timestep])
+
+
+@pytest.mark.parametrize('time_interval', ['15min', '1h', '2h'])
+def test_saved_state_of_charge_covers_all_days_in_timestep_order(files_directory, create_environment, time_interval):
+    env = create_environment(number_of_days=3, time_interval=time_interval, logging_policy='always',
+                             logging_file_format='npz')
+    env.reset(seed=3)
+    for _ in range(env.TOTAL_TIMESTEPS):
+        env.step(np.zeros(env.action_space.shape, dtype=np.float32))
+    env.close()
+
+    charging_station = env.central_management_system.charging_station
+    with np.load(files_directory / 'prediction_results.npz') as prediction_results:
+        saved_state_of_charge = prediction_results['SOC']
+
+    assert saved_state_of_charge.shape == (charging_station.NUMBER_OF_CHARGERS, charging_station.array_columns)
+    assert np.array_equal(saved_state_of_charge,
+                          forward_fill_arrival_state_of_charge(charging_station.generated_initial_values))
+    # Vehicles of the first day are part of the saved episode, even though the ring buffer no longer holds them
+    assert saved_state_of_charge[:, :charging_station.TIMESTEPS_PER_DAY].any()
+
+
+def charge_or_discharge_baseline_vehicle(action, state_of_charge, capacity, time_interval):
+    # Per charger charging of an occupied charger, which the vectorized station charging replaced, returns power,
+    # next state of charge, overcharging and over-discharging values
+    max_power, efficiency = 22, 0.95
+    if action == 0:
+        return 0.0, state_of_charge, 0.0, 0.0
+    elif action > 0:
+        charging_power = action * max_power * efficiency
+        calculated_state_of_charge = state_of_charge + (charging_power * time_interval) / capacity
+        overcharging_value = np.floor(0.5 * (1 + np.sign(calculated_state_of_charge - 1))) * max_power
+        return charging_power, min(calculated_state_of_charge, 1.0), overcharging_value, 0.0
+    else:
+        discharging_power = action * max_power * efficiency
+        calculated_state_of_charge = state_of_charge + (discharging_power * time_interval) / capacity
+        over_discharging_value = np.ceil(0.5 * (1 + np.sign(calculated_state_of_charge))) * max_power
+        if over_discharging_value:
+            discharging_power = -(state_of_charge * capacity) / time_interval
+        return discharging_power, max(0.0, calculated_state_of_charge), 0.0, over_discharging_value
+
+
+@pytest.mark.parametrize('time_interval', ['15min', '1h'])
+def test_vectorized_charging_matches_per_charger_charging(create_environment, time_interval):
+    env = create_environment(number_of_chargers=10, time_interval=time_interval)
+    env.reset(seed=4)
+    charging_station = env.central_management_system.charging_station
+    random_generator = np.random.default_rng(4)
+
+    for timestep in range(env.TOTAL_TIMESTEPS):
+        actions = random_generator.uniform(-1, 1, 10)
+        actions[random_generator.random(10) < 0.2] = 0.0
+        occupied, state_of_charge, capacity = charging_station.get_connected_vehicles(timestep)
+        expected_values = [charge_or_discharge_baseline_vehicle(actions[charger_index], state_of_charge[charger_index],
+                                                                capacity[charger_index], env.TIME_INTERVAL)
+                           if occupied[charger_index] else (0.0, None, 0.0, 0.0)
+                           for charger_index in range(10)]
+        expected_power_values = np.array([values[0] for values in expected_values])
+
+        total_charging_power, total_discharging_power = charging_station.simulate_vehicle_charging(
+            actions, timestep, env.TIME_INTERVAL)
+
+        column = charging_station.get_buffer_column(timestep)
+        assert np.allclose(charging_station.get_charger_power_values(), expected_power_values)
+        assert np.allclose(charging_station.vehicle_state_of_charge[occupied, column],
+                           [values[1] for values, is_occupied in zip(expected_values, occupied) if is_occupied])
+        assert np.array_equal(charging_station.get_vehicles_overcharging_value_per_charger(),
+                              [values[2] for values in expected_values])
+        assert np.array_equal(charging_station.get_vehicles_over_discharging_value_per_charger(),
+                              [values[3] for values in expected_values])
+        assert np.array_equal(charging_station.get_charging_non_existent_vehicles(),
+                              np.where(~occupied & (actions != 0), 100, 0))
+        assert total_charging_power == pytest.approx(expected_power_values[expected_power_values > 0].sum())
+        assert total_discharging_power == pytest.approx(expected_power_values[expected_power_values < 0].sum())
+
+
+def find_baseline_departure_time(charger_departures, timestep):
+    # Scan of the departure list, which the departure tables replaced
+    for departure_time in charger_departures:
+        if timestep <= departure_time:
+            return departure_time - timestep
+    return 0
+
+
+@pytest.mark.parametrize('time_interval', ['15min', '1h', '2h'])
+@pytest.mark.parametrize('penalty_mode', ['on_departure', 'sparse', 'dense'])
+def test_departure_tables_match_departure_lists(create_environment, time_interval, penalty_mode):
+    env = create_environment(number_of_chargers=10, time_interval=time_interval,
+                             vehicle_uncharged_penalty_mode=penalty_mode)
+    env.reset(seed=6)
+    charging_station = env.central_management_system.charging_station
+    departures = charging_station.departures
+
+    for timestep in range(env.TOTAL_TIMESTEPS):
+        occupied = charging_station.occupancy[:, charging_station.get_buffer_column(timestep)] == 1
+        departing = np.array([timestep + 1 in charger_departures for charger_departures in departures])
+        departing_in_next_timesteps = np.array([any(timestep + n in charger_departures for n in (1, 2, 3))
+                                                for charger_departures in departures])
+        expected_departure_times = [find_baseline_departure_time(charger_departures, timestep) if is_occupied else 0
+                                    for charger_departures, is_occupied in zip(departures, occupied)]
+        expected_penalty_check_vehicles = occupied & {'on_departure': departing,
+                                                      'sparse': departing_in_next_timesteps,
+                                                      'dense': np.ones(10, dtype=bool)}[penalty_mode]
+
+        charging_station.calculate_departure_times(timestep)
+        charging_station.find_vehicles_for_penalty_check(timestep, env.TIME_INTERVAL)
+        charging_station.find_departing_vehicles(timestep, env.TIME_INTERVAL)
+
+        assert np.array_equal(charging_station.departure_times, expected_departure_times)
+        assert np.array_equal(charging_station.get_info_for_penalisation()['penalty_check_vehicles'],
+                              expected_penalty_check_vehicles)
+        assert np.array_equal(charging_station.get_all_departing_vehicles(), np.flatnonzero(occupied & departing))
+        for charger_index in range(10):
+            assert charging_station.check_is_vehicle_departing(charger_index, timestep) == \
+                (occupied[charger_index] and departing[charger_index])
+            assert charging_station.check_is_vehicle_departing_in_next_n_timesteps(charger_index, timestep, 3) == \
+                (occupied[charger_index] and departing_in_next_timesteps[charger_index])
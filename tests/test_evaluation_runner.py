@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+from numpy.random import SeedSequence
+
+# The runner loads trained models, so it is only importable with the training dependencies installed
+pytest.importorskip('torch')
+pytest.importorskip('stable_baselines3')
+
+SOLVERS_DIRECTORY_PATH = os.path.join(os.path.dirname(__file__), '..', 'solvers')
+
+
+class ChargingRateModel:
+    # Deterministic stand-in for a trained policy, which charges by the vehicle states at the end of the observation,
+    # so the same observation gets the same actions, no matter if it is predicted alone or in a batch
+    def __init__(self, env):
+        self.action_size = env.action_space.shape[-1]
+
+    @classmethod
+    def load(cls, path, env, device):
+        return cls(env)
+
+    def predict(self, obs, deterministic=True):
+        return np.clip(1.0 - obs[..., -self.action_size:], 0.0, 1.0).astype(np.float32), None
+
+
+@pytest.fixture
+def evaluation_runner(files_directory, monkeypatch):
+    monkeypatch.syspath_prepend(SOLVERS_DIRECTORY_PATH)
+    import evaluation_runner
+
+    monkeypatch.setitem(evaluation_runner.ALGORITHMS, 'PPO', ChargingRateModel)
+    monkeypatch.setattr(evaluation_runner, '_worker_models', {})
+    return evaluation_runner
+
+
+@pytest.mark.parametrize('number_of_batched_episodes', [3, 4])
+def test_batched_evaluation_matches_sequential_evaluation(evaluation_runner, number_of_batched_episodes):
+    # Battery state of charge is kept between sequential episodes, so the compared variant has no battery
+    model_specification = evaluation_runner.create_model_specification('PPO_basic', 'PPO_basic.zip', 4,
+                                                                       time_interval='1h', charging_mode='bounded',
+                                                                       vehicle_uncharged_penalty_mode='sparse')
+    episode_indices = [0, 1, 2]
+    episode_seeds = SeedSequence(5).spawn(3)
+
+    sequential_results = evaluation_runner.evaluate_episodes(model_specification, episode_indices, episode_seeds)
+    batched_results = evaluation_runner.evaluate_batched_episodes(model_specification, episode_indices, episode_seeds,
+                                                                  number_of_batched_episodes)
+
+    assert len(batched_results) == len(sequential_results) == 3
+    for batched_result, sequential_result in zip(batched_results, sequential_results):
+        assert batched_result[:2] == sequential_result[:2]
+        assert np.allclose(batched_result[2:], sequential_result[2:])
+    assert len({result[2] for result in sequential_results}) == 3
+
+    results_table = evaluation_runner.create_results_table(batched_results, [model_specification])
+    assert evaluation_runner.summarise_results_table(results_table)['PPO_basic']['Total_reward'] == \
+        pytest.approx(np.mean([result[2] for result in sequential_results]))
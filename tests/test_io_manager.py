@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils.io_manager import IOManager, SCHEMA_VERSION, read_initial_values, \
+    read_prediction_results, read_cached_initial_values, clear_initial_values_cache
+
+
+def run_episodes(env, number_of_episodes, seed=0):
+    random_generator = np.random.default_rng(seed)
+    env.reset(seed=seed)
+    total_costs = []
+    for _ in range(number_of_episodes):
+        for _ in range(env.TOTAL_TIMESTEPS):
+            env.step(random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32))
+        total_costs.append(env.episode_recorder.get_records()['Total_cost'].copy())
+        env.reset()
+    return total_costs
+
+
+def test_last_only_policy_writes_last_episode_on_closing(files_directory, create_environment):
+    env = create_environment(logging_policy='last_only')
+    total_costs = run_episodes(env, 3)
+    assert not list(files_directory.glob('*.npz'))
+
+    last_initial_values = env.central_management_system.charging_station.generated_initial_values
+    env.close()
+
+    prediction_results = read_prediction_results(str(files_directory / 'prediction_results.npz'))
+    assert np.array_equal(prediction_results['Total_cost'], total_costs[-1])
+    # Initial values of the episode started by the last reset are written once as well
+    initial_values_file_paths = list(files_directory.glob('*initial_values.npz'))
+    assert len(initial_values_file_paths) == 1
+    initial_values = read_initial_values(str(initial_values_file_paths[0]))
+    assert np.array_equal(initial_values['SOC'], last_initial_values['SOC'])
+    assert initial_values['Arrivals'] == last_initial_values['Arrivals']
+
+
+@pytest.mark.parametrize('logging_policy, logged_episodes', [('off', 0), ('every_n_episodes', 2), ('always', 4)])
+def test_initial_values_are_written_for_logged_episodes_only(create_environment, logging_policy, logged_episodes):
+    env = create_environment(logging_policy=logging_policy, logging_frequency=2)
+    logged_episode_logs = []
+    env.io_manager.save_episode = logged_episode_logs.append
+    written_initial_values = []
+    env.io_manager.write_generated_initial_values = written_initial_values.append
+
+    run_episodes(env, 4)
+    env.close()
+
+    assert len(logged_episode_logs) == logged_episodes
+    # Initial values of the fifth episode are written by the last reset with the always policy
+    assert len(written_initial_values) == logged_episodes + int(logging_policy == 'always')
+
+
+def test_replayed_initial_values_are_the_generated_ones(files_directory, create_environment):
+    env = create_environment()
+    env.reset(seed=5)
+    charging_station = env.central_management_system.charging_station
+    generated_initial_values = charging_station.generated_initial_values
+
+    env.reset(generate_new_initial_values=False)
+    assert charging_station.arrivals == generated_initial_values['Arrivals']
+    assert np.array_equal(charging_station.generated_initial_values['SOC'], generated_initial_values['SOC'])
+    assert not list(files_directory.glob('*initial_values.npz'))
+
+
+@pytest.mark.parametrize('file_format', ['npz', 'json'])
+def test_written_initial_values_are_read_back(files_directory, file_format):
+    io_manager = IOManager('off', 1, file_format, asynchronous_writing=False)
+    # Chargers have a different number of vehicles, one charger has none at all
+    initial_values = {'SOC': np.array([[0.2, 0.0, 0.4], [0.0, 0.0, 0.0], [0.5, 0.6, 0.0]]),
+                      'Arrivals': [[0, 2], [], [0]], 'Departures': [[1, 3], [], [2]]}
+    io_manager.write_initial_values(str(files_directory / 'initial_values'), initial_values)
+
+    read_values = read_initial_values(str(files_directory / f'initial_values.{file_format}'))
+    assert read_values.keys() == initial_values.keys()
+    assert np.array_equal(read_values['SOC'], initial_values['SOC'])
+    assert read_values['Arrivals'] == initial_values['Arrivals']
+    assert read_values['Departures'] == initial_values['Departures']
+
+
+def test_npz_and_json_prediction_results_are_read_alike(files_directory, create_environment):
+    env = create_environment(logging_policy='last_only')
+    run_episodes(env, 1)
+    episode_log = env.io_manager.pending_episode_log
+    env.io_manager.pending_episode_log = None
+    prediction_results = env.io_manager.collect_prediction_results(episode_log)
+
+    for file_format in ['npz', 'json']:
+        io_manager = IOManager('off', 1, file_format, asynchronous_writing=False)
+        io_manager.write_prediction_results([str(files_directory / 'prediction_results')], prediction_results)
+        read_results = read_prediction_results(str(files_directory / f'prediction_results.{file_format}'))
+
+        assert read_results.keys() == prediction_results.keys()
+        for key, value in prediction_results.items():
+            assert np.allclose(read_results[key], value), key
+
+
+@pytest.mark.parametrize('file_format', ['npz', 'json'])
+def test_cached_initial_values_are_reloaded_when_file_changes(files_directory, file_format):
+    io_manager = IOManager('off', 1, file_format, asynchronous_writing=False)
+    file_path_root = str(files_directory / 'initial_values')
+    file_path = f'{file_path_root}.{file_format}'
+    io_manager.write_initial_values(file_path_root, {'SOC': np.array([[0.2, 0.4]]), 'Arrivals': [[0]],
+                                                     'Departures': [[2]]})
+    clear_initial_values_cache(file_path)
+
+    initial_values = read_cached_initial_values(file_path)
+    assert read_cached_initial_values(file_path) is initial_values
+    assert initial_values['Arrivals'] == [[0]]
+    with pytest.raises(ValueError):
+        initial_values['SOC'][0, 0] = 1.0
+
+    # A changed modification time invalidates the cache, even if the content is the same
+    modification_time = os.stat(file_path).st_mtime_ns + 10 ** 9
+    os.utime(file_path, ns=(modification_time, modification_time))
+    touched_initial_values = read_cached_initial_values(file_path)
+    assert touched_initial_values is not initial_values
+    assert np.array_equal(touched_initial_values['SOC'], initial_values['SOC'])
+
+    # So does a changed size, even if the modification time is kept
+    io_manager.write_initial_values(file_path_root, {'SOC': np.array([[0.2, 0.4, 0.6]]), 'Arrivals': [[0, 2]],
+                                                     'Departures': [[2, 3]]})
+    os.utime(file_path, ns=(modification_time, modification_time))
+    rewritten_initial_values = read_cached_initial_values(file_path)
+    assert np.array_equal(rewritten_initial_values['SOC'], [[0.2, 0.4, 0.6]])
+    assert rewritten_initial_values['Arrivals'] == [[0, 2]]
+    assert not rewritten_initial_values['SOC'].flags.writeable
+    clear_initial_values_cache(file_path)
+
+
+@pytest.mark.parametrize('schema_version', [None, SCHEMA_VERSION + 1])
+def test_unsupported_schema_version_is_rejected(files_directory, schema_version):
+    file_path = str(files_directory / 'initial_values.npz')
+    versions = {} if schema_version is None else {'Schema_version': schema_version}
+    np.savez_compressed(file_path, SOC=np.zeros((2, 3)), **versions)
+
+    with pytest.raises(ValueError):
+        read_initial_values(file_path)
+    with pytest.raises(ValueError):
+        read_prediction_results(file_path)
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils.penaliser import Penaliser
+
+NUMBER_OF_CHARGERS = 10
+END_STATE_OF_CHARGE_MARGIN_RATIO = 0.05
+
+
+def penalise_baseline_state_of_charge_outside_margin(requested_soc, current_soc):
+    # Per vehicle check, which the vectorized penalties replaced, returns insufficiency and needless charging penalties
+    lower_charged_state_margin = END_STATE_OF_CHARGE_MARGIN_RATIO * requested_soc
+    upper_charged_state_margin = lower_charged_state_margin
+
+    if requested_soc == 1.0:
+        upper_charged_state_margin = 0.0
+
+    if current_soc < requested_soc - lower_charged_state_margin:
+        return ((requested_soc - current_soc) * 10) ** 2, 0.0
+    elif requested_soc + upper_charged_state_margin < current_soc:
+        return 0.0, ((requested_soc - current_soc) * 10) ** 2
+    return 0.0, 0.0
+
+
+def get_states_of_charge(random_generator, shape):
+    requested_soc = random_generator.uniform(0.2, 1.0, shape)
+    requested_soc[random_generator.random(shape) < 0.3] = 1.0
+    current_soc = random_generator.uniform(0.0, 1.0, shape)
+    # Some vehicles are exactly on or just outside the margins
+    margin = END_STATE_OF_CHARGE_MARGIN_RATIO * requested_soc
+    edge_values = [requested_soc - margin, requested_soc + margin, requested_soc, requested_soc + 1e-9,
+                   requested_soc - margin - 1e-9]
+    for edge_value in edge_values:
+        is_edge_value = random_generator.random(shape) < 0.1
+        current_soc[is_edge_value] = edge_value[is_edge_value]
+    return requested_soc, current_soc
+
+
+@pytest.mark.parametrize('shape', [(NUMBER_OF_CHARGERS,), (4, NUMBER_OF_CHARGERS)])
+def test_vectorized_penalties_match_per_vehicle_penalties(shape):
+    random_generator = np.random.default_rng(0)
+    penaliser = Penaliser(NUMBER_OF_CHARGERS)
+    for _ in range(50):
+        requested_soc, current_soc = get_states_of_charge(random_generator, shape)
+        penalty_check_vehicles = random_generator.random(shape) < 0.7
+
+        insufficiency_penalties, needless_charging_penalties = penaliser.calculate_state_of_charge_penalties(
+            requested_soc, current_soc, penalty_check_vehicles)
+
+        for index in np.ndindex(shape):
+            expected_penalties = (0.0, 0.0)
+            if penalty_check_vehicles[index]:
+                expected_penalties = penalise_baseline_state_of_charge_outside_margin(requested_soc[index],
+                                                                                      current_soc[index])
+            assert (insufficiency_penalties[index], needless_charging_penalties[index]) == expected_penalties
+
+
+def test_fully_requested_vehicles_have_no_upper_margin():
+    penaliser = Penaliser(3)
+    requested_soc = np.array([1.0, 1.0, 0.8])
+    current_soc = np.array([1.0, 1.01, 0.83])
+
+    insufficiency_penalties, needless_charging_penalties = penaliser.calculate_state_of_charge_penalties(
+        requested_soc, current_soc, np.ones(3, dtype=bool))
+    assert np.array_equal(insufficiency_penalties, np.zeros(3))
+    assert np.array_equal(needless_charging_penalties, [0.0, ((1.0 - 1.01) * 10) ** 2, 0.0])
+
+
+def test_total_vehicle_penalty_sums_checked_vehicles():
+    random_generator = np.random.default_rng(1)
+    penaliser = Penaliser(NUMBER_OF_CHARGERS)
+    requested_end_soc, soc = get_states_of_charge(random_generator, (NUMBER_OF_CHARGERS, 24))
+    penalty_check_vehicles = random_generator.random(NUMBER_OF_CHARGERS) < 0.5
+    arrivals = np.zeros((NUMBER_OF_CHARGERS, 24), dtype=bool)
+
+    penaliser.penalise_charging_vehicles_outside_bounds(5, penalty_check_vehicles, requested_end_soc, soc, arrivals,
+                                                        np.zeros(NUMBER_OF_CHARGERS))
+
+    expected_penalty = sum(penalise_baseline_state_of_charge_outside_margin(requested_end_soc[vehicle, 4],
+                                                                            soc[vehicle, 4])[0]
+                           for vehicle in np.flatnonzero(penalty_check_vehicles))
+    assert penaliser.get_insufficiently_charged_vehicles_penalty() == pytest.approx(expected_penalty)
+
+
+def test_arriving_vehicles_are_penalised_with_their_arrival_state_of_charge():
+    penaliser = Penaliser(2)
+    # The first vehicle arrives at the first column, the second one is already on the charger
+    soc = np.array([[0.3, 0.3, 0.0, 0.95], [0.5, 0.6, 0.7, 0.2]])
+    requested_end_soc = np.array([[0.9, 0.9, 0.0, 0.95], [0.8, 0.8, 0.8, 0.2]])
+    arrivals = np.zeros((2, 4), dtype=bool)
+    arrivals[0, 0] = True
+
+    penaliser.penalise_charging_vehicles_outside_bounds(0, np.ones(2, dtype=bool), requested_end_soc, soc, arrivals,
+                                                        np.zeros(2))
+    assert np.allclose(penaliser.get_insufficiently_charged_vehicle_penalty_per_charger(), [36.0, 0.0])
+
+    penaliser.penalise_charging_vehicles_outside_bounds(2, np.ones(2, dtype=bool), requested_end_soc, soc, arrivals,
+                                                        np.zeros(2))
+    assert np.allclose(penaliser.get_insufficiently_charged_vehicle_penalty_per_charger(), [36.0, 4.0])
+
+
+def test_dense_penalty_of_first_step_uses_arrival_state_of_charge(create_environment):
+    env = create_environment(number_of_chargers=10, vehicle_uncharged_penalty_mode='dense')
+    env.reset(seed=2)
+    charging_station = env.central_management_system.charging_station
+    initial_values = charging_station.generated_initial_values
+
+    arrival_table = np.zeros_like(charging_station.is_arrival)
+    for charger_index, charger_arrivals in enumerate(initial_values['Arrivals']):
+        arrival_table[charger_index, list(charger_arrivals)] = True
+    assert np.array_equal(charging_station.build_arrival_table(), arrival_table)
+    arriving = arrival_table[:, 0]
+    assert arriving.any()
+
+    env.step(np.zeros(env.action_space.shape, dtype=np.float32))
+
+    requested_soc = np.asarray(initial_values['Requested_SOC'])[:, 0]
+    soc = np.asarray(initial_values['SOC'])[:, 0]
+    expected_penalties = [penalise_baseline_state_of_charge_outside_margin(requested_soc[charger_index],
+                                                                           soc[charger_index])[0]
+                          if arriving[charger_index] else 0.0 for charger_index in range(10)]
+    penaliser = env.central_management_system.penaliser
+    assert np.allclose(penaliser.get_insufficiently_charged_vehicle_penalty_per_charger(), expected_penalties)
+    assert np.array_equal(penaliser.get_insufficiently_charged_vehicle_penalty_per_charger() > 0, arriving)
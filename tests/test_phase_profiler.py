@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils import phase_profiler
+from smart_nanogrid_gym.utils.phase_profiler import PhaseProfiler
+
+
+def test_durations_fall_into_power_of_two_buckets(monkeypatch):
+    profiler = PhaseProfiler()
+    durations = [0, 1, 3, 4, 1000, 1023, 1024, 2 ** 50]
+    for duration in durations:
+        monkeypatch.setattr(phase_profiler, 'perf_counter_ns', lambda: 10 ** 18 + duration)
+        assert profiler.record('phase', 10 ** 18) == 10 ** 18 + duration
+
+    profile = profiler.get_profile()['phase']
+    assert profile['count'] == len(durations)
+    assert profile['total_time'] == pytest.approx(sum(durations) * 1e-9)
+    assert profile['mean_time'] == pytest.approx(sum(durations) / len(durations) * 1e-9)
+    assert profile['min_time'] == 0
+    assert profile['max_time'] == pytest.approx(2 ** 50 * 1e-9)
+    # Buckets are given by their exclusive upper bound, durations beyond the last bucket are counted in it
+    expected_histogram = {1: 1, 2: 1, 4: 1, 8: 1, 1024: 2, 2048: 1, 2 ** (PhaseProfiler.NUMBER_OF_BUCKETS - 1): 1}
+    assert profile['histogram'] == {upper_bound * 1e-9: count for upper_bound, count in expected_histogram.items()}
+
+    profiler.reset()
+    assert profiler.get_profile() == {}
+
+
+@pytest.mark.parametrize('enable_profiling', [True, False])
+def test_profile_is_only_reported_at_the_end_of_an_episode(create_environment, enable_profiling):
+    env = create_environment(enable_profiling=enable_profiling)
+    for _ in range(2):
+        env.reset(seed=1)
+        env.reset_profile()
+        for timestep in range(env.TOTAL_TIMESTEPS):
+            _, _, done, _, info = env.step(np.zeros(env.action_space.shape, dtype=np.float32))
+            assert done == (timestep == env.TOTAL_TIMESTEPS - 1)
+            assert ('profile' in info) == (done and enable_profiling)
+
+    if enable_profiling:
+        assert info['profile']['vehicle_charging']['count'] == env.TOTAL_TIMESTEPS
+        assert info['profile'] == env.get_profile()
+    else:
+        assert env.get_profile() == {}
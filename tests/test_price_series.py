@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils.price_series import PriceSeries, get_price_series_cache_file_path
+
+SERIES_START = np.datetime64('2023-01-01T06:00')
+SERIES_INTERVAL = np.timedelta64(15, 'm')
+NUMBER_OF_SERIES_VALUES = 18 * 4 + 4 * 96
+
+
+def write_price_series_csv(file_path, header=True, price_offset=0.0):
+    # Series starts in the morning, so the first whole day starts on the second of January
+    lines = ['timestamp,price'] if header else []
+    for index in range(NUMBER_OF_SERIES_VALUES):
+        timestamp = str(SERIES_START + index * SERIES_INTERVAL).replace('T', ' ')
+        lines.append(f'{timestamp},{index + price_offset}')
+    file_path.write_text('\n'.join(lines) + '\n')
+    return str(file_path)
+
+
+@pytest.mark.parametrize('header', [True, False])
+def test_csv_is_converted_once_into_npy_file(tmp_path, header):
+    csv_file_path = write_price_series_csv(tmp_path / 'prices.csv', header)
+    price_series = PriceSeries(csv_file_path, 1, 0.25)
+
+    npy_file_path = get_price_series_cache_file_path(csv_file_path)
+    assert npy_file_path == str(tmp_path / 'prices.prices.npy')
+    assert os.path.exists(npy_file_path)
+    assert price_series.timestamps[0] == SERIES_START
+    assert np.array_equal(price_series.prices, np.arange(NUMBER_OF_SERIES_VALUES))
+
+    # The npy file is reused as long as it is newer than the csv file
+    conversion_time = os.path.getmtime(npy_file_path) - 10
+    os.utime(csv_file_path, (conversion_time, conversion_time))
+    os.utime(npy_file_path, (conversion_time + 1, conversion_time + 1))
+    PriceSeries(csv_file_path, 1, 0.25)
+    assert os.path.getmtime(npy_file_path) == conversion_time + 1
+
+    write_price_series_csv(tmp_path / 'prices.csv', header, price_offset=1.0)
+    os.utime(csv_file_path, (conversion_time + 2, conversion_time + 2))
+    price_series = PriceSeries(csv_file_path, 1, 0.25)
+    assert price_series.prices[0] == 1.0
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_days_are_indexed_from_midnight(tmp_path):
+    price_series = PriceSeries(write_price_series_csv(tmp_path / 'prices.csv'), 2, 0.25)
+
+    # Episodes of two days can start on all whole days except the last one
+    assert price_series.NUMBER_OF_AVAILABLE_DAYS == 3
+    assert price_series.get_day_timestamp(0) == np.datetime64('2023-01-02T00:00')
+    assert price_series.find_day_index('2023-01-01T07:00') == 0
+    assert price_series.find_day_index('2023-01-03T00:00') == 1
+    assert price_series.find_day_index('2023-01-03T00:15') == 2
+    with pytest.raises(ValueError):
+        price_series.find_day_index('2023-01-04T00:15')
+
+    first_value = 18 * 4 + 96
+    assert np.array_equal(price_series.get_prices(1), np.arange(first_value, first_value + 2 * 96).reshape(1, -1))
+    with pytest.raises(ValueError):
+        price_series.get_prices(3)
+
+
+def test_prices_are_resampled_to_time_interval(tmp_path):
+    csv_file_path = write_price_series_csv(tmp_path / 'prices.csv')
+    series_prices = PriceSeries(csv_file_path, 1, 0.25).get_prices(0)[0]
+
+    hourly_prices = PriceSeries(csv_file_path, 1, 1.0).get_prices(0)
+    assert np.array_equal(hourly_prices, series_prices.reshape(1, -1, 4).mean(axis=2))
+    five_minute_prices = PriceSeries(csv_file_path, 1, 5 / 60).get_prices(0)
+    assert np.array_equal(five_minute_prices, np.repeat(series_prices, 3).reshape(1, -1))
+
+    with pytest.raises(ValueError):
+        PriceSeries(csv_file_path, 1, 0.1)
+    with pytest.raises(ValueError):
+        PriceSeries(csv_file_path, 5, 1.0)
+
+
+def write_local_time_price_series_csv(file_path, first_day, daylight_saving_time_change):
+    # Local time export of three days at 15 minutes, the second day misses or repeats the hour after 2 o'clock
+    timestamps = []
+    for index in range(3 * 96):
+        timestamp = np.datetime64(first_day, 'm') + index * SERIES_INTERVAL
+        is_changed_hour = index // 4 == 24 + 2
+        if is_changed_hour and daylight_saving_time_change == 'missing_hour':
+            continue
+        timestamps.append(timestamp)
+        if is_changed_hour and index % 4 == 3 and daylight_saving_time_change == 'repeated_hour':
+            timestamps.extend(timestamp - np.arange(3, -1, -1) * SERIES_INTERVAL)
+
+    lines = [f"{str(timestamp).replace('T', ' ')},{price}" for price, timestamp in enumerate(timestamps)]
+    file_path.write_text('\n'.join(lines) + '\n')
+    return str(file_path)
+
+
+@pytest.mark.parametrize('daylight_saving_time_change', ['missing_hour', 'repeated_hour'])
+def test_daylight_saving_time_days_are_normalised(tmp_path, daylight_saving_time_change):
+    first_day = '2023-03-25' if daylight_saving_time_change == 'missing_hour' else '2023-10-28'
+    csv_file_path = write_local_time_price_series_csv(tmp_path / 'prices.csv', first_day, daylight_saving_time_change)
+    price_series = PriceSeries(csv_file_path, 1, 0.25)
+
+    assert price_series.NUMBER_OF_AVAILABLE_DAYS == 3
+    assert price_series.get_day_timestamp(1) == np.datetime64(first_day) + np.timedelta64(1, 'D')
+    changed_day_prices = price_series.get_prices(1)[0]
+    assert changed_day_prices.shape == (96,)
+    changed_hour_prices = changed_day_prices[8:12]
+    if daylight_saving_time_change == 'missing_hour':
+        # Prices of the missing hour repeat the last price before it
+        assert np.array_equal(changed_hour_prices, [96 + 7] * 4)
+        assert np.array_equal(changed_day_prices[12:], np.arange(96 + 8, 96 + 92))
+    else:
+        # Prices of the first occurrence of the repeated hour are kept
+        assert np.array_equal(changed_hour_prices, np.arange(96 + 8, 96 + 12))
+        assert np.array_equal(changed_day_prices[12:], np.arange(96 + 16, 96 + 100))
+    assert np.array_equal(price_series.get_prices(2)[0][:4], changed_day_prices[-1] + np.arange(1, 5))
+
+
+def test_gaps_other_than_daylight_saving_time_are_rejected(tmp_path):
+    lines = [f"{str(SERIES_START + index * SERIES_INTERVAL).replace('T', ' ')},{index}"
+             for index in range(NUMBER_OF_SERIES_VALUES) if not 200 <= index < 210]
+    csv_file_path = tmp_path / 'prices.csv'
+    csv_file_path.write_text('\n'.join(lines) + '\n')
+
+    with pytest.raises(ValueError):
+        PriceSeries(str(csv_file_path), 1, 0.25)
+
+
+def test_environment_takes_prices_of_requested_day(create_environment, tmp_path):
+    csv_file_path = write_price_series_csv(tmp_path / 'prices.csv')
+    env = create_environment(price_series_path=csv_file_path)
+
+    _, info = env.reset(seed=1, price_day_index=1)
+    assert info['price_day_index'] == 1
+    assert info['price_day'] == '2023-01-03T00:00'
+
+    # One more day than simulated is taken from the series, like for the price models
+    accountant = env.central_management_system.accountant
+    expected_prices = PriceSeries(csv_file_path, 2, 1.0).get_prices(1)
+    assert np.array_equal(accountant.energy_price, expected_prices)
+    assert accountant.energy_price_max == NUMBER_OF_SERIES_VALUES - 1
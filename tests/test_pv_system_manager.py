@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from scipy.io import loadmat
+
+from smart_nanogrid_gym.utils.pv_system_manager import PVSystemManager
+
+
+def calculate_baseline_solar_irradiance_mean(irradiance_forecast, padded_experiment_length, time_interval):
+    # Per timestep loop over the minute data, which the reshaped mean replaced
+    timestep_in_minutes = int(60 * time_interval)
+    solar_irradiance = np.zeros([1, padded_experiment_length])
+    experiment_length_in_minutes = timestep_in_minutes * padded_experiment_length
+
+    count = 0
+    for interval in range(0, experiment_length_in_minutes, timestep_in_minutes):
+        next_interval = interval + timestep_in_minutes
+        solar_irradiance[0, count] = (np.mean(irradiance_forecast[interval: next_interval]))
+        count = count + 1
+    return solar_irradiance
+
+
+@pytest.mark.parametrize('time_interval', [0.25, 0.75, 1.0, 2.0])
+def test_resampled_irradiance_matches_baseline(files_directory, time_interval):
+    pv_system_manager = PVSystemManager(1, time_interval)
+    irradiance_forecast = loadmat(str(files_directory / 'solar_irradiance.mat'))['irradiance']
+
+    padded_experiment_length = 2 * int(24 / time_interval)
+    expected_irradiance = calculate_baseline_solar_irradiance_mean(irradiance_forecast, padded_experiment_length,
+                                                                   time_interval)
+    assert pv_system_manager.solar_irradiance.shape == (1, padded_experiment_length)
+    assert np.allclose(pv_system_manager.solar_irradiance, expected_irradiance)
+    assert np.allclose(pv_system_manager.get_solar_radiation(), expected_irradiance)
+    expected_max_radiation = expected_irradiance.max()
+    assert pv_system_manager.get_normalized_solar_radiation_at_timestep_t(5) == \
+        pytest.approx(expected_irradiance[0, 5] / expected_max_radiation)
+
+    # Resampled irradiance is built once, another manager of the same time interval reads the same values
+    other_pv_system_manager = PVSystemManager(1, time_interval)
+    assert np.array_equal(other_pv_system_manager.solar_irradiance, pv_system_manager.solar_irradiance)
+    assert not other_pv_system_manager.solar_irradiance.flags.writeable
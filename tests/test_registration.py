@@ -0,0 +1,19 @@
+import gym
+import numpy as np
+
+import smart_nanogrid_gym  # Registers the environment
+
+
+def test_registered_environment_runs_all_days(files_directory):
+    env = gym.make('SmartNanogridEnv-v0', disable_env_checker=True, number_of_days=10, time_interval='1h',
+                   charging_mode='bounded', vehicle_uncharged_penalty_mode='sparse', logging_policy='off')
+    env.reset(seed=0)
+
+    number_of_steps = 0
+    terminated = truncated = False
+    while not (terminated or truncated):
+        _, _, terminated, truncated, _ = env.step(np.zeros(env.action_space.shape, dtype=np.float32))
+        number_of_steps = number_of_steps + 1
+
+    assert terminated and not truncated
+    assert number_of_steps == 10 * 24
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.envs import SmartNanogridVecEnv
+from smart_nanogrid_gym.utils.scenario_bank import ScenarioBank, generate_scenario_bank
+from smart_nanogrid_gym.utils.scenario_generator import get_array_columns
+
+
+def run_episode(env, random_generator):
+    return [env.step(random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32))
+            for _ in range(env.TOTAL_TIMESTEPS)]
+
+
+@pytest.fixture
+def scenario_bank_path(tmp_path):
+    file_path = tmp_path / 'scenario_bank.npy'
+    generate_scenario_bank(str(file_path), 25, number_of_chargers=4, seed=3, days_per_batch=10)
+    return str(file_path)
+
+
+def test_generated_scenario_bank_is_loaded(scenario_bank_path, tmp_path):
+    scenario_bank = ScenarioBank(scenario_bank_path, 4, get_array_columns(1.0))
+    assert scenario_bank.NUMBER_OF_SCENARIOS == 25
+
+    # Scenarios are generated in batches, vehicles arrive on occupied chargers only
+    scenarios = scenario_bank.get_scenarios(np.arange(25))
+    assert scenarios['Charger_occupancy'].any(axis=(1, 2)).all()
+    occupancy, is_arrival = scenarios['Charger_occupancy'], scenarios['Is_arrival']
+    assert not (is_arrival & ~occupancy).any()
+    assert is_arrival[:, :, 1:][occupancy[:, :, 1:] & ~occupancy[:, :, :-1]].all()
+
+    same_seed_path = tmp_path / 'same_seed_scenario_bank.npy'
+    generate_scenario_bank(str(same_seed_path), 25, number_of_chargers=4, seed=3, days_per_batch=10)
+    assert np.load(same_seed_path).tobytes() == np.load(scenario_bank_path).tobytes()
+
+    with pytest.raises(ValueError):
+        scenario_bank.get_scenario(25)
+
+
+def test_scenario_bank_must_match_the_environment(scenario_bank_path, tmp_path):
+    with pytest.raises(ValueError):
+        ScenarioBank(scenario_bank_path, 5, get_array_columns(1.0))
+    with pytest.raises(ValueError):
+        ScenarioBank(scenario_bank_path, 4, get_array_columns(2.0))
+
+    empty_bank_path = tmp_path / 'empty_scenario_bank.npy'
+    generate_scenario_bank(str(empty_bank_path), 0, number_of_chargers=4)
+    with pytest.raises(ValueError):
+        ScenarioBank(str(empty_bank_path), 4, get_array_columns(1.0))
+
+
+def test_requested_scenario_of_the_bank_is_replayed(create_environment, scenario_bank_path):
+    env = create_environment(scenario_bank_path=scenario_bank_path)
+    scenario_bank = ScenarioBank(scenario_bank_path, 4, get_array_columns(1.0))
+
+    observation, info = env.reset(scenario_index=7)
+    assert info['scenario_index'] == 7
+    charging_station = env.central_management_system.charging_station
+    assert np.array_equal(charging_station.scenario['SOC'], scenario_bank.get_scenario(7)['SOC'])
+    rewards = [step[1] for step in run_episode(env, np.random.default_rng(1))]
+
+    env.reset(seed=11)
+    run_episode(env, np.random.default_rng(2))
+    replayed_observation, info = env.reset(scenario_index=7)
+    assert info['scenario_index'] == 7
+    assert np.array_equal(replayed_observation, observation)
+    assert [step[1] for step in run_episode(env, np.random.default_rng(1))] == rewards
+
+    # Without a requested scenario the last one is replayed, unless new initial values are requested
+    _, info = env.reset(generate_new_initial_values=False)
+    assert info['scenario_index'] == 7
+
+
+def test_batched_environment_loads_scenarios_of_the_bank(create_environment, environment_configuration,
+                                                         scenario_bank_path):
+    vec_env = SmartNanogridVecEnv(3, **environment_configuration(scenario_bank_path=scenario_bank_path))
+    vec_env.seed(4)
+    vec_observations = vec_env.reset()
+
+    env = create_environment(scenario_bank_path=scenario_bank_path)
+    for environment_index, scenario_index in enumerate(vec_env.scenario_indices):
+        observation, _ = env.reset(scenario_index=scenario_index)
+        assert np.allclose(observation, vec_observations[environment_index])
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.utils.scenario_generator import ScenarioGenerator, get_array_columns
+
+NUMBER_OF_CHARGERS = 20
+NUMBER_OF_DAYS = 100
+
+
+def generate_baseline_vehicle_schedule(total_timesteps, time_interval, random_generator):
+    # Per timestep generator of a single charger, which the vectorized generator replaced: an empty charger gets a
+    # vehicle with probability 0.4, which stays for 4 up to 10 hours and is followed by at least one empty timestep
+    vehicle_arrivals = []
+    vehicle_departures = []
+
+    vehicle_present = False
+    current_departure_time = 0
+    for timestep in range(total_timesteps):
+        if not vehicle_present:
+            arrival = round(random_generator.random() - 0.1)
+            if arrival == 1:
+                vehicle_present = True
+                vehicle_arrivals.append(timestep)
+
+                max_charging_time = timestep + int(10 / time_interval)
+                max_departing_time = total_timesteps + int(1 / time_interval)
+                low = timestep + int(4 / time_interval)
+                high = min(max_charging_time, max_departing_time)
+                current_departure_time = low if low >= high else int(random_generator.integers(low, high))
+                vehicle_departures.append(current_departure_time)
+
+        if not (vehicle_present and timestep < current_departure_time):
+            vehicle_present = False
+
+    return vehicle_arrivals, vehicle_departures
+
+
+def get_schedule_statistics(arrivals, departures, total_timesteps, number_of_charger_days):
+    arrivals, departures = np.asarray(arrivals), np.asarray(departures)
+    occupancy_profile = np.zeros(total_timesteps)
+    for arrival, departure in zip(arrivals, departures):
+        occupancy_profile[arrival:min(departure, total_timesteps)] += 1
+    return {
+        'Occupancy_profile': occupancy_profile / number_of_charger_days,
+        'Vehicles_per_charger': len(arrivals) / number_of_charger_days,
+        'Stay_timesteps': (departures - arrivals).mean(),
+        'Arrival_timestep': arrivals.mean()
+    }
+
+
+@pytest.mark.parametrize('time_interval', [0.25, 1.0, 2.0])
+def test_vectorized_generator_matches_baseline_distribution(time_interval):
+    scenario_generator = ScenarioGenerator(NUMBER_OF_CHARGERS, time_interval, get_array_columns(time_interval), True,
+                                           True)
+    total_timesteps = scenario_generator.TOTAL_TIMESTEPS
+    number_of_charger_days = NUMBER_OF_CHARGERS * NUMBER_OF_DAYS
+
+    vehicles = scenario_generator.generate_vehicles(NUMBER_OF_DAYS, np.random.default_rng(0))
+    vehicles = vehicles[vehicles['Arrivals'] < total_timesteps]
+    statistics = get_schedule_statistics(vehicles['Arrivals'], vehicles['Departures'], total_timesteps,
+                                         number_of_charger_days)
+
+    baseline_random_generator = np.random.default_rng(1)
+    baseline_arrivals, baseline_departures = [], []
+    for _ in range(number_of_charger_days):
+        arrivals, departures = generate_baseline_vehicle_schedule(total_timesteps, time_interval,
+                                                                  baseline_random_generator)
+        baseline_arrivals.extend(arrivals)
+        baseline_departures.extend(departures)
+    baseline_statistics = get_schedule_statistics(baseline_arrivals, baseline_departures, total_timesteps,
+                                                  number_of_charger_days)
+
+    # Tolerances are several standard errors of the sampled statistics
+    assert np.allclose(statistics['Occupancy_profile'], baseline_statistics['Occupancy_profile'], atol=0.05)
+    assert statistics['Vehicles_per_charger'] == pytest.approx(baseline_statistics['Vehicles_per_charger'], abs=0.1)
+    assert statistics['Stay_timesteps'] == pytest.approx(baseline_statistics['Stay_timesteps'],
+                                                         abs=0.15 / time_interval)
+    assert statistics['Arrival_timestep'] == pytest.approx(baseline_statistics['Arrival_timestep'],
+                                                           abs=0.5 / time_interval)
+
+
+@pytest.mark.parametrize('time_interval', [0.25, 1.0, 2.0])
+def test_generated_vehicles_respect_value_ranges(time_interval):
+    scenario_generator = ScenarioGenerator(NUMBER_OF_CHARGERS, time_interval, get_array_columns(time_interval), True,
+                                           True)
+    vehicles = scenario_generator.generate_vehicles(NUMBER_OF_DAYS, np.random.default_rng(2))
+    vehicles = vehicles[vehicles['Arrivals'] < scenario_generator.TOTAL_TIMESTEPS]
+
+    stay_timesteps = vehicles['Departures'] - vehicles['Arrivals']
+    assert (stay_timesteps >= scenario_generator.MIN_CHARGING_TIMESTEPS).all()
+    assert (stay_timesteps < scenario_generator.MAX_CHARGING_TIMESTEPS).all()
+    # Like in the baseline, vehicles arriving late in the day still stay for the shortest charging time
+    latest_departures = np.maximum(scenario_generator.LATEST_DEPARTURE_TIMESTEP,
+                                   vehicles['Arrivals'] + scenario_generator.MIN_CHARGING_TIMESTEPS)
+    assert (vehicles['Departures'] <= latest_departures).all()
+
+    assert ((vehicles['SOC'] >= 0.1) & (vehicles['SOC'] < 0.9)).all()
+    assert (vehicles['Requested_SOC'] >= vehicles['SOC'] + 0.1).all()
+    assert (vehicles['Requested_SOC'] <= 1.0).all()
+    assert ((vehicles['Vehicle_capacities'] >= 15) & (vehicles['Vehicle_capacities'] < 120)).all()
+    assert np.array_equal(vehicles['Vehicle_capacities'], np.round(vehicles['Vehicle_capacities']))
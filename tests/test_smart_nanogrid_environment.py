@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def create_pv_environment(create_environment):
+    # The battery keeps its state between episodes, so it is left out to replay episodes with the same environment
+    return lambda: create_environment(pv_system_available_in_model=True)
+
+
+def run_episode(env, seed):
+    observations = [env.reset(seed=seed)[0]]
+    rewards = []
+    random_generator = np.random.default_rng(seed)
+    for _ in range(env.TOTAL_TIMESTEPS):
+        actions = random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32)
+        observation, reward, _, _, _ = env.step(actions)
+        observations.append(observation)
+        rewards.append(reward)
+    return np.array(observations), np.array(rewards)
+
+
+def test_reset_with_seed_reproduces_episode(create_pv_environment):
+    env = create_pv_environment()
+    observations, rewards = run_episode(env, 21)
+
+    replayed_observations, replayed_rewards = run_episode(env, 21)
+    assert np.array_equal(replayed_observations, observations)
+    assert np.array_equal(replayed_rewards, rewards)
+
+    other_observations, _ = run_episode(create_pv_environment(), 21)
+    assert np.array_equal(other_observations, observations)
+
+    different_seed_observations, _ = run_episode(env, 22)
+    assert not np.array_equal(different_seed_observations, observations)
+
+
+def test_seeded_environment_leaves_global_random_state_untouched(create_pv_environment):
+    env = create_pv_environment()
+    numpy_random_state = np.random.get_state()
+    random_state = random.getstate()
+
+    run_episode(env, 5)
+
+    assert all(np.array_equal(value, expected_value)
+               for value, expected_value in zip(np.random.get_state(), numpy_random_state))
+    assert random.getstate() == random_state
+
+
+def test_spawned_seed_sequences_give_independent_reproducible_episodes(create_pv_environment):
+    env = create_pv_environment()
+    env.seed(8)
+    first_seed_sequence, second_seed_sequence = env.spawn_seed_sequences(2)
+
+    first_observations, _ = run_episode(create_pv_environment(), first_seed_sequence)
+    second_observations, _ = run_episode(create_pv_environment(), second_seed_sequence)
+    assert not np.array_equal(first_observations, second_observations)
+
+    env.seed(8)
+    replayed_observations, _ = run_episode(create_pv_environment(), env.spawn_seed_sequences(1)[0])
+    assert np.array_equal(replayed_observations, first_observations)
+
+
+def test_episode_records_match_step_results(create_environment):
+    env = create_environment(pv_system_available_in_model=True, battery_system_available_in_model=True,
+                             enable_info_kpis=True)
+    env.reset(seed=9)
+    charging_station = env.central_management_system.charging_station
+    random_generator = np.random.default_rng(9)
+
+    actions, rewards, power_values, kpis = [], [], [], []
+    for _ in range(env.TOTAL_TIMESTEPS):
+        step_actions = random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32)
+        _, reward, done, _, info = env.step(step_actions)
+        actions.append(step_actions)
+        rewards.append(reward)
+        power_values.append(charging_station.get_charger_power_values().copy())
+        kpis.append(info['kpis'])
+    assert done
+
+    # One record per timestep, which holds what the step returned
+    records = env.episode_recorder.get_records()
+    assert len(records) == env.TOTAL_TIMESTEPS
+    actions, power_values = np.array(actions), np.array(power_values)
+    assert np.array_equal(records['Total_cost'], -np.array(rewards))
+    assert np.array_equal(records['Charger_actions'], actions[:, :-1])
+    assert np.array_equal(records['Battery_action'], actions[:, -1])
+    assert np.array_equal(records['Charger_power_values'], power_values)
+    assert np.allclose(records['Total_charging_power'], np.where(power_values > 0, power_values, 0).sum(axis=1))
+    assert np.allclose(records['Total_discharging_power'], np.where(power_values < 0, power_values, 0).sum(axis=1))
+    assert [env.episode_recorder.get_kpis(record) for record in records] == kpis
+    assert info['episode_kpis']['Total_cost'] == pytest.approx(-sum(rewards))
+
+    env.reset(seed=10)
+    assert not env.episode_recorder.get_records()['Total_cost'].any()
@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+
+from smart_nanogrid_gym.envs import SmartNanogridVecEnv
+
+ENVIRONMENT_VARIANTS = {
+    'basic': {'pv_system_available_in_model': False, 'battery_system_available_in_model': False},
+    'b-pv': {'pv_system_available_in_model': True, 'battery_system_available_in_model': True}
+}
+
+
+@pytest.fixture
+def create_environments(create_environment, environment_configuration):
+    # Single and batched environment of the same variant
+    def create_variant_environments(variant_name, number_of_environments=1, **configuration):
+        configuration = {'vehicle_uncharged_penalty_mode': 'sparse', **ENVIRONMENT_VARIANTS[variant_name],
+                         **configuration}
+        return create_environment(**configuration), \
+            SmartNanogridVecEnv(number_of_environments, **environment_configuration(**configuration))
+    return create_variant_environments
+
+
+def draw_actions(env, random_generator):
+    # Some chargers are left idle, so that empty chargers are also acted on
+    actions = random_generator.uniform(env.action_space.low, env.action_space.high).astype(np.float32)
+    actions[random_generator.random(actions.shape) < 0.2] = 0
+    return actions
+
+
+# Vehicle to everything variants are left out, random discharging actions can discharge more power than is charged,
+# which the central management system rejects
+@pytest.mark.parametrize('variant_name', list(ENVIRONMENT_VARIANTS))
+@pytest.mark.parametrize('vehicle_uncharged_penalty_mode', ['sparse', 'on_departure', 'dense', 'no_penalty'])
+def test_single_and_batched_environment_are_equivalent(create_environments, variant_name,
+                                                      vehicle_uncharged_penalty_mode):
+    env, vec_env = create_environments(variant_name, vehicle_uncharged_penalty_mode=vehicle_uncharged_penalty_mode)
+
+    for seed in range(3):
+        observation, _ = env.reset(seed=seed)
+        vec_env.seed(seed)
+        vec_observations = vec_env.reset()
+        assert np.allclose(observation, vec_observations[0])
+
+        random_generator = np.random.default_rng(seed)
+        for _ in range(env.TOTAL_TIMESTEPS):
+            actions = draw_actions(env, random_generator)
+            observation, reward, done, _, _ = env.step(actions)
+            vec_observations, vec_rewards, vec_dones, vec_infos = vec_env.step(actions[np.newaxis])
+
+            # Finished batched episodes are reset right away, their last observation is kept in the info
+            vec_observation = vec_infos[0]['terminal_observation'] if vec_dones[0] else vec_observations[0]
+            assert np.allclose(observation, vec_observation, atol=1e-5)
+            assert reward == pytest.approx(vec_rewards[0], rel=1e-5, abs=1e-4)
+            assert done == vec_dones[0]
+
+
+@pytest.mark.parametrize('variant_name', list(ENVIRONMENT_VARIANTS))
+def test_single_and_batched_environment_report_same_kpis(create_environments, variant_name):
+    env, vec_env = create_environments(variant_name, enable_info_kpis=True)
+    env.reset(seed=2)
+    vec_env.seed(2)
+    vec_env.reset()
+
+    random_generator = np.random.default_rng(2)
+    for _ in range(env.TOTAL_TIMESTEPS):
+        actions = draw_actions(env, random_generator)
+        _, _, done, _, info = env.step(actions)
+        _, _, _, vec_infos = vec_env.step(actions[np.newaxis])
+
+        assert vec_infos[0]['kpis'].keys() == info['kpis'].keys()
+        for field, value in info['kpis'].items():
+            assert vec_infos[0]['kpis'][field] == pytest.approx(value, rel=1e-5, abs=1e-4), field
+
+    assert vec_infos[0]['episode_kpis'].keys() == info['episode_kpis'].keys()
+    for field, value in info['episode_kpis'].items():
+        assert vec_infos[0]['episode_kpis'][field] == pytest.approx(value, rel=1e-5, abs=1e-4), field
+    # KPIs are plain floats, which stay valid after the next reset and can be serialised
+    json.dumps([info, {key: value for key, value in vec_infos[0].items() if key != 'terminal_observation'}])
+
+
+@pytest.mark.parametrize('variant_name', list(ENVIRONMENT_VARIANTS))
+def test_nanogrids_seeded_one_by_one_reproduce_single_environments(create_environments, variant_name):
+    seed_sequences = np.random.SeedSequence(9).spawn(3)
+    _, vec_env = create_environments(variant_name, 3)
+    vec_env.seed(seed_sequences)
+    vec_observations = vec_env.reset()
+
+    random_generator = np.random.default_rng(9)
+    actions = np.stack([draw_actions(vec_env, random_generator) for _ in range(vec_env.TOTAL_TIMESTEPS * 3)])
+    actions = actions.reshape(vec_env.TOTAL_TIMESTEPS, 3, -1)
+    vec_total_rewards = np.zeros(3)
+    for timestep_actions in actions:
+        _, rewards, _, _ = vec_env.step(timestep_actions)
+        vec_total_rewards += rewards
+
+    for environment_index, seed_sequence in enumerate(seed_sequences):
+        # Every episode starts from a new environment, because the battery keeps its state between episodes
+        env, _ = create_environments(variant_name)
+        observation, _ = env.reset(seed=seed_sequence)
+        assert np.allclose(observation, vec_observations[environment_index])
+
+        total_reward = sum(env.step(timestep_actions[environment_index])[1] for timestep_actions in actions)
+        assert total_reward == pytest.approx(vec_total_rewards[environment_index], rel=1e-5)
+
+
+def test_number_of_seeds_must_match_number_of_nanogrids(create_environments):
+    _, vec_env = create_environments('basic', 3)
+    with pytest.raises(ValueError):
+        vec_env.seed([1, 2])